@@ -0,0 +1,179 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from stock_data.price_cache import get_ohlcv, pct_change_from_bars
+from stock_data.providers import MARKET_TIMEZONE, SESSION_OPEN, SESSION_CLOSE, INTERVALS, market_session
+
+
+# Alignement intraday messages ↔ barres de prix.
+#
+# Chaque message est rattaché à la barre (15m, 1h ou 1d) pendant laquelle il a été publié ; un message publié
+# hors séance (nuit, week-end, jour férié) est rattaché à la première barre de la séance suivante, celle où
+# le marché peut y réagir. Les bornes des barres sont triées : le rattachement se fait par np.searchsorted,
+# sans fusion quadratique ni boucle Python, puis le sentiment est moyenné par barre (np.bincount).
+#
+#   aligned = align_messages(scored, bars, "1h", ticker="MC.PA")   # index = début de barre
+#   aligned.columns -> return_pct, sentiment, messages
+#   aligned_scores(aligned, max_lag=7)            # même dict que score_compatibilite_df, lags en barres
+#
+# Les barres sont en heure locale de la place du ticker et sans fuseau, comme celles des fournisseurs
+# (stock_data/providers.py) : fuseau et séance viennent de market_session(ticker) (Paris 09:00 → 17:30 pour
+# un ticker .PA, New York 09:30 → 16:00 sans suffixe). Les messages sont convertis dans ce fuseau.
+# Les scrapers produisent des datetime naïfs (datetime.fromtimestamp, heure de la machine) :
+# MESSAGE_TIMEZONE indique leur fuseau, par défaut celui de la machine (host_timezone).
+
+
+# La fonction host_timezone renvoie le fuseau de la machine : TZ, sinon le nom IANA du lien /etc/localtime
+# (changements d'heure compris), sinon le décalage actuel (datetime.now().astimezone()).
+
+def host_timezone():
+    if os.getenv("TZ"):
+        return os.getenv("TZ").lstrip(":")
+    localtime = os.path.realpath("/etc/localtime")
+    if "zoneinfo" + os.sep in localtime:
+        return localtime.split("zoneinfo" + os.sep, 1)[1]
+    return datetime.now().astimezone().tzinfo
+
+
+MESSAGE_TIMEZONE = os.getenv("MESSAGE_TIMEZONE") or host_timezone()
+
+
+def to_market_time(timestamps, source_tz=None, market_tz=None):
+    """Naive market-local datetime64 array from message timestamps (naive ones are read in source_tz)"""
+    index = pd.DatetimeIndex(pd.to_datetime(timestamps))
+    if index.tz is None:
+        index = index.tz_localize(source_tz or MESSAGE_TIMEZONE, ambiguous="NaT", nonexistent="shift_forward")
+    return index.tz_convert(market_tz or MARKET_TIMEZONE).tz_localize(None).to_numpy()
+
+
+# La fonction bar_bounds renvoie le début et la fin de chaque barre. Une barre journalière couvre la séance
+# session_open → session_close de son jour ; une barre intraday dure `interval`, sans dépasser la clôture.
+
+def bar_bounds(index, interval="1d", session_open=SESSION_OPEN, session_close=SESSION_CLOSE):
+    index = pd.DatetimeIndex(index)
+    days = index.normalize()
+    close = days + pd.Timedelta(session_close + ":00")
+    if interval == "1d":
+        return (days + pd.Timedelta(session_open + ":00")).to_numpy(), close.to_numpy()
+    step = pd.Timedelta(interval.replace("m", "min"))
+    return index.to_numpy(), np.minimum(index + step, close).to_numpy()
+
+
+# La fonction assign_to_bars renvoie, pour chaque instant, la position de sa barre dans (starts, ends),
+# ou -1 s'il est postérieur à la dernière barre. starts doit être trié et les barres disjointes.
+#   - searchsorted donne la dernière barre commencée à l'instant t
+#   - si t est après sa fin (hors séance), le message va à la barre suivante : début de la séance suivante
+
+def assign_to_bars(times, starts, ends):
+    position = np.searchsorted(starts, times, side="right") - 1
+    in_bar = (position >= 0) & (times < ends[np.maximum(position, 0)])
+    position = np.where(in_bar, position, position + 1)
+    position[(position >= len(starts)) | pd.isna(times)] = -1
+    return position
+
+
+# La fonction align_messages agrège les messages notés (colonnes timestamp et score) par barre :
+# sentiment moyen (NaN sans message), nombre de messages et % de variation (Close - Open) / Open de la barre.
+# ticker choisit le fuseau et la séance de la place (market_session) ; sans ticker, marché américain.
+
+def align_messages(scored, bars, interval="1d", time_column="timestamp", score_column="score", source_tz=None,
+                   ticker=None):
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval {interval!r} (expected one of {INTERVALS})")
+    aligned = pd.DataFrame({"return_pct": pct_change_from_bars(bars).to_numpy(dtype=float)}, index=bars.index)
+    if bars.empty:
+        aligned["sentiment"] = np.nan
+        aligned["messages"] = np.int32(0)
+        return aligned
+
+    market_tz, session_open, session_close = market_session(ticker)
+    starts, ends = bar_bounds(bars.index, interval, session_open, session_close)
+    if scored.empty:
+        position = np.array([], dtype=np.int64)
+    else:
+        times = to_market_time(scored[time_column], source_tz, market_tz)
+        position = assign_to_bars(times, starts, ends)
+    kept = position >= 0
+    scores = scored[score_column].to_numpy(dtype=float)[kept] if len(position) else np.array([])
+
+    counts = np.bincount(position[kept], minlength=len(bars))
+    sums = np.bincount(position[kept], weights=scores, minlength=len(bars))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        aligned["sentiment"] = np.where(counts > 0, sums / counts, np.nan)
+    aligned["messages"] = counts.astype(np.int32)
+    return aligned
+
+
+# La fonction aligned_arrays prépare (returns, sentiment) pour le calcul des lags : le sentiment d'une barre
+# sans message reprend celui de la dernière barre qui en avait, et les barres antérieures au premier
+# message sont retirées.
+
+def aligned_arrays(aligned):
+    sentiment = aligned["sentiment"].ffill()
+    first = sentiment.first_valid_index()
+    if first is None:
+        return np.array([]), np.array([])
+    keep = aligned.index >= first
+    return aligned["return_pct"].to_numpy()[keep], sentiment.to_numpy()[keep]
+
+
+def aligned_scores(aligned, max_lag=7):
+    """score_compatibilite_df fields on aligned bars; lags are counted in bars of the alignment's interval"""
+    from correlation import score_compatibilite_arrays
+    x, y = aligned_arrays(aligned)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if valid.sum() < 2:
+        return {"score_prediction": np.nan, "lag_prediction": None, "score_reaction": np.nan, "lag_reaction": None}
+    return score_compatibilite_arrays(x, y, max_lag)
+
+
+# La fonction score_messages note chaque message du corpus (moteur textblob, lexicon ou finbert)
+# en gardant son horodatage, là où le pipeline journalier ne garde que la date.
+
+def score_messages(corpus, engine="textblob"):
+    from pipeline import stage_score
+    if corpus.empty:
+        return pd.DataFrame({"timestamp": pd.Series(dtype="datetime64[ns]"), "score": pd.Series(dtype=float)})
+    messages = pd.DataFrame({
+        "day": pd.to_datetime(corpus["created_utc"]),
+        "content": corpus["content"],
+    }).dropna(subset=["content"]).reset_index(drop=True)
+    return stage_score(messages, engine).rename(columns={"day": "timestamp"})
+
+
+# La fonction aligned_series produit pour un ticker la série alignée (return_pct, sentiment, messages)
+# à la résolution demandée : barres du cache des prix (intraday comprises), messages du cache de corpus.
+
+def aligned_series(ticker, engine="textblob", interval="1h", days_back=30, provider=None, corpus=None):
+    from corpus_cache import get_corpus
+    end = datetime.now().date()
+    start = end - timedelta(days=days_back)
+    bars = get_ohlcv(ticker, start, end, provider=provider, interval=interval)
+    if corpus is None:
+        corpus = get_corpus(ticker, sources=('reddit',), days_back=days_back)
+    return align_messages(score_messages(corpus, engine), bars, interval, ticker=ticker)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lead/lag scores of sentiment vs returns at intraday resolution")
+    parser.add_argument('ticker')
+    parser.add_argument('--interval', choices=INTERVALS, default="1h")
+    parser.add_argument('--engine', choices=['textblob', 'lexicon', 'finbert'], default='textblob')
+    parser.add_argument('--days-back', type=int, default=30)
+    parser.add_argument('--max-lag', type=int, default=7, help="Maximum lag, in bars")
+    parser.add_argument('--provider', default=None, help="Market data provider (default: MARKET_DATA_PROVIDER)")
+    args = parser.parse_args(argv)
+
+    aligned = aligned_series(args.ticker, args.engine, args.interval, args.days_back, args.provider)
+    print(f"📈 {args.ticker}: {len(aligned)} {args.interval} bars, {int(aligned['messages'].sum())} messages aligned")
+    print(aligned_scores(aligned, args.max_lag))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
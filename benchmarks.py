@@ -0,0 +1,352 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import synthetic_data
+
+
+# Banc de mesure des chemins chauds, sur données synthétiques reproductibles (synthetic_data.py).
+# Chaque benchmark déclare une fonction de préparation (hors chrono), la fonction mesurée et plusieurs tailles.
+# Comme timeit.autorange, le nombre d'appels par mesure est ajusté pour durer au moins min_time secondes,
+# puis la mesure est répétée `repeat` fois ; on garde le minimum et la médiane par appel.
+#
+# Les résultats sont écrits en JSON dans benchmark_results/<date>-<commit>.json et comparés au fichier
+# précédent : un ratio > 1 signale une régression.
+#
+# Lancement : python benchmarks.py [--filter convert] [--quick] [--repeat 5]
+
+BENCHMARK_RESULTS_DIR = os.getenv("BENCHMARK_RESULTS_DIR", "benchmark_results")
+
+BENCHMARKS = {}
+
+
+def benchmark(name, scales, setup):
+    """Register a benchmark: setup(scale) returns args (not timed), the decorated func(*args) is timed"""
+    def decorator(func):
+        BENCHMARKS[name] = {'setup': setup, 'func': func, 'scales': scales}
+        return func
+    return decorator
+
+
+# ==========================
+# BENCHMARKS
+# ==========================
+
+def make_scraper():
+    # Sans passer par __init__ : detect_stock_in_text n'a besoin que des mots-clés, pas de l'API Reddit
+    from reddit_scraper_quick import RedditStockScraper
+    from stock_keywords import STOCK_KEYWORDS
+    scraper = object.__new__(RedditStockScraper)
+    scraper.stock_keywords = STOCK_KEYWORDS
+    return scraper
+
+
+def reddit_texts(n):
+    return (synthetic_data.reddit_messages(n, seed=4, mean_comments=0)['content'].tolist(),)
+
+
+@benchmark("detect_stock_in_text", scales=(1_000, 10_000, 50_000),
+           setup=lambda n: (make_scraper(),) + reddit_texts(n))
+def bench_detect_stock_in_text(scraper, texts):
+    for text in texts:
+        scraper.detect_stock_in_text(text, "AAPL")
+
+
+@benchmark("convert_timestamp", scales=(1_000, 10_000, 100_000),
+           setup=lambda n: (synthetic_data.bloomberg_timestamps(n, seed=2),))
+def bench_convert_timestamp(timestamps):
+    from scrape_finance_articles import convert_timestamp
+    for timestamp in timestamps:
+        convert_timestamp(timestamp)
+
+
+@benchmark("bloomberg_parse", scales=(100, 1_000),
+           setup=lambda n: (synthetic_data.bloomberg_html(n, seed=3),))
+def bench_bloomberg_parse(html):
+    from scrape_finance_articles import parse_search_results
+    parse_search_results(html)
+
+
+def bloomberg_articles(n):
+    from scrape_finance_articles import parse_search_results
+    return (parse_search_results(synthetic_data.bloomberg_html(n, seed=3)), "Apple")
+
+
+@benchmark("bloomberg_filter", scales=(100, 1_000, 5_000), setup=bloomberg_articles)
+def bench_bloomberg_filter(articles, company):
+    from scrape_finance_articles import filter_articles
+    filter_articles(articles, company)
+
+
+@benchmark("analyze_sentiment_textblob", scales=(1_000, 10_000), setup=reddit_texts)
+def bench_analyze_sentiment_textblob(texts):
+    from sentiment_analysis_textblob import analyze_sentiment_textblob
+    analyze_sentiment_textblob(texts, engine="textblob")
+
+
+@benchmark("analyze_sentiment_lexicon", scales=(1_000, 10_000, 100_000), setup=reddit_texts)
+def bench_analyze_sentiment_lexicon(texts):
+    from sentiment_analysis_textblob import analyze_sentiment_textblob
+    analyze_sentiment_textblob(texts, engine="lexicon")
+
+
+@benchmark("analyze_sentiment_finbert", scales=(64, 512), setup=reddit_texts)
+def bench_analyze_sentiment_finbert(texts):
+    from sentiment_analysis_finbert import analyze_sentiment
+    analyze_sentiment(texts)
+
+
+def scored_messages(n):
+    rng = np.random.default_rng(5)
+    days = pd.to_datetime(synthetic_data.reddit_messages(max(n // 9, 1), seed=5)['created_utc']).dt.date
+    days = np.resize(days.to_numpy(), n)
+    return (pd.DataFrame({'day': days, 'score': rng.uniform(-1, 1, n)}),)
+
+
+@benchmark("daily_aggregation", scales=(10_000, 100_000, 1_000_000), setup=scored_messages)
+def bench_daily_aggregation(scored):
+    from pipeline import stage_aggregate
+    stage_aggregate(scored)
+
+
+def correlation_inputs(n_days):
+    prices = synthetic_data.ohlcv(n_days, seed=6)["AAPL"]
+    y1 = (((prices["Close"] - prices["Open"]) / prices["Open"]) * 100).to_frame("AAPL")
+    return y1, synthetic_data.sentiment_series(y1, seed=6)
+
+
+@benchmark("score_compatibilite_df", scales=(30, 250, 2_500), setup=correlation_inputs)
+def bench_score_compatibilite_df(y1, y2):
+    from correlation import score_compatibilite_df
+    score_compatibilite_df(y1, y2)
+
+
+# Historique synthétique limité à la fenêtre et généré pendant le setup : la mesure porte sur
+# get_ohlcv_many / pct_change_from_bars, pas sur la génération des 16 ans de barres de l'ancre par défaut.
+
+def synthetic_universe(days_back):
+    from stock_data.providers import SyntheticProvider
+    from stock_data.price_cache import window_bounds
+    from stock_keywords import STOCK_KEYWORDS
+    tickers = list(STOCK_KEYWORDS)
+    start, end = window_bounds(days_back)
+    provider = SyntheticProvider(seed=7)
+    provider.ANCHOR_START, provider.ANCHOR_END = str(start), str(end)
+    provider.fetch(tickers, start, end)
+    return tickers, start, end, provider
+
+
+@benchmark("pct_change_universe", scales=(30, 250, 2_500), setup=synthetic_universe)
+def bench_pct_change_universe(tickers, start, end, provider):
+    from stock_data.price_cache import get_ohlcv_many, pct_change_from_bars
+    pct_change_from_bars(get_ohlcv_many(tickers, start, end, provider=provider))
+
+
+def universe_inputs(n_days):
+    from stock_keywords import STOCK_KEYWORDS
+    tickers = list(STOCK_KEYWORDS)
+    prices = synthetic_data.ohlcv(n_days, tickers, seed=10)
+    returns = ((prices.xs("Close", axis=1, level=1) - prices.xs("Open", axis=1, level=1))
+               / prices.xs("Open", axis=1, level=1) * 100).to_numpy()
+    rng = np.random.default_rng(10)
+    sentiment = np.tanh(0.3 * np.roll(returns, 1, axis=0)[:, :, None] + rng.normal(0, 0.3, returns.shape + (2,)))
+    return returns, sentiment, tickers
+
+
+@benchmark("score_universe", scales=(30, 250, 2_500), setup=universe_inputs)
+def bench_score_universe(returns, sentiment, tickers):
+    from correlation import score_universe
+    score_universe(returns, sentiment, tickers, ("textblob", "finbert"))
+
+
+@benchmark("cross_ticker_scores", scales=(30, 250, 2_500), setup=universe_inputs)
+def bench_cross_ticker_scores(returns, sentiment, tickers):
+    from correlation import cross_ticker_scores
+    cross_ticker_scores(returns, sentiment, tickers, ("textblob", "finbert"))
+
+
+def hourly_series(n_bars):
+    # n_bars barres 1h (7 par séance : 1 764 ≈ un an de séances), sentiment bruité corrélé au rendement de la veille
+    daily = synthetic_data.ohlcv(max(n_bars // 7, 2), seed=9)["AAPL"]
+    bars = synthetic_data.intraday_ohlcv(daily, "1h", seed=9).iloc[:n_bars]
+    x = (((bars["Close"] - bars["Open"]) / bars["Open"]) * 100).to_numpy()
+    y = np.tanh(0.3 * np.roll(x, 7) + np.random.default_rng(9).normal(0, 0.3, len(x)))
+    return x, y
+
+
+@benchmark("correlation_hourly_week_lags", scales=(1_764, 8_760, 87_600), setup=hourly_series)
+def bench_correlation_hourly_week_lags(x, y):
+    from correlation import score_compatibilite_arrays
+    # ±1 semaine de séances en barres 1h
+    score_compatibilite_arrays(x, y, max_lag_days=35)
+
+
+@benchmark("correlation_hourly_month_lags", scales=(1_764, 8_760, 87_600), setup=hourly_series)
+def bench_correlation_hourly_month_lags(x, y):
+    from correlation import score_compatibilite_arrays
+    # ±1 mois de séances : bande assez large pour passer par la FFT
+    score_compatibilite_arrays(x, y, max_lag_days=147)
+
+
+def daily_ticks(n_days):
+    y1, y2 = correlation_inputs(n_days)
+    y2 = pd.Series(y2["GlobalScore"], index=pd.to_datetime(y2["analysis_date"]))
+    x, y = y1["AAPL"].align(y2, join="inner")
+    return x.to_numpy(), y.to_numpy()
+
+
+@benchmark("rolling_correlator_update", scales=(250, 2_500), setup=daily_ticks)
+def bench_rolling_correlator_update(x, y):
+    # Un update par jour : le coût par élément doit rester constant quand l'historique s'allonge
+    from rolling_correlation import rolling_scores
+    rolling_scores(x, y, window=30, max_lag_days=7)
+
+
+def intraday_messages(n):
+    from stock_data.providers import SyntheticProvider
+    bars = SyntheticProvider(seed=8).fetch(["AAPL"], "2025-01-01", "2025-12-31", "15m")["AAPL"]
+    rng = np.random.default_rng(8)
+    times = rng.integers(pd.Timestamp("2025-01-01").value, pd.Timestamp("2026-01-01").value, n)
+    return pd.DataFrame({'timestamp': pd.to_datetime(times), 'score': rng.uniform(-1, 1, n)}), bars
+
+
+@benchmark("intraday_alignment", scales=(10_000, 100_000, 1_000_000), setup=intraday_messages)
+def bench_intraday_alignment(scored, bars):
+    from alignment import align_messages
+    align_messages(scored, bars, "15m")
+
+
+# ==========================
+# HARNESS
+# ==========================
+
+def time_call(func, args, min_time=0.2, repeat=5):
+    # Nombre d'appels par mesure augmenté jusqu'à dépasser min_time (comme timeit.autorange)
+    def measure(number):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(*args)
+        return time.perf_counter() - start
+
+    number = 1
+    elapsed = measure(number)
+    while elapsed < min_time:
+        number = int(number * min(10.0, 1.2 * min_time / max(elapsed, 1e-9))) + 1
+        elapsed = measure(number)
+
+    timings = [elapsed / number] + [measure(number) / number for _ in range(repeat - 1)]
+    return number, timings
+
+
+def run_benchmarks(name_filter=None, quick=False, repeat=5, min_time=0.2):
+    results = []
+    for name, bench in BENCHMARKS.items():
+        if name_filter and name_filter not in name:
+            continue
+        for scale in bench['scales'][:1] if quick else bench['scales']:
+            try:
+                args = bench['setup'](scale)
+                number, timings = time_call(bench['func'], args, min_time, repeat)
+            except ImportError as e:
+                # Dépendance optionnelle absente (TensorFlow pour FinBERT...) : benchmark sauté
+                print(f"⚠️ {name}[{scale}] skipped: {e}")
+                results.append({'name': name, 'scale': scale, 'skipped': str(e)})
+                break
+            result = {
+                'name': name,
+                'scale': scale,
+                'number': number,
+                'repeat': len(timings),
+                'min': min(timings),
+                'median': float(np.median(timings)),
+                'per_item_us': min(timings) / scale * 1e6,
+            }
+            results.append(result)
+            print(f"⏱️  {name:<28} n={scale:<9} min {result['min'] * 1e3:10.3f} ms  "
+                  f"({result['per_item_us']:.2f} µs/item)")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(results, output_dir=None):
+    output_dir = output_dir or BENCHMARK_RESULTS_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    commit = git_commit()
+    payload = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'results': results,
+    }
+    path = os.path.join(output_dir, f"{datetime.now():%Y%m%d-%H%M%S}-{commit}.json")
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f"💾 Results saved to {path}")
+    return path
+
+
+# La fonction compare_results affiche, pour chaque (benchmark, taille) commun, le ratio
+# nouveau / ancien du temps minimal (> 1 = plus lent).
+
+def compare_results(previous_path, results, threshold=1.1):
+    with open(previous_path) as f:
+        previous = {(r['name'], r['scale']): r for r in json.load(f)['results'] if 'min' in r}
+    print(f"\n📊 Compared with {os.path.basename(previous_path)}")
+    regressions = 0
+    for r in results:
+        old = previous.get((r['name'], r['scale']))
+        if old is None or 'min' not in r:
+            continue
+        ratio = r['min'] / old['min']
+        flag = "❌" if ratio > threshold else "✅"
+        regressions += ratio > threshold
+        print(f"{flag} {r['name']:<28} n={r['scale']:<9} x{ratio:.2f}")
+    return regressions
+
+
+def latest_results_file(output_dir=None, exclude=None):
+    output_dir = output_dir or BENCHMARK_RESULTS_DIR
+    if not os.path.isdir(output_dir):
+        return None
+    files = sorted(f for f in os.listdir(output_dir) if f.endswith(".json"))
+    files = [os.path.join(output_dir, f) for f in files if os.path.join(output_dir, f) != exclude]
+    return files[-1] if files else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic data")
+    parser.add_argument('--filter', default=None, help="Only run benchmarks whose name contains this string")
+    parser.add_argument('--quick', action='store_true', help="Smallest scale only")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help="Minimum seconds per measurement")
+    parser.add_argument('--output', default=None, help=f"Results directory (default: {BENCHMARK_RESULTS_DIR})")
+    parser.add_argument('--compare', default=None, help="Results file to compare with (default: previous run)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.filter, args.quick, args.repeat, args.min_time)
+    path = write_results(results, args.output)
+    previous = args.compare or latest_results_file(args.output, exclude=path)
+    if previous:
+        compare_results(previous, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
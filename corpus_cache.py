@@ -0,0 +1,111 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+
+import pandas as pd
+
+from reddit_scraper_quick import RedditStockScraper
+from stock_keywords import get_company_from_ticker
+import metrics
+
+
+# Cache du corpus scrapé, partagé par toutes les analyses (TextBlob, FinBERT, mixte, corrélation, dashboard).
+# La clé est (ticker, source, fenêtre en jours) ; une entrée reste valable CORPUS_TTL_SECONDS.
+# Un corpus multi-sources est la concaténation des entrées de chaque source : une analyse mixte
+# (reddit + bloomberg) réutilise le corpus Reddit déjà scrapé pour une analyse Reddit seule.
+# Si plusieurs appels demandent la même clé en même temps, un seul scrape est lancé et les autres
+# attendent son résultat (single-flight) : chaque source d'un ticker est scrapée au plus une fois par TTL.
+
+CORPUS_TTL_SECONDS = int(os.getenv("CORPUS_TTL_SECONDS", 30 * 60))
+
+corpus_cache = {}      # clé -> (instant du scrape, DataFrame)
+corpus_inflight = {}   # clé -> Future du scrape en cours
+corpus_lock = threading.Lock()
+
+
+# La fonction scrape_source fait le scrape réel d'une source ('reddit' ou 'bloomberg').
+
+def scrape_source(ticker, source, days_back):
+    if source == 'reddit':
+        scraper = RedditStockScraper(days_back=days_back, max_workers=8)
+        return scraper.search_single_stock(ticker, limit_per_sub=20, time_filter='month')
+
+    if source == 'bloomberg':
+        # Import local : playwright n'est nécessaire que si on scrape Bloomberg
+        from playwright.sync_api import sync_playwright
+        from scrape_finance_articles import scrape_bloomberg
+        with sync_playwright() as playwright:
+            return scrape_bloomberg(playwright, get_company_from_ticker(ticker))
+
+    raise ValueError(f"Unknown corpus source '{source}' (expected 'reddit' or 'bloomberg')")
+
+
+def concat_corpora(frames):
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+# La fonction scrape_corpus scrape les sources demandées, sans cache, et concatène les résultats.
+
+def scrape_corpus(ticker, sources, days_back):
+    return concat_corpora([scrape_source(ticker, source, days_back) for source in sources])
+
+
+# La fonction get_source_corpus renvoie le corpus d'une source pour un ticker (DataFrame en cache, non copié),
+# en ne scrapant que si aucune entrée valide n'existe et qu'aucun scrape identique n'est en cours.
+
+def get_source_corpus(ticker, source, days_back, ttl):
+    key = (ticker, source, days_back)
+
+    with corpus_lock:
+        entry = corpus_cache.get(key)
+        if entry is not None and time.time() - entry[0] < ttl:
+            metrics.inc("cache_hits_total", cache="corpus")
+            print(f"📦 Corpus {ticker} ({source}) servi depuis le cache")
+            return entry[1]
+
+        future = corpus_inflight.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            corpus_inflight[key] = future
+
+    if not owner:
+        metrics.inc("cache_hits_total", cache="corpus")
+        print(f"⏳ Corpus {ticker} ({source}) déjà en cours de scraping, en attente...")
+        return future.result()
+
+    metrics.inc("cache_misses_total", cache="corpus")
+    try:
+        df = scrape_source(ticker, source, days_back)
+    except Exception as e:
+        with corpus_lock:
+            corpus_inflight.pop(key, None)
+        future.set_exception(e)
+        raise
+
+    with corpus_lock:
+        corpus_cache[key] = (time.time(), df)
+        corpus_inflight.pop(key, None)
+    future.set_result(df)
+    return df
+
+
+# La fonction get_corpus renvoie le corpus d'un ticker pour les sources demandées (une copie, concaténation
+# des entrées en cache de chaque source).
+
+def get_corpus(ticker, sources=('reddit',), days_back=30, ttl=None):
+    ttl = CORPUS_TTL_SECONDS if ttl is None else ttl
+    return concat_corpora([get_source_corpus(ticker, source, days_back, ttl) for source in sorted(set(sources))])
+
+
+# La fonction invalidate_corpus vide le cache pour un ticker (ou entièrement si ticker est None).
+
+def invalidate_corpus(ticker=None):
+    with corpus_lock:
+        for key in list(corpus_cache):
+            if ticker is None or key[0] == ticker:
+                del corpus_cache[key]
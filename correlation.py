@@ -1,10 +1,29 @@
+import os
+import warnings
+
 import numpy as np
 import pandas as pd
 
+import metrics
+
 from stock_data.dataframe_percent import get_pct_change_df  # Ton module perso
 from sentiment_analysis_textblob import analyze_single_stock_textblob, analyze_single_stock_textblob, main_analyse_textblob   # Ton module perso
 
 
+# Noyau de corrélation croisée « en bande » : seuls les lags -max_lag..+max_lag sont calculés,
+# directement (un produit scalaire par lag, O(n · max_lag)) si la bande est étroite, par FFT (O(n log n))
+# sinon. Chaque lag est normalisé par son nombre réel de paires qui se recouvrent (valeurs NaN exclues),
+# et non par la longueur totale de la série.
+#
+# Convention des lags (celle de np.correlate) : au lag k, le sentiment du jour t est comparé
+# au % de variation du jour t + k. k >= 0 : le sentiment précède le prix (prédiction) ; k < 0 : réaction.
+
+# Au-delà de ce nombre de lags, la FFT devient plus rapide que les produits scalaires
+FFT_MIN_LAGS = int(os.getenv("FFT_MIN_LAGS", 256))
+
+NAN_SCORES = {"score_prediction": np.nan, "lag_prediction": None, "score_reaction": np.nan, "lag_reaction": None}
+
+
 def score_compatibilite_df(y1: pd.DataFrame, y2: dict, col_name: str = None, max_lag_days: int = 7):
     """
     Calcule deux scores de compatibilité (0–100) entre un DataFrame y1 indexé par date
@@ -16,64 +35,90 @@ def score_compatibilite_df(y1: pd.DataFrame, y2: dict, col_name: str = None, max
     """
     if col_name is None:
         col_name = y1.columns[0]
+    if col_name not in y1.columns:
+        return dict(NAN_SCORES)
 
-    dates = pd.to_datetime(y2["analysis_date"])
-    values = np.array(y2["GlobalScore"]) * 100
-    
-    y2_df = pd.DataFrame(data={col_name: values}, index=dates)
+    dates = pd.DatetimeIndex(pd.to_datetime(y2["analysis_date"]))
+    values = np.asarray(y2["GlobalScore"], dtype=float) * 100
+    prices = y1[col_name]
 
-    colonnes_communes = y1.columns.intersection(y2_df.columns)
-    if len(colonnes_communes) == 0:
-        return {
-            "score_prediction": np.nan,
-            "lag_prediction": None,
-            "score_reaction": np.nan,
-            "lag_reaction": None
-        }
+    if prices.index.is_unique and dates.is_unique:
+        # Jointure interne par positions (get_indexer), sans construire ni aligner de DataFrame
+        common = prices.index.intersection(dates).sort_values()
+        x = prices.to_numpy(dtype=float)[prices.index.get_indexer(common)]
+        y = values[dates.get_indexer(common)]
+    else:
+        s1, s2 = prices.align(pd.Series(values, index=dates), join='inner')
+        x, y = s1.to_numpy(dtype=float), s2.to_numpy(dtype=float)
 
-    s1, s2 = y1[colonnes_communes], y2_df[colonnes_communes]
-    s1, s2 = s1.align(s2, join='inner')
+    return score_compatibilite_arrays(x, y, max_lag_days)
 
-    a = ((s1 - s1.mean()) / s1.std()).iloc[:, 0].to_numpy()
-    b = ((s2 - s2.mean()) / s2.std()).iloc[:, 0].to_numpy()
 
-    corr = np.correlate(a, b, mode='full') / len(a)
-    lags = np.arange(-len(b) + 1, len(a))
+def score_compatibilite_arrays(x: np.ndarray, y: np.ndarray, max_lag_days: int = 7, method: str = "auto"):
+    """
+    Même calcul que score_compatibilite_df, sur deux séries déjà alignées (même index de dates,
+    même longueur) : x = % de variation, y = sentiment. Utilisé directement par le panel
+    (panel_store.py) et l'alignement intraday (alignment.py), qui fournissent des tableaux numpy
+    sans reconstruire de DataFrame. Les NaN sont ignorés paire par paire.
+    """
+    with metrics.span("correlation"):
+        return correlation_scores(np.asarray(x, dtype=float), np.asarray(y, dtype=float), max_lag_days, method)
 
-    zero_lag_index = len(b) - 1
 
-    # Filtrer les lags dans la fenêtre ±max_lag_days
-    lag_mask = (lags >= -max_lag_days) & (lags <= max_lag_days)
-    corr = corr[lag_mask]
-    lags = lags[lag_mask]
+# La fonction banded_xcorr renvoie (lags, sommes, nombres de paires) pour les lags -max_lag..+max_lag :
+# sommes[k] = Σ a[t + k] · b[t] et nombres[k] = nombre de t où a[t + k] et b[t] sont tous deux définis.
 
-    # Séparer lags négatifs (réaction) et positifs (prédiction)
-    negative_mask = lags < 0
-    positive_mask = lags >= 0
+def banded_xcorr(a, b, max_lag, method="auto"):
+    n = len(a)
+    max_lag = min(int(max_lag), n - 1)
+    lags = np.arange(-max_lag, max_lag + 1)
 
-    negative_corr = corr[negative_mask]
-    negative_lags = lags[negative_mask]
+    valid_a, valid_b = ~np.isnan(a), ~np.isnan(b)
+    a0, b0 = np.where(valid_a, a, 0.0), np.where(valid_b, b, 0.0)
 
-    positive_corr = corr[positive_mask]
-    positive_lags = lags[positive_mask]
+    if method == "auto":
+        method = "fft" if len(lags) >= FFT_MIN_LAGS else "direct"
 
-    # Score prédiction (lag >= 0)
-    if len(positive_corr) > 0:
-        idx_max_pos = np.argmax(positive_corr)
-        score_prediction = (positive_corr[idx_max_pos]) * 100
-        lag_prediction = positive_lags[idx_max_pos]
-    else:
-        score_prediction = np.nan
-        lag_prediction = None
-
-    # Score réaction (lag < 0)
-    if len(negative_corr) > 0:
-        idx_max_neg = np.argmax(negative_corr)
-        score_reaction = (negative_corr[idx_max_neg]) * 100
-        lag_reaction = negative_lags[idx_max_neg]
+    if method == "direct":
+        sums = np.empty(len(lags))
+        counts = np.empty(len(lags))
+        for i, k in enumerate(lags):
+            sa = slice(k, n) if k >= 0 else slice(0, n + k)
+            sb = slice(0, n - k) if k >= 0 else slice(-k, n)
+            sums[i] = np.dot(a0[sa], b0[sb])
+            counts[i] = np.count_nonzero(valid_a[sa] & valid_b[sb])
+    elif method == "fft":
+        size = 1 << int(np.ceil(np.log2(2 * n - 1)))
+
+        def xcorr(u, v):
+            # Corrélation circulaire sur 2n - 1 points (aucun repliement), lue aux lags -max_lag..+max_lag
+            full = np.fft.irfft(np.fft.rfft(u, size) * np.conj(np.fft.rfft(v, size)), size)
+            return full[lags % size]
+
+        sums = xcorr(a0, b0)
+        counts = np.rint(xcorr(valid_a.astype(float), valid_b.astype(float)))
     else:
-        score_reaction = np.nan
-        lag_reaction = None
+        raise ValueError(f"Unknown method {method!r} (expected 'auto', 'direct' or 'fft')")
+    return lags, sums, counts
+
+
+def correlation_scores(x, y, max_lag_days, method="auto"):
+    if len(x) < 2:
+        return dict(NAN_SCORES)
+
+    a = (x - np.nanmean(x)) / np.nanstd(x, ddof=1)
+    b = (y - np.nanmean(y)) / np.nanstd(y, ddof=1)
+
+    lags, sums, counts = banded_xcorr(a, b, max_lag_days, method)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = np.where(counts > 0, sums / counts, np.nan)
+
+    # Séparer lags négatifs (réaction) et positifs (prédiction)
+    negative_mask = lags < 0
+    positive_mask = lags >= 0
+
+    score_prediction, lag_prediction = best_lag(corr[positive_mask], lags[positive_mask])
+    score_reaction, lag_reaction = best_lag(corr[negative_mask], lags[negative_mask])
 
     return {
         "score_prediction": score_prediction,
@@ -82,6 +127,141 @@ def score_compatibilite_df(y1: pd.DataFrame, y2: dict, col_name: str = None, max
         "lag_reaction": lag_reaction
     }
 
+
+def best_lag(corr, lags):
+    """(score 0-100, lag) of the highest correlation, (nan, None) when there is none"""
+    if len(corr) == 0 or np.isnan(corr).all():
+        return np.nan, None
+    idx = np.nanargmax(corr)
+    return corr[idx] * 100, lags[idx]
+
+# ==========================
+# UNIVERS ENTIER
+# ==========================
+# Même calcul pour tous les tickers et tous les moteurs d'un coup, par diffusion numpy : une seule boucle
+# Python sur les 2 · max_lag + 1 lags, chaque itération traitant la matrice dates × tickers × moteurs.
+# Les séries partagent l'axe des dates (p. ex. le panel) : les lags se comptent en pas de cet axe et
+# les paires avec un NaN sont ignorées, comme dans score_compatibilite_arrays.
+
+def standardize(values):
+    """(values - nanmean) / nanstd(ddof=1) along the date axis (axis 0); all-NaN columns stay NaN"""
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0, ddof=1)
+
+
+def lag_slices(n, k):
+    """Slices pairing a[t + k] with b[t] over their overlap"""
+    return (slice(k, n), slice(0, n - k)) if k >= 0 else (slice(0, n + k), slice(-k, n))
+
+
+def best_lags(corr, lags):
+    """Highest correlation over axis 0 and its lag: (score 0-100, lag), both NaN where there is none"""
+    if len(lags) == 0:
+        return np.full(corr.shape[1:], np.nan), np.full(corr.shape[1:], np.nan)
+    empty = np.isnan(corr).all(axis=0)
+    idx = np.argmax(np.where(np.isnan(corr), -np.inf, corr), axis=0)
+    best = np.take_along_axis(corr, idx[None], axis=0)[0] * 100
+    return np.where(empty, np.nan, best), np.where(empty, np.nan, lags[idx])
+
+
+# La fonction score_universe calcule score/lag de prédiction et de réaction pour chaque (ticker, moteur).
+#   returns   : matrice dates × tickers des % de variation
+#   sentiment : tenseur dates × tickers × moteurs (ou matrice dates × tickers pour un seul moteur)
+# Renvoie un DataFrame long (ticker, engine, score_prediction, lag_prediction, score_reaction, lag_reaction),
+# lags en entiers nullables (<NA> là où score_compatibilite_df renverrait None).
+
+def score_universe(returns, sentiment, tickers=None, engines=None, max_lag_days=7):
+    returns = np.asarray(returns, dtype=float)
+    sentiment = np.asarray(sentiment, dtype=float)
+    if sentiment.ndim == 2:
+        sentiment = sentiment[:, :, None]
+    n, n_tickers, n_engines = sentiment.shape
+    tickers = list(tickers) if tickers is not None else list(range(n_tickers))
+    engines = list(engines) if engines is not None else list(range(n_engines))
+
+    with metrics.span("correlation", scope="universe"):
+        a = standardize(returns)[:, :, None]
+        b = standardize(sentiment)
+        valid_a, valid_b = ~np.isnan(a), ~np.isnan(b)
+        a0, b0 = np.where(valid_a, a, 0.0), np.where(valid_b, b, 0.0)
+
+        max_lag = max(min(int(max_lag_days), n - 1), 0)
+        lags = np.arange(-max_lag, max_lag + 1)
+        corr = np.empty((len(lags), n_tickers, n_engines))
+        for i, k in enumerate(lags):
+            sa, sb = lag_slices(n, k)
+            counts = np.count_nonzero(valid_a[sa] & valid_b[sb], axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                corr[i] = np.where(counts > 0, np.einsum('tij,tij->ij', a0[sa], b0[sb]) / counts, np.nan)
+
+        positive = lags >= 0
+        score_prediction, lag_prediction = best_lags(corr[positive], lags[positive])
+        score_reaction, lag_reaction = best_lags(corr[~positive], lags[~positive])
+
+    def lag_column(values):
+        return pd.Series(values.ravel()).astype("Int64").array
+
+    return pd.DataFrame({
+        "ticker": np.repeat(tickers, n_engines),
+        "engine": np.tile(engines, n_tickers),
+        "score_prediction": score_prediction.ravel(),
+        "lag_prediction": lag_column(lag_prediction),
+        "score_reaction": score_reaction.ravel(),
+        "lag_reaction": lag_column(lag_reaction),
+    })
+
+
+# La fonction cross_ticker_scores compare le sentiment de chaque ticker A aux rendements de chaque ticker B :
+# pour chaque moteur, meilleure corrélation (0–100) sur les lags de prédiction (0..max_lag, sentiment en avance)
+# ou de réaction (-max_lag..-1). Chaque lag est un produit matriciel (tickers × tickers × moteurs).
+# Renvoie (scores, lags) : DataFrames indexés par (engine, sentiment_ticker), une colonne par ticker de rendement
+# (lags en flottants, NaN là où aucune paire ne se recouvre).
+
+def cross_ticker_scores(returns, sentiment, tickers=None, engines=None, max_lag_days=7, direction="prediction"):
+    returns = np.asarray(returns, dtype=float)
+    sentiment = np.asarray(sentiment, dtype=float)
+    if sentiment.ndim == 2:
+        sentiment = sentiment[:, :, None]
+    n, n_tickers, n_engines = sentiment.shape
+    tickers = list(tickers) if tickers is not None else list(range(n_tickers))
+    engines = list(engines) if engines is not None else list(range(n_engines))
+
+    max_lag = max(min(int(max_lag_days), n - 1), 0)
+    if direction == "prediction":
+        lags = np.arange(0, max_lag + 1)
+    elif direction == "reaction":
+        lags = np.arange(-max_lag, 0)
+    else:
+        raise ValueError(f"Unknown direction {direction!r} (expected 'prediction' or 'reaction')")
+
+    with metrics.span("correlation", scope="cross"):
+        a = standardize(returns)
+        b = standardize(sentiment).reshape(n, n_tickers * n_engines)
+        valid_a, valid_b = (~np.isnan(a)).astype(float), (~np.isnan(b)).astype(float)
+        a0, b0 = np.nan_to_num(a), np.nan_to_num(b)
+
+        # corr[lag, ticker du rendement, (ticker du sentiment, moteur)]
+        corr = np.empty((len(lags), n_tickers, n_tickers * n_engines))
+        for i, k in enumerate(lags):
+            sa, sb = lag_slices(n, k)
+            counts = valid_a[sa].T @ valid_b[sb]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                corr[i] = np.where(counts > 0, (a0[sa].T @ b0[sb]) / counts, np.nan)
+
+        best, best_lag = best_lags(corr, lags)
+
+    # (rendement, sentiment × moteur) -> (moteur, sentiment, rendement)
+    index = pd.MultiIndex.from_product([engines, tickers], names=["engine", "sentiment_ticker"])
+    columns = pd.Index(tickers, name="returns_ticker")
+
+    def to_frame(values):
+        values = values.reshape(n_tickers, n_tickers, n_engines).transpose(2, 1, 0).reshape(-1, n_tickers)
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    return to_frame(best), to_frame(best_lag)
+
+
 # --- MAIN ---
 if __name__ == "__main__":
     ticker = "GOOG"
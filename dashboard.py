@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -5,9 +6,12 @@ from datetime import datetime, timedelta
 import plotly.graph_objects as go
 import plotly.express as px
 
-from stock_data.dict_per_stock import get_stock_data
 from stock_data.dataframe_percent import get_pct_change_df
-from sentiment_analysis_textblob import main_analyse_textblob
+from stock_data.price_frame import get_price_frame
+import local_store
+import panel_store
+from sentiment_analysis_textblob import main_analyse_textblob, FAST_SENTIMENT_ENGINE
+import sentiment_analysis_finbert
 from sentiment_analysis_finbert import main_analyse_finbert
 
 from correlation import score_compatibilite_df
@@ -31,6 +35,23 @@ COLORS = {
 GRAPH_BG = "#F5F5F5"
 GRAPH_HEIGHT = 360
 
+# Fournisseur des barres de prix (stock_data/providers.py) : yfinance, local (LOCAL_BARS_DIR) ou synthetic
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+
+# ==========================
+# FINBERT PRELOAD
+# ==========================
+# Lancé une seule fois par processus Streamlit (partagé entre les sessions) : le mode rapide
+# n'attend jamais TensorFlow, et la première requête en mode lent trouve le modèle déjà chargé.
+# Inutile si un serveur d'inférence partagé est configuré (FINBERT_SERVER_URL).
+@st.cache_resource
+def start_finbert_preload():
+    if sentiment_analysis_finbert.FINBERT_SERVER_URL:
+        return None
+    return sentiment_analysis_finbert.preload_finbert_async()
+
+start_finbert_preload()
+
 # ==========================
 # SESSION STATE INIT
 # ==========================
@@ -116,6 +137,11 @@ with col_mode:
         key="mode_radio"
     )
     
+    if (mode_selected == "⏳ Slow & more accurate"
+            and not sentiment_analysis_finbert.FINBERT_SERVER_URL
+            and not sentiment_analysis_finbert.is_finbert_ready()):
+        st.caption("FinBERT model is still loading in the background...")
+
     if mode_selected != st.session_state.previous_mode:
         st.session_state.sentiment_data = {}
         st.session_state.previous_mode = mode_selected
@@ -149,23 +175,18 @@ st.markdown("<hr>", unsafe_allow_html=True)
 # ==========================
 ticker = [k for k, v in companies.items() if v == st.session_state.selected_company][0]
 
-if ticker not in st.session_state.finance_data:
-    with st.spinner(f"Loading financial data for {st.session_state.selected_company}..."):
-        df_raw = get_stock_data(tickers=ticker, days_back=30, include_today=True)
-        df_pct = get_pct_change_df(tickers=ticker, days_back=30, include_today=True)
-
-        if isinstance(df_raw.columns, pd.MultiIndex):
-            df_raw = df_raw[ticker]
+# Moteur de sentiment correspondant au mode (nom utilisé par le stockage local du démon)
+engine = "finbert" if st.session_state.mode == "⏳ Slow & more accurate" else FAST_SENTIMENT_ENGINE
 
-        df_raw = df_raw.reset_index()
-        df_raw.columns = [c.lower() for c in df_raw.columns]
-
-        if ticker in df_pct.columns:
-            df_raw["price_change_pct"] = df_pct[ticker].values
-        else:
-            df_raw["price_change_pct"] = np.nan
-
-        st.session_state.finance_data[ticker] = df_raw
+# Si refresh_daemon.py tourne, les données sont déjà précalculées : simple lecture du stockage local
+if ticker not in st.session_state.finance_data:
+    df_stored = local_store.read_prices(ticker)
+    if df_stored is not None:
+        st.session_state.finance_data[ticker] = df_stored
+    else:
+        with st.spinner(f"Loading financial data for {st.session_state.selected_company}..."):
+            st.session_state.finance_data[ticker] = get_price_frame(ticker, days_back=30, include_today=True,
+                                                                     provider=MARKET_DATA_PROVIDER)
 
 df_fin = st.session_state.finance_data[ticker]
 
@@ -173,6 +194,9 @@ df_fin = st.session_state.finance_data[ticker]
 # LOAD SENTIMENT DATA
 # ==========================
 if ticker not in st.session_state.sentiment_data:
+    st.session_state.sentiment_data[ticker] = local_store.read_sentiment(ticker, engine)
+
+if st.session_state.sentiment_data[ticker] is None:
     with st.spinner(f"Loading sentiment data for {st.session_state.selected_company}..."):
         try:
             if st.session_state.mode == "⏳ Slow & more accurate":
@@ -192,9 +216,22 @@ if ticker not in st.session_state.sentiment_data:
 
 df_sentiment = st.session_state.sentiment_data[ticker]
 
+data_as_of = local_store.read_as_of(ticker, f"sentiment_{engine}") or local_store.read_as_of(ticker, "prices")
+if data_as_of is not None:
+    st.caption(f"Data as of {data_as_of:%Y-%m-%d %H:%M}")
+
+# Panel précalculé par le démon : le sentiment est lu par date dans les vues mappées, sans fusion
+panel = panel_store.open_panel()
+use_panel = (panel is not None and ticker in panel and f"sentiment_{engine}" in panel.fields
+             and not np.isnan(panel.series(f"sentiment_{engine}", ticker)).all())
+
 df_fin['date_only'] = df_fin['date'].dt.date
 
-if not df_sentiment.empty:
+if use_panel:
+    df_fin['sentiment'] = panel.values_at(f"sentiment_{engine}", ticker, df_fin['date'].values)
+    df_fin['nb_messages'] = panel.values_at(f"messages_{engine}", ticker, df_fin['date'].values)
+    df_fin = df_fin.drop(['date_only'], axis=1)
+elif not df_sentiment.empty:
     df_fin = df_fin.merge(
         df_sentiment[['analysis_date', 'GlobalScore', 'MessageCount']], 
         left_on='date_only', right_on='analysis_date', how='left'
@@ -306,6 +343,12 @@ st.plotly_chart(fig_main, use_container_width=True, config={"displayModeBar": Tr
 # Créer une clé unique pour le cache basée sur ticker + mode
 cache_key = f"{ticker}_{st.session_state.mode}"
 
+if cache_key not in st.session_state.scores_data:
+    # Scores précalculés par le démon, s'ils existent
+    stored_scores = local_store.read_scores(ticker, engine)
+    if stored_scores is not None:
+        st.session_state.scores_data[cache_key] = stored_scores
+
 if cache_key in st.session_state.scores_data:
     # Utiliser les scores en cache
     scores = st.session_state.scores_data[cache_key]
@@ -319,12 +362,15 @@ else:
     }
     
     try:
-        if not df_sentiment.empty:
+        if use_panel:
+            scores = panel_store.panel_scores(panel, ticker, engine)
+            st.session_state.scores_data[cache_key] = scores
+        elif not df_sentiment.empty:
             y2_dict = {
                 "GlobalScore": df_sentiment["GlobalScore"].tolist(),
                 "analysis_date": df_sentiment["analysis_date"].astype(str).tolist()
             }
-            y1 = get_pct_change_df(ticker)
+            y1 = get_pct_change_df(ticker, provider=MARKET_DATA_PROVIDER)
             min_date = pd.to_datetime(min(y2_dict["analysis_date"]))
             max_date = pd.to_datetime(max(y2_dict["analysis_date"]))
             y1 = y1.loc[min_date:max_date]
@@ -0,0 +1,161 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import sentiment_analysis_finbert
+
+
+# Serveur d'inférence FinBERT local et partagé : un seul processus garde le modèle en mémoire,
+# toutes les sessions du dashboard (et tous les scripts) lui envoient leurs textes.
+# Les requêtes concurrentes sont regroupées en micro-batches : on attend au plus max_wait_ms
+# après la première requête pour remplir un batch de max_batch_size messages.
+#
+# Lancement :   python finbert_server.py --port 8765
+# Côté client : FINBERT_SERVER_URL=http://127.0.0.1:8765 streamlit run dashboard.py
+
+
+class MicroBatcher:
+    def __init__(self, max_batch_size=64, max_wait_ms=20, compiled=False):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.compiled = compiled
+        self.pending = queue.Queue()
+        self.stats = {'requests': 0, 'messages': 0, 'batches': 0}
+        self.stats_lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        sentiment_analysis_finbert.load_finbert_model(compiled=self.compiled, batch_size=self.max_batch_size)
+        self.thread.start()
+
+    def submit(self, texts):
+        """Enqueue texts and block until their scores are available"""
+        request = {'texts': texts, 'done': threading.Event(), 'scores': None, 'error': None}
+        self.pending.put(request)
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['scores']
+
+    def collect(self):
+        """Collect requests until the batch is full or the deadline of the first request expires"""
+        batch = [self.pending.get()]
+        size = len(batch[0]['texts'])
+        deadline = time.monotonic() + self.max_wait
+
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request['texts'])
+
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.collect()
+            texts = [t for request in batch for t in request['texts']]
+            try:
+                scores = sentiment_analysis_finbert.predict_scores(
+                    texts, batch_size=self.max_batch_size, compiled=self.compiled
+                )
+            except Exception as e:
+                for request in batch:
+                    request['error'] = e
+                    request['done'].set()
+                continue
+
+            # On redistribue à chaque requête la tranche de scores qui lui correspond
+            offset = 0
+            for request in batch:
+                n = len(request['texts'])
+                request['scores'] = scores[offset:offset + n]
+                offset += n
+                request['done'].set()
+
+            with self.stats_lock:
+                self.stats['requests'] += len(batch)
+                self.stats['messages'] += len(texts)
+                self.stats['batches'] += 1
+
+
+def make_handler(batcher):
+    class FinbertRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/health':
+                with batcher.stats_lock:
+                    self.send_json(200, {'status': 'ok', **batcher.stats})
+            else:
+                self.send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/score':
+                self.send_json(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                texts = [str(t) for t in json.loads(self.rfile.read(length))['texts']]
+            except (ValueError, KeyError, TypeError) as e:
+                self.send_json(400, {'error': f'invalid request: {e}'})
+                return
+
+            if not texts:
+                self.send_json(200, {'scores': []})
+                return
+            try:
+                scores = batcher.submit(texts)
+            except Exception as e:
+                self.send_json(500, {'error': str(e)})
+                return
+            self.send_json(200, {'scores': np.asarray(scores).tolist()})
+
+        def send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Pas de log par requête : le serveur peut en recevoir des centaines par seconde
+            pass
+
+    return FinbertRequestHandler
+
+
+def run_server(host='127.0.0.1', port=8765, max_batch_size=64, max_wait_ms=20, compiled=False):
+    batcher = MicroBatcher(max_batch_size=max_batch_size, max_wait_ms=max_wait_ms, compiled=compiled)
+    batcher.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    print(f"🚀 FinBERT server listening on http://{host}:{port} "
+          f"(batch {max_batch_size}, max wait {max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local micro-batching FinBERT inference server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=20)
+    parser.add_argument('--compiled', action='store_true', help="Use the bucketed XLA-compiled forward pass")
+    args = parser.parse_args()
+
+    run_server(args.host, args.port, args.max_batch_size, args.max_wait_ms, args.compiled)
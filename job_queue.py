@@ -0,0 +1,331 @@
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+from contextlib import closing
+
+from stock_keywords import STOCK_KEYWORDS
+
+
+# File de jobs locale et durable (SQLite, sans broker externe) pour répartir les calculs de tout l'univers
+# sur plusieurs processus workers, sur une ou plusieurs machines partageant le même système de fichiers.
+#
+# Un job = (ticker, étape, paramètres). Les étapes s'enchaînent scrape → score → correlate : quand un job
+# se termine, le job de l'étape suivante est ajouté à la file. Les résultats intermédiaires passent par
+# le stockage local (corpus.parquet, sentiment Parquet, prices.csv), lisible par tous les workers.
+#
+# Un worker prend un job avec un bail (lease) de visibility_timeout secondes, prolongé tant qu'il travaille.
+# Si le worker meurt, le bail expire et le job redevient visible pour un autre worker. Un job en échec est
+# retenté avec un délai croissant, jusqu'à max_attempts tentatives, puis marqué "failed".
+#
+# Journal SQLite en mode "DELETE" (pas de WAL) : le WAL ne fonctionne pas sur un système de fichiers réseau.
+
+JOB_QUEUE_DB = os.getenv("JOB_QUEUE_DB", "jobs.sqlite")
+
+STAGES = ("scrape", "score", "correlate")
+NEXT_STAGE = {"scrape": "score", "score": "correlate"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticker TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, available_at);
+"""
+
+
+class JobQueue:
+    def __init__(self, path=None, visibility_timeout=300, retry_delay=30):
+        self.path = path or JOB_QUEUE_DB
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+        with closing(self.connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def connect(self):
+        # isolation_level=None : les transactions sont gérées explicitement (BEGIN IMMEDIATE)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, ticker, stage, params=None, priority=0, max_attempts=3, delay=0):
+        """Add a job unless the same (ticker, stage, params) is already pending or running; returns its id"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}' (expected one of {STAGES})")
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            job_id = self._enqueue(conn, ticker, stage, params, priority, max_attempts, delay)
+            conn.execute("COMMIT")
+            return job_id
+        finally:
+            conn.close()
+
+    # Insertion dans une transaction déjà ouverte par l'appelant (enqueue, complete)
+    def _enqueue(self, conn, ticker, stage, params=None, priority=0, max_attempts=3, delay=0):
+        params_json = json.dumps(params or {}, sort_keys=True)
+        now = time.time()
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE ticker = ? AND stage = ? AND params = ? AND status IN ('pending', 'running')",
+            (ticker, stage, params_json)).fetchone()
+        if row is not None:
+            return row["id"]
+        cursor = conn.execute(
+            "INSERT INTO jobs (ticker, stage, params, priority, max_attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (ticker, stage, params_json, priority, max_attempts, now + delay, now, now))
+        return cursor.lastrowid
+
+    def claim(self, owner):
+        """Lease the highest-priority visible job to owner; returns a dict or None if nothing is ready"""
+        now = time.time()
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Bails expirés dont toutes les tentatives sont consommées : échec définitif
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', last_error = COALESCE(last_error, 'lease expired'), updated_at = ? "
+                "WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts", (now, now))
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = 'pending' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY priority DESC, available_at, id LIMIT 1", (now, now)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?", (owner, now + self.visibility_timeout, now, row["id"]))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["attempts"] += 1
+        return job
+
+    def extend_lease(self, job_id, owner):
+        """Push the lease deadline back; False if the job was taken over by another worker"""
+        with closing(self.connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + self.visibility_timeout, time.time(), job_id, owner))
+            return cursor.rowcount == 1
+
+    def complete(self, job, owner):
+        # Fin du job et ajout de l'étape suivante dans la même transaction : un worker qui meurt entre les deux
+        # ne peut pas laisser un job "done" sans sa suite
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'", (time.time(), job["id"], owner))
+            if cursor.rowcount != 1:
+                conn.execute("ROLLBACK")
+                return False
+            # Étape suivante, avec la même priorité. Un scrape est partagé par tous les moteurs :
+            # il déclenche un job score (puis correlate) par moteur listé dans ses paramètres.
+            next_stage = NEXT_STAGE.get(job["stage"])
+            if next_stage:
+                params = dict(job["params"])
+                engines = params.pop("engines", None)
+                for engine in engines or [params.pop("engine", "textblob")]:
+                    self._enqueue(conn, job["ticker"], next_stage, {**params, 'engine': engine},
+                                  job["priority"], job["max_attempts"])
+            conn.execute("COMMIT")
+            return True
+        finally:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+
+    def fail(self, job, owner, error):
+        now = time.time()
+        retry = job["attempts"] < job["max_attempts"]
+        # Délai croissant entre deux tentatives : retry_delay, 2 * retry_delay, 4 * retry_delay...
+        available_at = now + self.retry_delay * 2 ** (job["attempts"] - 1)
+        with closing(self.connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                ('pending' if retry else 'failed', available_at, str(error)[:2000], now, job["id"], owner))
+
+    def counts(self):
+        with closing(self.connect()) as conn:
+            rows = conn.execute("SELECT stage, status, COUNT(*) AS n FROM jobs GROUP BY stage, status").fetchall()
+        return {(r["stage"], r["status"]): r["n"] for r in rows}
+
+    def is_idle(self):
+        with closing(self.connect()) as conn:
+            row = conn.execute("SELECT COUNT(*) AS n FROM jobs WHERE status IN ('pending', 'running')").fetchone()
+        return row["n"] == 0
+
+
+# ==========================
+# ÉTAPES
+# ==========================
+
+# Chaque étape lit ses entrées et écrit sa sortie dans le stockage local (local_store.py),
+# pour qu'un autre worker (ou une autre machine) puisse enchaîner l'étape suivante.
+
+def run_scrape(ticker, days_back=30, store_dir=None, **params):
+    import local_store
+    from corpus_cache import scrape_corpus
+    from stock_data.price_frame import get_price_frame
+
+    local_store.write_corpus(ticker, scrape_corpus(ticker, ('reddit',), days_back), store_dir)
+    local_store.write_prices(ticker, get_price_frame(ticker, days_back=days_back), store_dir)
+
+
+def run_score(ticker, engine="textblob", store_dir=None, **params):
+    import local_store
+    from pipeline import stage_normalize, stage_score, stage_aggregate
+
+    corpus = local_store.read_corpus(ticker, store_dir)
+    if corpus is None:
+        raise RuntimeError(f"No corpus stored for {ticker}")
+    daily = stage_aggregate(stage_score(stage_normalize(corpus), engine))
+    local_store.write_sentiment(ticker, engine, daily, store_dir)
+
+
+def run_correlate(ticker, engine="textblob", days_back=30, max_lag_days=7, store_dir=None, **params):
+    import local_store
+    from pipeline import stage_correlate
+
+    df_prices = local_store.read_prices(ticker, store_dir)
+    daily = local_store.read_sentiment(ticker, engine, days_back, store_dir)
+    if df_prices is None or daily is None:
+        raise RuntimeError(f"Prices or sentiment missing for {ticker} [{engine}]")
+    prices = df_prices.set_index('date')[['price_change_pct']].rename(columns={'price_change_pct': ticker})
+    local_store.write_scores(ticker, engine, stage_correlate(prices, daily, max_lag_days), store_dir)
+
+
+STAGE_FUNCTIONS = {"scrape": run_scrape, "score": run_score, "correlate": run_correlate}
+
+
+# ==========================
+# WORKERS
+# ==========================
+
+# La fonction work_loop est la boucle d'un worker : prendre un job, le prolonger pendant qu'il tourne
+# (thread de heartbeat), puis le marquer terminé ou en échec. Avec exit_when_idle, le worker s'arrête
+# quand la file ne contient plus aucun job en attente ou en cours.
+
+def work_loop(db_path=None, owner=None, poll_interval=2.0, exit_when_idle=False, visibility_timeout=300):
+    queue = JobQueue(db_path, visibility_timeout=visibility_timeout)
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    done = 0
+
+    while True:
+        job = queue.claim(owner)
+        if job is None:
+            if exit_when_idle and queue.is_idle():
+                break
+            time.sleep(poll_interval)
+            continue
+
+        stop_heartbeat = threading.Event()
+
+        def heartbeat(job_id=job["id"]):
+            while not stop_heartbeat.wait(queue.visibility_timeout / 3):
+                if not queue.extend_lease(job_id, owner):
+                    break
+
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        start = time.perf_counter()
+        try:
+            STAGE_FUNCTIONS[job["stage"]](job["ticker"], **job["params"])
+        except Exception as e:
+            stop_heartbeat.set()
+            queue.fail(job, owner, e)
+            print(f"❌ [{owner}] {job['stage']} {job['ticker']} (attempt {job['attempts']}): {e}")
+            continue
+        stop_heartbeat.set()
+        queue.complete(job, owner)
+        done += 1
+        print(f"✅ [{owner}] {job['stage']} {job['ticker']} in {time.perf_counter() - start:.1f}s")
+
+    return done
+
+
+# La fonction run_workers lance n_workers processus worker sur cette machine et attend leur fin.
+
+def run_workers(n_workers=4, db_path=None, exit_when_idle=True, visibility_timeout=300):
+    # "spawn" : chaque worker repart d'un interpréteur neuf (TensorFlow ne supporte pas le fork)
+    ctx = multiprocessing.get_context("spawn")
+    processes = [
+        ctx.Process(target=work_loop, kwargs={'db_path': db_path, 'exit_when_idle': exit_when_idle,
+                                             'visibility_timeout': visibility_timeout})
+        for _ in range(n_workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def enqueue_universe(queue, tickers, engines=("textblob",), days_back=30, priority=0, store_dir=None):
+    """Enqueue one scrape job per ticker; score and correlate jobs follow for each engine"""
+    params = {'engines': list(engines), 'days_back': days_back}
+    if store_dir:
+        params['store_dir'] = store_dir
+    return [queue.enqueue(ticker, "scrape", params, priority) for ticker in tickers]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local job queue for universe-wide scrape / score / correlate runs")
+    parser.add_argument('--db', default=None, help=f"SQLite file (default: {JOB_QUEUE_DB})")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    enqueue = sub.add_parser('enqueue', help="Enqueue scrape jobs (score and correlate follow automatically)")
+    enqueue.add_argument('tickers', nargs='*', help="Tickers from STOCK_KEYWORDS (default: all)")
+    enqueue.add_argument('--engines', nargs='+', choices=['textblob', 'lexicon', 'finbert'], default=['textblob'])
+    enqueue.add_argument('--days-back', type=int, default=30)
+    enqueue.add_argument('--priority', type=int, default=0)
+
+    work = sub.add_parser('work', help="Run worker processes")
+    work.add_argument('--workers', type=int, default=4)
+    work.add_argument('--visibility-timeout', type=float, default=300)
+    work.add_argument('--forever', action='store_true', help="Keep polling when the queue is empty")
+
+    sub.add_parser('status', help="Show job counts per stage and status")
+    args = parser.parse_args(argv)
+
+    if args.command == 'enqueue':
+        tickers = args.tickers or list(STOCK_KEYWORDS.keys())
+        unknown = [t for t in tickers if t not in STOCK_KEYWORDS]
+        if unknown:
+            print(f"❌ Unknown ticker(s): {', '.join(unknown)}")
+            return 1
+        ids = enqueue_universe(JobQueue(args.db), tickers, args.engines, args.days_back, args.priority)
+        print(f"📥 {len(ids)} job(s) enqueued")
+    elif args.command == 'work':
+        run_workers(args.workers, args.db, not args.forever, args.visibility_timeout)
+    else:
+        for (stage, status), n in sorted(JobQueue(args.db).counts().items()):
+            print(f"{stage:<10} {status:<8} {n}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
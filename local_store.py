@@ -0,0 +1,136 @@
+import os
+import json
+import uuid
+import fcntl
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+import result_store
+
+
+# Stockage local des résultats précalculés (écrit par refresh_daemon.py, lu par le dashboard) :
+#   data_store/<ticker>/prices.csv              OHLCV + % de variation journalière
+#   data_store/<ticker>/corpus.parquet          dernier corpus scrapé (file de jobs : scrape → score)
+#   data_store/<ticker>/meta.json               date de dernière mise à jour ("as_of") par élément
+# Chaque fichier est écrit dans un fichier temporaire puis renommé : un lecteur ne voit jamais de fichier partiel.
+# Le sentiment journalier et les scores de corrélation vont dans le stockage Parquet partitionné
+# (result_store.py, sous data_store/results/) et y sont ajoutés sans réécriture.
+
+DATA_STORE_DIR = os.getenv("DATA_STORE_DIR", "data_store")
+
+
+def ticker_dir(ticker, store_dir=None):
+    return os.path.join(store_dir or DATA_STORE_DIR, ticker)
+
+
+def atomic_write(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Nom temporaire propre à chaque écriture : le démon et les workers peuvent écrire le même fichier
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Verrou exclusif par ticker (flock sur meta.json.lock) : les workers de la file de jobs mettent à jour
+# meta.json en parallèle, la lecture-modification-écriture ne doit pas perdre d'élément.
+
+@contextmanager
+def meta_lock(ticker, store_dir=None):
+    path = os.path.join(ticker_dir(ticker, store_dir), "meta.json.lock")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def update_meta(ticker, item, store_dir=None):
+    path = os.path.join(ticker_dir(ticker, store_dir), "meta.json")
+    with meta_lock(ticker, store_dir):
+        meta = read_meta(ticker, store_dir)
+        meta[item] = datetime.now().isoformat(timespec='seconds')
+
+        def write(tmp_path):
+            with open(tmp_path, 'w') as f:
+                json.dump(meta, f, indent=2)
+        atomic_write(path, write)
+
+
+def read_meta(ticker, store_dir=None):
+    path = os.path.join(ticker_dir(ticker, store_dir), "meta.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def read_as_of(ticker, item, store_dir=None):
+    """Timestamp (datetime) of the last write of an item, or None"""
+    value = read_meta(ticker, store_dir).get(item)
+    return datetime.fromisoformat(value) if value else None
+
+
+# ==========================
+# ÉCRITURE
+# ==========================
+
+def write_prices(ticker, df_prices, store_dir=None):
+    path = os.path.join(ticker_dir(ticker, store_dir), "prices.csv")
+    atomic_write(path, lambda tmp_path: df_prices.to_csv(tmp_path, index=False))
+    update_meta(ticker, "prices", store_dir)
+
+
+def write_corpus(ticker, df_corpus, store_dir=None):
+    path = os.path.join(ticker_dir(ticker, store_dir), "corpus.parquet")
+    atomic_write(path, lambda tmp_path: df_corpus.to_parquet(tmp_path, index=False))
+    update_meta(ticker, "corpus", store_dir)
+
+
+def results_dir(store_dir=None):
+    return os.path.join(store_dir or DATA_STORE_DIR, "results")
+
+
+def write_sentiment(ticker, engine, df_sentiment, store_dir=None):
+    result_store.append_sentiment(ticker, engine, df_sentiment, results_dir(store_dir))
+    update_meta(ticker, f"sentiment_{engine}", store_dir)
+
+
+def write_scores(ticker, engine, scores, store_dir=None):
+    result_store.append_scores(ticker, engine, scores, root=results_dir(store_dir))
+    update_meta(ticker, f"scores_{engine}", store_dir)
+
+
+# ==========================
+# LECTURE
+# ==========================
+
+def read_prices(ticker, store_dir=None):
+    path = os.path.join(ticker_dir(ticker, store_dir), "prices.csv")
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, parse_dates=['date'])
+
+
+def read_corpus(ticker, store_dir=None):
+    path = os.path.join(ticker_dir(ticker, store_dir), "corpus.parquet")
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def read_sentiment(ticker, engine, days_back=30, store_dir=None):
+    # Seules les partitions du ticker sur la fenêtre demandée sont lues
+    return result_store.read_ticker_window(ticker, engine, days_back, root=results_dir(store_dir))
+
+
+def read_scores(ticker, engine, store_dir=None):
+    return result_store.read_latest_scores(ticker, engine, results_dir(store_dir))
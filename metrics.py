@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Instrumentation : spans de durée par étape et compteurs, exportés en JSON ou au format texte Prometheus
+# (fichier ou endpoint HTTP).
+#
+#   with metrics.span("inference", engine="finbert"):
+#       ...
+#   metrics.inc("messages_scored_total", len(texts), engine="finbert")
+#
+# Désactivée par défaut : span() renvoie alors un contexte vide partagé et inc() sort immédiatement,
+# le coût se limite à un test de booléen. Activation par METRICS_ENABLED=1 ou metrics.enable().
+# Si METRICS_FILE est défini, les métriques y sont écrites à la fin du processus (.json ou texte Prometheus).
+#
+# Spans utilisés : reddit_search, reddit_comments, reddit_stock, reddit_multiple, bloomberg_page, tokenize, inference,
+# aggregation, yfinance_download, correlation.
+# Compteurs : messages_scraped_total, messages_scored_total, tokens_total, cache_hits_total,
+# cache_misses_total, http_errors_total.
+
+enabled = os.getenv("METRICS_ENABLED", "0") == "1"
+METRICS_FILE = os.getenv("METRICS_FILE")
+
+spans = {}      # (nom, labels) -> [count, sum, min, max]
+counters = {}   # (nom, labels) -> valeur
+metrics_lock = threading.Lock()
+
+
+def enable(value=True):
+    global enabled
+    enabled = value
+
+
+def reset():
+    with metrics_lock:
+        spans.clear()
+        counters.clear()
+
+
+def label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    def __init__(self, name, labels):
+        self.key = (name, label_key(labels))
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_duration(self.key, time.perf_counter() - self.start)
+        return False
+
+
+def record_duration(key, seconds):
+    with metrics_lock:
+        entry = spans.get(key)
+        if entry is None:
+            spans[key] = [1, seconds, seconds, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = min(entry[2], seconds)
+            entry[3] = max(entry[3], seconds)
+
+
+def span(name, **labels):
+    """Context manager timing a stage (no-op when metrics are disabled)"""
+    if not enabled:
+        return NULL_SPAN
+    return Span(name, labels)
+
+
+def inc(name, value=1, **labels):
+    """Increment a counter (no-op when metrics are disabled)"""
+    if not enabled:
+        return
+    key = (name, label_key(labels))
+    with metrics_lock:
+        counters[key] = counters.get(key, 0) + value
+
+
+# ==========================
+# EXPORT
+# ==========================
+
+def span_seconds(name, **labels):
+    """Total seconds spent in a span; labels given here must match, others are summed over"""
+    wanted = set(label_key(labels))
+    return sum(entry[1] for (n, key), entry in spans.items() if n == name and wanted <= set(key))
+
+
+def counter_value(name, **labels):
+    wanted = set(label_key(labels))
+    return sum(v for (n, key), v in counters.items() if n == name and wanted <= set(key))
+
+
+# La fonction derived_rates calcule les débits et taux de succès du cache à partir des compteurs et des spans :
+# messages/s et tokens/s rapportés au temps d'inférence, taux de hit par cache.
+
+def derived_rates():
+    rates = {}
+    inference = span_seconds("inference")
+    if inference > 0:
+        rates["messages_per_second"] = counter_value("messages_scored_total") / inference
+        tokens = counter_value("tokens_total")
+        if tokens:
+            rates["tokens_per_second"] = tokens / inference
+
+    caches = {dict(key).get("cache") for (n, key) in counters if n in ("cache_hits_total", "cache_misses_total")}
+    for cache in sorted(c for c in caches if c):
+        hits = counter_value("cache_hits_total", cache=cache)
+        total = hits + counter_value("cache_misses_total", cache=cache)
+        rates[f"cache_hit_rate:{cache}"] = hits / total if total else 0.0
+    return rates
+
+
+def snapshot():
+    """All spans, counters and derived rates as a JSON-serializable dict"""
+    with metrics_lock:
+        span_list = [{"name": name, "labels": dict(key), "count": e[0], "seconds": e[1],
+                      "min": e[2], "max": e[3]} for (name, key), e in sorted(spans.items())]
+        counter_list = [{"name": name, "labels": dict(key), "value": value}
+                        for (name, key), value in sorted(counters.items())]
+        rates = derived_rates()
+    return {"timestamp": time.time(), "spans": span_list, "counters": counter_list, "rates": rates}
+
+
+# Valeurs de labels échappées comme le demande le format texte Prometheus : antislash, guillemet et saut de ligne.
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels, extra=None):
+    items = dict(labels, **(extra or {}))
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in sorted(items.items())) + "}"
+
+
+def to_prometheus():
+    """Snapshot in the Prometheus text exposition format"""
+    snap = snapshot()
+    # Un summary n'a que _count et _sum : le maximum est exporté comme une jauge à part
+    lines = ["# TYPE span_seconds summary"]
+    for s in snap["spans"]:
+        labels = dict(s["labels"], stage=s["name"])
+        lines.append(f"span_seconds_count{format_labels(labels)} {s['count']}")
+        lines.append(f"span_seconds_sum{format_labels(labels)} {s['seconds']:.6f}")
+    lines.append("# TYPE span_seconds_max gauge")
+    for s in snap["spans"]:
+        labels = dict(s["labels"], stage=s["name"])
+        lines.append(f"span_seconds_max{format_labels(labels)} {s['max']:.6f}")
+
+    for name in sorted({c["name"] for c in snap["counters"]}):
+        lines.append(f"# TYPE {name} counter")
+        for c in snap["counters"]:
+            if c["name"] == name:
+                lines.append(f"{name}{format_labels(c['labels'])} {c['value']}")
+
+    # Taux dérivés (messages_per_second, cache_hit_rate...) : jauges, une ligne TYPE par métrique
+    rates = {}
+    for name, value in snap["rates"].items():
+        metric, _, cache = name.partition(":")
+        rates.setdefault(metric, []).append((cache, value))
+    for metric, values in rates.items():
+        lines.append(f"# TYPE {metric} gauge")
+        for cache, value in values:
+            lines.append(f"{metric}{format_labels({'cache': cache} if cache else {})} {value:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path=None):
+    """Write the snapshot to a file (.json, otherwise Prometheus text)"""
+    path = path or METRICS_FILE
+    content = json.dumps(snapshot(), indent=2) if path.endswith(".json") else to_prometheus()
+    # Nom temporaire propre à chaque écriture : plusieurs processus peuvent exporter vers le même fichier
+    tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = to_prometheus().encode("utf-8"), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(snapshot()).encode("utf-8"), "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# La fonction serve_metrics expose /metrics (Prometheus) et /metrics.json dans un thread de fond
+# et active la collecte.
+
+def serve_metrics(host="0.0.0.0", port=9108):
+    enable(True)
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{port}/metrics")
+    return server
+
+
+if METRICS_FILE:
+    atexit.register(lambda: enabled and write_metrics(METRICS_FILE))
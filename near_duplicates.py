@@ -0,0 +1,123 @@
+import re
+import zlib
+import numpy as np
+
+
+# Détection de quasi-doublons (cross-posts Reddit, réponses qui citent le message parent, bots,
+# résumés Bloomberg répétés) par signatures MinHash et index LSH (banding).
+# On ne score qu'un représentant par cluster, puis on redistribue son score à tous les messages
+# du cluster : les moyennes journalières restent celles qu'on aurait obtenues sans déduplication.
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+URL_PATTERN = re.compile(r'https?://\S+')
+QUOTE_PATTERN = re.compile(r'^\s*>.*$', re.MULTILINE)
+NON_WORD_PATTERN = re.compile(r'[^\w$]+')
+
+# En dessous de cette longueur (texte normalisé), un message n'est pas dédupliqué : un texte vide
+# (emojis seuls, réponse faite uniquement de citations) ou très court ne dit pas si deux messages sont
+# identiques, chacun forme son propre cluster et est scoré séparément.
+MIN_DEDUP_LENGTH = 8
+
+
+# La fonction normalize_text ramène un message à une forme canonique : minuscules, sans URL,
+# sans lignes citées ("> ...") et sans ponctuation, pour que les variantes triviales se ressemblent.
+# Les lettres non latines sont conservées.
+
+def normalize_text(text):
+    text = QUOTE_PATTERN.sub(' ', str(text).lower())
+    text = URL_PATTERN.sub(' ', text)
+    return NON_WORD_PATTERN.sub(' ', text).strip()
+
+
+# La fonction shingle_hashes renvoie les hash (uint32) des n-grammes de caractères du texte normalisé.
+
+def shingle_hashes(text, k=5):
+    if len(text) <= k:
+        return np.array([zlib.crc32(text.encode('utf-8'))], dtype=np.uint64)
+    shingles = {text[i:i+k] for i in range(len(text) - k + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+# La fonction minhash_signatures calcule une signature MinHash de num_perm valeurs par texte,
+# avec une famille de permutations (a*x + b) mod p tirée d'une graine fixe (résultats reproductibles).
+
+def minhash_signatures(texts, num_perm=64, k=5, seed=1):
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(texts):
+        hashes = shingle_hashes(text, k)
+        permuted = (hashes[:, None] * a[None, :] + b[None, :]) % MERSENNE_PRIME & MAX_HASH
+        signatures[i] = permuted.min(axis=0)
+    return signatures
+
+
+def find_root(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+# La fonction find_near_duplicates renvoie, pour chaque texte, l'indice du représentant de son cluster
+# (le premier texte du cluster dans l'ordre d'entrée). Les textes normalisés plus courts que
+# MIN_DEDUP_LENGTH restent seuls dans leur cluster. Les doublons exacts (après normalisation) sont
+# regroupés directement ; les autres candidats viennent de l'index LSH et sont confirmés si la similarité
+# de Jaccard estimée par les signatures atteint threshold.
+
+def find_near_duplicates(texts, threshold=0.8, num_perm=64, bands=16):
+    if num_perm % bands != 0:
+        raise ValueError("num_perm must be a multiple of bands")
+
+    normalized = [normalize_text(t) for t in texts]
+    parents = list(range(len(texts)))
+
+    # 1) Doublons exacts après normalisation
+    first_seen = {}
+    candidates = []
+    for i, text in enumerate(normalized):
+        if len(text) < MIN_DEDUP_LENGTH:
+            continue
+        if text in first_seen:
+            parents[i] = first_seen[text]
+        else:
+            first_seen[text] = i
+            candidates.append(i)
+
+    # 2) Quasi-doublons parmi les textes restants, via LSH
+    if len(candidates) > 1:
+        signatures = minhash_signatures([normalized[i] for i in candidates], num_perm=num_perm)
+        rows = num_perm // bands
+        for band in range(bands):
+            buckets = {}
+            band_slice = signatures[:, band * rows:(band + 1) * rows]
+            for position, key in enumerate(map(bytes, band_slice)):
+                buckets.setdefault(key, []).append(position)
+            for members in buckets.values():
+                for other in members[1:]:
+                    if np.mean(signatures[members[0]] == signatures[other]) >= threshold:
+                        root_a = find_root(parents, candidates[members[0]])
+                        root_b = find_root(parents, candidates[other])
+                        if root_a != root_b:
+                            parents[max(root_a, root_b)] = min(root_a, root_b)
+
+    return np.array([find_root(parents, i) for i in range(len(texts))], dtype=np.int64)
+
+
+# La fonction dedup_texts renvoie les textes représentants, le tableau inverse (position du représentant
+# pour chaque texte d'origine, tel que scores_representants[inverse] redonne un score par message)
+# et le ratio de déduplication (part des messages qui n'ont pas besoin d'être scorés).
+
+def dedup_texts(texts, threshold=0.8, num_perm=64, bands=16):
+    if not texts:
+        return [], np.array([], dtype=np.int64), 0.0
+
+    labels = find_near_duplicates(texts, threshold=threshold, num_perm=num_perm, bands=bands)
+    representatives, inverse = np.unique(labels, return_inverse=True)
+    unique_texts = [texts[i] for i in representatives]
+    dedup_ratio = 1 - len(unique_texts) / len(texts)
+    return unique_texts, inverse, dedup_ratio
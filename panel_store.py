@@ -0,0 +1,206 @@
+import os
+import json
+import shutil
+from datetime import datetime, date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import local_store
+import result_store
+
+
+# Panel aligné dates × tickers, stocké en fichiers .npy mappés en mémoire :
+#   data_store/panel/CURRENT                 nom de la version courante
+#   data_store/panel/<version>/dates.npy     index de dates partagé (datetime64[D], jours calendaires)
+#   data_store/panel/<version>/tickers.json  ordre des colonnes
+#   data_store/panel/<version>/<champ>.npy   une matrice (n_dates, n_tickers) par champ :
+#       pct_change, sentiment_<engine> (float32, NaN si absent), messages_<engine> (int32, 0 si absent),
+#       volume (float64, NaN si absent : float32 n'est exact que jusqu'à 2^24 ≈ 16,7 M titres)
+#
+# Les lecteurs ouvrent les fichiers avec np.load(mmap_mode='r') : plusieurs processus (dashboard, analyses)
+# partagent les mêmes pages du cache système, sans copie ni re-fusion de DataFrames.
+# Les matrices sont en ordre Fortran : la série d'un ticker (une colonne) est contiguë en mémoire.
+# Une reconstruction écrit une nouvelle version puis remplace CURRENT : un lecteur ne voit jamais un panel partiel.
+# Panel mappe tous les champs de sa version dès l'ouverture : une fois ouverte, une version reste lisible même
+# supprimée du disque. Une version remplacée n'est supprimée qu'après PANEL_GRACE_SECONDS, le temps qu'un
+# lecteur qui venait de lire CURRENT finisse de l'ouvrir.
+
+PANEL_KEEP_VERSIONS = 2
+PANEL_GRACE_SECONDS = int(os.getenv("PANEL_GRACE_SECONDS", 10 * 60))
+VERSION_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def panel_dir(store_dir=None):
+    return os.path.join(store_dir or local_store.DATA_STORE_DIR, "panel")
+
+
+# ==========================
+# ÉCRITURE
+# ==========================
+
+# La fonction write_panel écrit une nouvelle version du panel et la rend courante.
+# fields : {nom du champ: matrice (len(dates), len(tickers))}
+
+def write_panel(dates, tickers, fields, store_dir=None):
+    root = panel_dir(store_dir)
+    version = datetime.now().strftime(VERSION_FORMAT)
+    path = os.path.join(root, version)
+    os.makedirs(path)
+
+    np.save(os.path.join(path, "dates.npy"), np.asarray(dates, dtype='datetime64[D]'))
+    with open(os.path.join(path, "tickers.json"), 'w') as f:
+        json.dump(list(tickers), f)
+    for name, values in fields.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.asfortranarray(values))
+
+    def write_current(tmp_path):
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+    local_store.atomic_write(os.path.join(root, "CURRENT"), write_current)
+
+    # Une ancienne version n'est supprimée que si celle qui l'a remplacée existe depuis PANEL_GRACE_SECONDS
+    versions = sorted(v for v in os.listdir(root) if v != "CURRENT" and not v.endswith(".tmp"))
+    for old, successor in zip(versions[:-PANEL_KEEP_VERSIONS], versions[1:]):
+        replaced_at = datetime.strptime(successor, VERSION_FORMAT)
+        if (datetime.now() - replaced_at).total_seconds() > PANEL_GRACE_SECONDS:
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return path
+
+
+# La fonction build_panel reconstruit le panel à partir du stockage local : prix (prices.csv) et
+# sentiment journalier par moteur (stockage Parquet), sur les days_back derniers jours.
+# Chaque série est placée dans la matrice par recherche dichotomique sur l'index de dates.
+
+def build_panel(tickers, engines=("textblob",), days_back=30, store_dir=None):
+    end = date.today()
+    dates = np.arange(np.datetime64(end - timedelta(days=days_back)), np.datetime64(end) + 1)
+    tickers = list(tickers)
+    shape = (len(dates), len(tickers))
+
+    fields = {
+        "pct_change": np.full(shape, np.nan, dtype=np.float32),
+        "volume": np.full(shape, np.nan, dtype=np.float64),
+    }
+    for engine in engines:
+        fields[f"sentiment_{engine}"] = np.full(shape, np.nan, dtype=np.float32)
+        fields[f"messages_{engine}"] = np.zeros(shape, dtype=np.int32)
+
+    def place(field, j, days, values):
+        days = np.asarray(days, dtype='datetime64[D]')
+        rows = np.searchsorted(dates, days)
+        inside = (rows < len(dates)) & (dates[np.minimum(rows, len(dates) - 1)] == days)
+        fields[field][rows[inside], j] = np.asarray(values)[inside]
+
+    for j, ticker in enumerate(tickers):
+        df_prices = local_store.read_prices(ticker, store_dir)
+        if df_prices is not None and not df_prices.empty:
+            place("pct_change", j, df_prices["date"].values, df_prices["price_change_pct"].values)
+            place("volume", j, df_prices["date"].values, df_prices["volume"].values)
+
+    # Une seule lecture Parquet par moteur pour tout l'univers
+    for engine in engines:
+        df_sentiment = result_store.read_sentiment(tickers, engine, dates[0], dates[-1],
+                                                   local_store.results_dir(store_dir))
+        for ticker, group in df_sentiment.groupby("ticker", observed=True):
+            j = tickers.index(ticker)
+            place(f"sentiment_{engine}", j, group["analysis_date"].values, group["GlobalScore"].values)
+            place(f"messages_{engine}", j, group["analysis_date"].values, group["MessageCount"].values)
+
+    return write_panel(dates, tickers, fields, store_dir)
+
+
+# ==========================
+# LECTURE
+# ==========================
+
+class Panel:
+    def __init__(self, path):
+        self.path = path
+        self.dates = np.load(os.path.join(path, "dates.npy"), mmap_mode='r')
+        with open(os.path.join(path, "tickers.json")) as f:
+            self.tickers = json.load(f)
+        self.columns = {ticker: j for j, ticker in enumerate(self.tickers)}
+        # Tous les champs mappés dès l'ouverture (sans lecture : les pages sont chargées à l'accès) ;
+        # les mappings gardent les fichiers lisibles si la version est ensuite supprimée
+        self.arrays = {
+            f[:-4]: np.load(os.path.join(path, f), mmap_mode='r')
+            for f in os.listdir(path) if f.endswith(".npy") and f != "dates.npy"
+        }
+
+    @property
+    def fields(self):
+        return sorted(self.arrays)
+
+    def __contains__(self, ticker):
+        return ticker in self.columns
+
+    def field(self, name):
+        """Whole (dates, tickers) matrix of a field, memory-mapped read-only"""
+        return self.arrays[name]
+
+    def series(self, name, ticker):
+        """Zero-copy view on one ticker's column of a field"""
+        return self.field(name)[:, self.columns[ticker]]
+
+    def cross_section(self, name, day):
+        """Values of a field for every ticker on one day (None if the day is outside the index)"""
+        row = np.searchsorted(self.dates, np.datetime64(day, 'D'))
+        if row >= len(self.dates) or self.dates[row] != np.datetime64(day, 'D'):
+            return None
+        return self.field(name)[row, :]
+
+    def values_at(self, name, ticker, days):
+        """Values of a ticker's field on arbitrary days (NaN outside the index), without merging"""
+        days = np.asarray(days, dtype='datetime64[D]')
+        rows = np.searchsorted(self.dates, days)
+        inside = (rows < len(self.dates)) & (self.dates[np.minimum(rows, len(self.dates) - 1)] == days)
+        out = np.full(len(days), np.nan)
+        out[inside] = self.series(name, ticker)[rows[inside]]
+        return out
+
+    def aligned(self, ticker, engine):
+        """(pct change, sentiment) arrays restricted to the days where both exist"""
+        x = self.series("pct_change", ticker)
+        y = self.series(f"sentiment_{engine}", ticker)
+        mask = ~np.isnan(x) & ~np.isnan(y)
+        return x[mask], y[mask]
+
+
+# La fonction open_panel ouvre la version courante du panel, ou renvoie None s'il n'a jamais été construit.
+
+def open_panel(store_dir=None):
+    root = panel_dir(store_dir)
+    current = os.path.join(root, "CURRENT")
+    if not os.path.exists(current):
+        return None
+    with open(current) as f:
+        return Panel(os.path.join(root, f.read().strip()))
+
+
+# La fonction panel_scores calcule les scores de corrélation d'un ticker directement sur les vues du panel
+# (même résultat que score_compatibilite_df, sans DataFrame ni align).
+
+def panel_scores(panel, ticker, engine, max_lag_days=7):
+    from correlation import score_compatibilite_arrays
+    x, y = panel.aligned(ticker, engine)
+    if len(x) < 2:
+        return {"score_prediction": np.nan, "lag_prediction": None, "score_reaction": np.nan, "lag_reaction": None}
+    return score_compatibilite_arrays(x, y, max_lag_days)
+
+
+# La fonction universe_inputs empile les champs du panel en (rendements dates × tickers,
+# sentiment dates × tickers × moteurs) pour correlation.score_universe / cross_ticker_scores.
+
+def universe_inputs(panel, engines=None):
+    engines = list(engines or [f[len("sentiment_"):] for f in panel.fields if f.startswith("sentiment_")])
+    returns = np.asarray(panel.field("pct_change"), dtype=float)
+    sentiment = np.stack([np.asarray(panel.field(f"sentiment_{engine}"), dtype=float) for engine in engines], axis=2)
+    return returns, sentiment, engines
+
+
+def panel_universe_scores(panel, engines=None, max_lag_days=7):
+    """Scores of every (ticker, engine) of the panel in one vectorized pass (lags in calendar days)"""
+    from correlation import score_universe
+    returns, sentiment, engines = universe_inputs(panel, engines)
+    return score_universe(returns, sentiment, panel.tickers, engines, max_lag_days)
@@ -0,0 +1,244 @@
+import os
+import sys
+import time
+import pickle
+import uuid
+import hashlib
+import argparse
+import concurrent.futures
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from stock_keywords import STOCK_KEYWORDS
+import metrics
+
+
+# Mini moteur de pipeline (DAG) : chaque étape déclare ses entrées (d'autres étapes) et ses paramètres.
+# La clé d'une étape est un hash de son nom, de sa version, de ses paramètres et du *contenu* de ses entrées :
+# si rien n'a changé en amont, le résultat est relu depuis le cache disque au lieu d'être recalculé.
+# Les branches indépendantes (téléchargement des prix / scraping, plusieurs tickers) tournent en parallèle.
+
+PIPELINE_CACHE_DIR = os.getenv("PIPELINE_CACHE_DIR", ".pipeline_cache")
+
+
+def content_hash(value):
+    """Stable hash of a stage output (DataFrames are hashed by content, not by object identity)"""
+    h = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        h.update(pickle.dumps((list(value.columns), list(value.dtypes.astype(str)))))
+        h.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    else:
+        h.update(pickle.dumps(value))
+    return h.hexdigest()
+
+
+class Stage:
+    def __init__(self, name, func, inputs=(), params=None, version=1, cache=True):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = params or {}
+        self.version = version
+        self.cache = cache
+
+    def key(self, input_hashes):
+        payload = repr((self.name, self.version, sorted(self.params.items()), input_hashes))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+
+class Pipeline:
+    def __init__(self, cache_dir=PIPELINE_CACHE_DIR, max_workers=4):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.stages = {}
+        self.stats = {'computed': 0, 'cached': 0}
+
+    def add(self, name, func, inputs=(), params=None, version=1, cache=True):
+        """Declare a stage; inputs are names of stages already added"""
+        for dep in inputs:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = Stage(name, func, inputs, params, version, cache)
+        return name
+
+    def cache_path(self, stage, key):
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in stage.name)
+        return os.path.join(self.cache_dir, f"{safe_name}-{key}.pkl")
+
+    def run_stage(self, stage, results, hashes):
+        inputs = [results[dep] for dep in stage.inputs]
+        key = stage.key([hashes[dep] for dep in stage.inputs])
+        path = self.cache_path(stage, key)
+
+        if stage.cache and os.path.exists(path):
+            with open(path, 'rb') as f:
+                output = pickle.load(f)
+            metrics.inc("cache_hits_total", cache="pipeline")
+            print(f"📦 {stage.name}: cache")
+            return output, False
+
+        if stage.cache:
+            metrics.inc("cache_misses_total", cache="pipeline")
+
+        start = time.perf_counter()
+        output = stage.func(*inputs, **stage.params)
+        print(f"⏱️  {stage.name}: {time.perf_counter() - start:.2f}s")
+
+        if stage.cache:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Nom temporaire propre à chaque écriture : deux runs concurrents peuvent calculer la même étape
+            tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(output, f)
+            os.replace(tmp_path, path)
+        return output, True
+
+    def required_stages(self, targets):
+        needed, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].inputs)
+        return needed
+
+    def run(self, targets=None):
+        """Run the stages needed for targets (all stages by default); returns {stage name: output}"""
+        needed = self.required_stages(targets or list(self.stages))
+        results, hashes = {}, {}
+        running = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(results) < len(needed):
+                # On lance toutes les étapes dont les entrées sont prêtes
+                for name in needed:
+                    if name in results or name in running.values():
+                        continue
+                    stage = self.stages[name]
+                    if all(dep in results for dep in stage.inputs):
+                        running[executor.submit(self.run_stage, stage, results, hashes)] = name
+
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    output, computed = future.result()
+                    results[name] = output
+                    hashes[name] = content_hash(output)
+                    self.stats['computed' if computed else 'cached'] += 1
+
+        return results
+
+
+# ==========================
+# ÉTAPES DU PIPELINE SENTIMENT
+# ==========================
+
+def stage_prices(ticker, days_back, as_of):
+    from stock_data.dataframe_percent import get_pct_change_df
+    return get_pct_change_df(ticker, days_back=days_back)
+
+
+def stage_scrape(ticker, days_back, as_of):
+    from corpus_cache import get_corpus
+    return get_corpus(ticker, sources=('reddit',), days_back=days_back)
+
+
+def stage_normalize(corpus):
+    if corpus.empty:
+        return pd.DataFrame(columns=['day', 'content'])
+    df = pd.DataFrame({
+        'day': pd.to_datetime(corpus['created_utc']).dt.date,
+        'content': corpus['content']
+    })
+    return df.dropna(subset=['content']).reset_index(drop=True)
+
+
+def stage_score(messages, engine):
+    texts = messages['content'].astype(str).tolist()
+    scored = messages[['day']].copy()
+    if not texts:
+        scored['score'] = pd.Series(dtype=float)
+        return scored
+    if engine == 'finbert':
+        from sentiment_analysis_finbert import score_texts
+        probabilities = score_texts(texts)
+        scored['score'] = probabilities[:, 2] - probabilities[:, 0]
+    else:
+        from sentiment_analysis_textblob import textblob_polarities
+        scored['score'] = textblob_polarities(texts, engine='lexicon' if engine == 'lexicon' else 'textblob')
+    return scored
+
+
+def stage_aggregate(scored):
+    daily = scored.groupby('day')['score'].agg(['mean', 'count']).reset_index()
+    return daily.rename(columns={'day': 'analysis_date', 'mean': 'GlobalScore', 'count': 'MessageCount'})
+
+
+def stage_correlate(prices, daily, max_lag_days):
+    from correlation import score_compatibilite_df
+    if daily.empty or prices.empty:
+        return {"score_prediction": np.nan, "lag_prediction": None, "score_reaction": np.nan, "lag_reaction": None}
+
+    y2_dict = {
+        "GlobalScore": daily["GlobalScore"].tolist(),
+        "analysis_date": daily["analysis_date"].astype(str).tolist()
+    }
+    min_date = pd.to_datetime(min(y2_dict["analysis_date"]))
+    max_date = pd.to_datetime(max(y2_dict["analysis_date"]))
+    return score_compatibilite_df(prices.loc[min_date:max_date], y2_dict, max_lag_days=max_lag_days)
+
+
+# La fonction build_ticker_pipeline déclare les étapes scrape → normalize → score → aggregate → correlate
+# (et la branche prix, indépendante) pour un ticker et un moteur. Les étapes sans entrée prennent la date
+# du jour en paramètre : elles sont recalculées une fois par jour, le reste seulement si leurs entrées changent.
+
+def build_ticker_pipeline(pipeline, ticker, engine='textblob', days_back=30, max_lag_days=7, as_of=None):
+    as_of = as_of or datetime.now().strftime('%Y-%m-%d')
+    prices = pipeline.add(f"prices:{ticker}", stage_prices,
+                          params={'ticker': ticker, 'days_back': days_back, 'as_of': as_of})
+    scrape = pipeline.add(f"scrape:{ticker}", stage_scrape,
+                          params={'ticker': ticker, 'days_back': days_back, 'as_of': as_of})
+    normalize = pipeline.add(f"normalize:{ticker}", stage_normalize, inputs=[scrape])
+    score = pipeline.add(f"score:{ticker}:{engine}", stage_score, inputs=[normalize], params={'engine': engine})
+    aggregate = pipeline.add(f"aggregate:{ticker}:{engine}", stage_aggregate, inputs=[score])
+    return pipeline.add(f"correlate:{ticker}:{engine}", stage_correlate, inputs=[prices, aggregate],
+                        params={'max_lag_days': max_lag_days})
+
+
+def run_sentiment_pipeline(tickers, engine='textblob', days_back=30, max_lag_days=7, max_workers=4,
+                           cache_dir=PIPELINE_CACHE_DIR):
+    pipeline = Pipeline(cache_dir=cache_dir, max_workers=max_workers)
+    targets = {ticker: build_ticker_pipeline(pipeline, ticker, engine, days_back, max_lag_days) for ticker in tickers}
+    results = pipeline.run(list(targets.values()))
+    print(f"✅ Pipeline: {pipeline.stats['computed']} stage(s) computed, {pipeline.stats['cached']} from cache")
+    return {ticker: results[target] for ticker, target in targets.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run scrape → score → correlate for a list of tickers")
+    parser.add_argument('tickers', nargs='*', help="Tickers from STOCK_KEYWORDS (default: all)")
+    parser.add_argument('--engine', choices=['textblob', 'lexicon', 'finbert'], default='textblob')
+    parser.add_argument('--days-back', type=int, default=30)
+    parser.add_argument('--max-lag-days', type=int, default=7)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--cache-dir', default=PIPELINE_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    tickers = args.tickers or list(STOCK_KEYWORDS.keys())
+    unknown = [t for t in tickers if t not in STOCK_KEYWORDS]
+    if unknown:
+        print(f"❌ Unknown ticker(s): {', '.join(unknown)}")
+        print(f"Available tickers: {', '.join(STOCK_KEYWORDS.keys())}")
+        return 1
+
+    scores = run_sentiment_pipeline(tickers, args.engine, args.days_back, args.max_lag_days,
+                                    args.workers, args.cache_dir)
+    for ticker, score in scores.items():
+        print(f"{ticker}: {score}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
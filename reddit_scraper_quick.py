@@ -4,10 +4,10 @@ import os
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import re
-import time
 import concurrent.futures
 from threading import Lock
 from stock_keywords import STOCK_KEYWORDS
+import metrics
 
 load_dotenv()
 
@@ -109,29 +109,8 @@ class RedditStockScraper:
     def process_comments(self, submission, ticker):
         """Process comments from a submission"""
         try:
-            submission.comments.replace_more(limit=0)
-            
-            comments_data = []
-            for comment in submission.comments.list():
-                if hasattr(comment, 'body') and self.is_recent(comment.created_utc):
-                    if self.detect_stock_in_text(comment.body, ticker):
-                        comment_data = {
-                            'message_id': comment.id,
-                            'type': 'comment',
-                            'subreddit': submission.subreddit.display_name,
-                            'stock_symbol': ticker,
-                            'company_name': self.stock_keywords[ticker]["company"],
-                            'title': submission.title,
-                            'content': comment.body,
-                            'author': str(comment.author) if comment.author else '[deleted]',
-                            'score': comment.score,
-                            'upvote_ratio': None,
-                            'num_comments': None,
-                            'created_utc': datetime.fromtimestamp(comment.created_utc),
-                            'url': submission.url,
-                            'permalink': f"https://reddit.com{comment.permalink}"
-                        }
-                        comments_data.append(comment_data)
+            with metrics.span("reddit_comments"):
+                comments_data = self.collect_comments(submission, ticker)
             
             # Add all comments at once with thread safety
             if comments_data:
@@ -139,31 +118,62 @@ class RedditStockScraper:
                     self.scraped_data.extend(comments_data)
                     
         except Exception as e:
+            metrics.inc("http_errors_total", source="reddit")
             print(f"    Error processing comments: {str(e)}")
     
+    def collect_comments(self, submission, ticker):
+        """Fetch a submission's comments and keep the recent ones mentioning the stock"""
+        submission.comments.replace_more(limit=0)
+        
+        comments_data = []
+        for comment in submission.comments.list():
+            if hasattr(comment, 'body') and self.is_recent(comment.created_utc):
+                if self.detect_stock_in_text(comment.body, ticker):
+                    comment_data = {
+                        'message_id': comment.id,
+                        'type': 'comment',
+                        'subreddit': submission.subreddit.display_name,
+                        'stock_symbol': ticker,
+                        'company_name': self.stock_keywords[ticker]["company"],
+                        'title': submission.title,
+                        'content': comment.body,
+                        'author': str(comment.author) if comment.author else '[deleted]',
+                        'score': comment.score,
+                        'upvote_ratio': None,
+                        'num_comments': None,
+                        'created_utc': datetime.fromtimestamp(comment.created_utc),
+                        'url': submission.url,
+                        'permalink': f"https://reddit.com{comment.permalink}"
+                    }
+                    comments_data.append(comment_data)
+        
+        return comments_data
+    
     def search_single_subreddit(self, args):
         """Search a single subreddit (for threading)"""
         subreddit_name, ticker, limit, time_filter = args
         print(f"  Searching r/{subreddit_name} for {ticker}...")
         
         try:
-            subreddit = self.reddit.subreddit(subreddit_name)
-            search_query = self.create_search_query(ticker, use_context=False)
-            
-            for submission in subreddit.search(
-                query=search_query, 
-                time_filter=time_filter, 
-                limit=limit, 
-                sort='relevance'
-            ):
-                if self.is_recent(submission.created_utc):
-                    full_text = self.get_full_post_text(submission)
-                    if self.detect_stock_in_text(full_text, ticker):
-                        self.process_submission(submission, ticker)
+            with metrics.span("reddit_search", subreddit=subreddit_name):
+                subreddit = self.reddit.subreddit(subreddit_name)
+                search_query = self.create_search_query(ticker, use_context=False)
+                
+                for submission in subreddit.search(
+                    query=search_query, 
+                    time_filter=time_filter, 
+                    limit=limit, 
+                    sort='relevance'
+                ):
+                    if self.is_recent(submission.created_utc):
+                        full_text = self.get_full_post_text(submission)
+                        if self.detect_stock_in_text(full_text, ticker):
+                            self.process_submission(submission, ticker)
             
             print(f"  ✅ Finished r/{subreddit_name}")
             
         except Exception as e:
+            metrics.inc("http_errors_total", source="reddit")
             print(f"    Error in r/{subreddit_name}: {str(e)}")
     
     def search_single_stock(self, ticker, limit_per_sub=50, time_filter='week'):
@@ -201,9 +211,8 @@ class RedditStockScraper:
         ]
         
         # Use ThreadPoolExecutor for concurrent execution
-        start_time = time.time()
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+        with metrics.span("reddit_stock", ticker=ticker), \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             # Submit all tasks
             futures = [executor.submit(self.search_single_subreddit, args) for args in search_args]
             
@@ -217,10 +226,9 @@ class RedditStockScraper:
             if not_completed:
                 print(f"⚠️  {len(not_completed)} subreddit searches timed out")
         
-        elapsed_time = time.time() - start_time
+        metrics.inc("messages_scraped_total", len(self.scraped_data), source="reddit")
         print(f"\n{'='*60}")
         print(f"✅ Search Complete: {len(self.scraped_data)} messages found for {ticker}")
-        print(f"⏱️  Time taken: {elapsed_time:.2f} seconds")
         print(f"{'='*60}\n")
         
         return self.get_dataframe()
@@ -251,9 +259,8 @@ class RedditStockScraper:
             df = self.search_single_stock(ticker, limit_per_sub, time_filter)
             return ticker, df
         
-        start_time = time.time()
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(tickers))) as executor:
+        with metrics.span("reddit_multiple"), \
+                concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_workers, len(tickers))) as executor:
             futures = {executor.submit(search_stock_wrapper, ticker): ticker for ticker in tickers}
             
             for future in concurrent.futures.as_completed(futures):
@@ -266,9 +273,6 @@ class RedditStockScraper:
                     print(f"❌ Error searching {ticker}: {str(e)}")
                     results[ticker] = pd.DataFrame()
         
-        elapsed_time = time.time() - start_time
-        print(f"\n⏱️  Total time for {len(tickers)} stocks: {elapsed_time:.2f} seconds")
-        
         return results
     
     def get_dataframe(self):
@@ -0,0 +1,143 @@
+import sys
+import time
+import argparse
+import concurrent.futures
+
+import pandas as pd
+
+import local_store
+import metrics
+import panel_store
+from stock_keywords import STOCK_KEYWORDS
+from stock_data.price_frame import get_price_frame
+from stock_data.price_cache import get_ohlcv_many, window_bounds
+from correlation import score_compatibilite_df
+
+
+# Démon de rafraîchissement : recalcule en tâche de fond, pour chaque ticker de STOCK_KEYWORDS,
+# les prix, le sentiment journalier par moteur et les scores de corrélation, et les écrit dans
+# le stockage local (local_store.py). En fin de cycle, le panel mappé en mémoire (panel_store.py)
+# est reconstruit. Le dashboard ne fait plus que lire ces fichiers.
+#
+# Les tickers sont étalés sur la période (stagger) pour lisser la charge sur Reddit / yfinance,
+# et au plus `concurrency` tickers sont traités en même temps. Les prix de tout l'univers sont
+# téléchargés en un appel groupé en début de cycle : les tickers lisent ensuite le cache des prix.
+#
+# Lancement : python refresh_daemon.py --interval 3600 --concurrency 2 --engines textblob finbert
+
+
+def analyze_engine(engine, ticker):
+    if engine == "finbert":
+        from sentiment_analysis_finbert import analyze_single_stock
+        return analyze_single_stock(ticker)
+    from sentiment_analysis_textblob import analyze_single_stock_textblob
+    return analyze_single_stock_textblob(ticker, engine="lexicon" if engine == "lexicon" else "textblob")
+
+
+# La fonction refresh_ticker recalcule et écrit toutes les données d'un ticker.
+# Les moteurs partagent le même corpus scrapé (corpus_cache) : un seul scrape par ticker et par cycle.
+
+def refresh_ticker(ticker, engines=("textblob",), days_back=30, store_dir=None):
+    start = time.perf_counter()
+
+    df_prices = get_price_frame(ticker, days_back=days_back)
+    local_store.write_prices(ticker, df_prices, store_dir)
+
+    y1 = df_prices.set_index('date')[['price_change_pct']].rename(columns={'price_change_pct': ticker})
+
+    for engine in engines:
+        df_sentiment = analyze_engine(engine, ticker)
+        if df_sentiment is None or df_sentiment.empty:
+            print(f"⚠️ {ticker} [{engine}]: aucun sentiment")
+            continue
+        local_store.write_sentiment(ticker, engine, df_sentiment, store_dir)
+
+        y2_dict = {
+            "GlobalScore": df_sentiment["GlobalScore"].tolist(),
+            "analysis_date": df_sentiment["analysis_date"].astype(str).tolist()
+        }
+        min_date = pd.to_datetime(min(y2_dict["analysis_date"]))
+        max_date = pd.to_datetime(max(y2_dict["analysis_date"]))
+        scores = score_compatibilite_df(y1.loc[min_date:max_date], y2_dict)
+        local_store.write_scores(ticker, engine, scores, store_dir)
+
+    print(f"✅ {ticker} refreshed in {time.perf_counter() - start:.1f}s")
+
+
+def safe_refresh(ticker, engines, days_back, store_dir):
+    try:
+        refresh_ticker(ticker, engines, days_back, store_dir)
+    except Exception as e:
+        # Un ticker en erreur ne doit pas arrêter le démon ; il sera retenté au cycle suivant
+        print(f"❌ {ticker}: {e}")
+
+
+# La fonction run_daemon lance les cycles de rafraîchissement. Dans un cycle, le ticker i est soumis
+# à l'instant i * stagger (par défaut l'intervalle réparti sur tous les tickers).
+
+def run_daemon(tickers=None, engines=("textblob",), interval=3600, concurrency=2, stagger=None,
+               days_back=30, store_dir=None, once=False):
+    tickers = list(tickers or STOCK_KEYWORDS.keys())
+    if stagger is None:
+        stagger = 0 if once else interval / len(tickers)
+
+    print(f"🔄 Refresh daemon: {len(tickers)} tickers, engines {list(engines)}, "
+          f"every {interval}s, stagger {stagger:.0f}s, concurrency {concurrency}")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            cycle_start = time.monotonic()
+            try:
+                get_ohlcv_many(tickers, *window_bounds(days_back))
+            except Exception as e:
+                # Chaque ticker retentera sa propre plage manquante
+                print(f"❌ Prices: {e}")
+
+            futures = []
+            for i, ticker in enumerate(tickers):
+                delay = cycle_start + i * stagger - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                futures.append(executor.submit(safe_refresh, ticker, engines, days_back, store_dir))
+            concurrent.futures.wait(futures)
+
+            # Panel aligné dates × tickers reconstruit une fois par cycle, pour tous les lecteurs
+            try:
+                panel_store.build_panel(tickers, engines, days_back, store_dir)
+            except Exception as e:
+                print(f"❌ Panel: {e}")
+
+            if once:
+                break
+            remaining = cycle_start + interval - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute prices, sentiment and scores for the dashboard")
+    parser.add_argument('tickers', nargs='*', help="Tickers from STOCK_KEYWORDS (default: all)")
+    parser.add_argument('--engines', nargs='+', choices=['textblob', 'lexicon', 'finbert'], default=['textblob'])
+    parser.add_argument('--interval', type=float, default=3600, help="Seconds between two refreshes of a ticker")
+    parser.add_argument('--concurrency', type=int, default=2, help="Max tickers refreshed at the same time")
+    parser.add_argument('--stagger', type=float, default=None, help="Seconds between two ticker starts")
+    parser.add_argument('--days-back', type=int, default=30)
+    parser.add_argument('--store-dir', default=None)
+    parser.add_argument('--once', action='store_true', help="Run a single cycle and exit")
+    parser.add_argument('--metrics-port', type=int, default=None, help="Serve /metrics and /metrics.json on this port")
+    args = parser.parse_args(argv)
+
+    unknown = [t for t in args.tickers if t not in STOCK_KEYWORDS]
+    if unknown:
+        print(f"❌ Unknown ticker(s): {', '.join(unknown)}")
+        return 1
+
+    if args.metrics_port:
+        metrics.serve_metrics(port=args.metrics_port)
+    run_daemon(args.tickers, args.engines, args.interval, args.concurrency, args.stagger,
+               args.days_back, args.store_dir, args.once)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
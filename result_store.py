@@ -0,0 +1,289 @@
+import os
+import uuid
+from datetime import datetime, date, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+# Stockage colonne (Parquet) des résultats : sentiment journalier et scores de corrélation.
+#   results/sentiment/ticker=<T>/date=<AAAA-MM-JJ>/part-*.parquet   une ligne par (moteur, jour)
+#   results/scores/ticker=<T>/date=<AAAA-MM-JJ>/part-*.parquet      une ligne par (moteur, calcul)
+# Le partitionnement ticker / date permet aux lectures filtrées (un ticker sur 30 jours, ou tout
+# l'univers pour un jour) de n'ouvrir que les fichiers concernés.
+#
+# Les écritures sont en ajout seul : chaque écriture crée de nouveaux fichiers, jamais de réécriture.
+# Un fichier est écrit sous un nom préfixé par "_" (ignoré par pyarrow) puis renommé : un lecteur ne voit
+# jamais de fichier à moitié écrit.
+# À la lecture, seule la dernière version (written_at) de chaque (ticker, moteur, jour) est gardée.
+# compact_results regroupe les fichiers d'une partition quand ils deviennent trop nombreux.
+
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR", "results")
+
+PARTITIONING = ds.partitioning(pa.schema([("ticker", pa.string()), ("date", pa.date32())]), flavor="hive")
+
+SYMBOL = pa.dictionary(pa.int32(), pa.string())
+
+SENTIMENT_SCHEMA = pa.schema([
+    ("ticker", pa.string()),
+    ("date", pa.date32()),
+    ("engine", SYMBOL),
+    ("GlobalScore", pa.float32()),
+    ("Negative", pa.float32()),
+    ("Neutral", pa.float32()),
+    ("Positive", pa.float32()),
+    ("MessageCount", pa.int32()),
+    ("NbRedditTot", pa.int32()),
+    ("NbBloombergTot", pa.int32()),
+    ("written_at", pa.timestamp("us")),
+])
+
+SCORES_SCHEMA = pa.schema([
+    ("ticker", pa.string()),
+    ("date", pa.date32()),
+    ("engine", SYMBOL),
+    ("score_prediction", pa.float32()),
+    ("lag_prediction", pa.int32()),
+    ("score_reaction", pa.float32()),
+    ("lag_reaction", pa.int32()),
+    ("written_at", pa.timestamp("us")),
+])
+
+SCHEMAS = {"sentiment": SENTIMENT_SCHEMA, "scores": SCORES_SCHEMA}
+
+
+def dataset_dir(kind, root=None):
+    return os.path.join(root or RESULT_STORE_DIR, kind)
+
+
+def column_or_null(df, name, n):
+    return df[name] if name in df.columns else pd.Series([None] * n, dtype=object)
+
+
+def count_or_zero(df, name, n):
+    return df[name].fillna(0) if name in df.columns else pd.Series([0] * n)
+
+
+# La fonction append_table écrit une table dans le dataset partitionné, sous de nouveaux noms de fichiers
+# (les fichiers existants ne sont jamais modifiés) : "_tmp-part-*.parquet" pendant l'écriture,
+# renommés en "part-*.parquet" une fois complets.
+
+def append_table(kind, table, root=None):
+    written = []
+    ds.write_dataset(
+        table, dataset_dir(kind, root), format="parquet", partitioning=PARTITIONING,
+        basename_template=f"_tmp-part-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_visitor=lambda written_file: written.append(written_file.path),
+    )
+    for tmp_path in written:
+        directory, name = os.path.split(tmp_path)
+        os.replace(tmp_path, os.path.join(directory, name[len("_tmp-"):]))
+
+
+# ==========================
+# ÉCRITURE
+# ==========================
+
+# La fonction append_sentiment ajoute le sentiment journalier d'un ticker pour un moteur.
+# df_sentiment est la sortie de main_analyse_textblob / main_analyse_finbert (une ligne par analysis_date).
+
+def append_sentiment(ticker, engine, df_sentiment, root=None):
+    if df_sentiment is None or df_sentiment.empty:
+        return 0
+    n = len(df_sentiment)
+    table = pa.table({
+        "ticker": pa.array([ticker] * n, pa.string()),
+        "date": pa.array(pd.to_datetime(df_sentiment["analysis_date"]).dt.date, pa.date32()),
+        "engine": pa.array([engine] * n, pa.string()).dictionary_encode(),
+        "GlobalScore": pa.array(df_sentiment["GlobalScore"], pa.float32(), from_pandas=True),
+        "Negative": pa.array(column_or_null(df_sentiment, "Negative", n), pa.float32(), from_pandas=True),
+        "Neutral": pa.array(column_or_null(df_sentiment, "Neutral", n), pa.float32(), from_pandas=True),
+        "Positive": pa.array(column_or_null(df_sentiment, "Positive", n), pa.float32(), from_pandas=True),
+        "MessageCount": pa.array(df_sentiment["MessageCount"], pa.int32(), from_pandas=True),
+        "NbRedditTot": pa.array(count_or_zero(df_sentiment, "NbRedditTot", n), pa.int32()),
+        "NbBloombergTot": pa.array(count_or_zero(df_sentiment, "NbBloombergTot", n), pa.int32()),
+        "written_at": pa.array([datetime.now()] * n, pa.timestamp("us")),
+    }, schema=SENTIMENT_SCHEMA)
+    append_table("sentiment", table, root)
+    return n
+
+
+# La fonction append_scores ajoute un calcul de scores (sortie de score_compatibilite_df),
+# rangé sous la date du calcul (as_of, aujourd'hui par défaut).
+
+def append_scores(ticker, engine, scores, as_of=None, root=None):
+    def lag(value):
+        return None if value is None or pd.isna(value) else int(value)
+
+    table = pa.table({
+        "ticker": pa.array([ticker], pa.string()),
+        "date": pa.array([as_of or date.today()], pa.date32()),
+        "engine": pa.array([engine], pa.string()).dictionary_encode(),
+        "score_prediction": pa.array([scores["score_prediction"]], pa.float32(), from_pandas=True),
+        "lag_prediction": pa.array([lag(scores["lag_prediction"])], pa.int32()),
+        "score_reaction": pa.array([scores["score_reaction"]], pa.float32(), from_pandas=True),
+        "lag_reaction": pa.array([lag(scores["lag_reaction"])], pa.int32()),
+        "written_at": pa.array([datetime.now()], pa.timestamp("us")),
+    }, schema=SCORES_SCHEMA)
+    append_table("scores", table, root)
+
+
+# ==========================
+# LECTURE
+# ==========================
+
+def as_list(value):
+    if value is None:
+        return None
+    return [value] if isinstance(value, str) else list(value)
+
+
+# La fonction build_filter construit le prédicat poussé au dataset : les filtres sur ticker et date
+# éliminent des partitions entières, le filtre sur le moteur s'applique aux statistiques des row groups.
+
+def build_filter(tickers=None, engines=None, start=None, end=None):
+    conditions = []
+    tickers, engines = as_list(tickers), as_list(engines)
+    if tickers is not None:
+        conditions.append(ds.field("ticker").isin(tickers))
+    if engines is not None:
+        conditions.append(ds.field("engine").isin(engines))
+    if start is not None:
+        conditions.append(ds.field("date") >= pd.Timestamp(start).date())
+    if end is not None:
+        conditions.append(ds.field("date") <= pd.Timestamp(end).date())
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+# Une compaction concurrente peut supprimer un fichier entre le listage du dataset et sa lecture :
+# le dataset est alors relisté (le fichier compacté contient les mêmes lignes), jusqu'à READ_ATTEMPTS fois.
+
+READ_ATTEMPTS = 3
+
+
+def read_table(kind, tickers=None, engines=None, start=None, end=None, columns=None, root=None):
+    path = dataset_dir(kind, root)
+    for attempt in range(READ_ATTEMPTS):
+        if not os.path.isdir(path):
+            return SCHEMAS[kind].empty_table()
+        dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING, schema=SCHEMAS[kind])
+        try:
+            return dataset.to_table(columns=columns, filter=build_filter(tickers, engines, start, end))
+        except FileNotFoundError:
+            if attempt == READ_ATTEMPTS - 1:
+                raise
+
+
+# La fonction latest_rows garde la dernière écriture de chaque (ticker, moteur, date),
+# et convertit ticker / moteur en catégories pandas.
+
+def latest_rows(table):
+    df = table.to_pandas()
+    if df.empty:
+        return df
+    df = df.sort_values("written_at", kind="stable")
+    df = df.drop_duplicates(["ticker", "engine", "date"], keep="last")
+    df["ticker"] = df["ticker"].astype("category")
+    df["engine"] = df["engine"].astype("category")
+    return df.sort_values(["ticker", "engine", "date"]).reset_index(drop=True)
+
+
+def read_sentiment(tickers=None, engines=None, start=None, end=None, root=None):
+    """Daily sentiment rows (latest version of each ticker/engine/day) matching the filters"""
+    df = latest_rows(read_table("sentiment", tickers, engines, start, end, root=root))
+    return df.rename(columns={"date": "analysis_date"})
+
+
+def read_ticker_window(ticker, engine, days_back=30, end=None, root=None):
+    """Sentiment of one ticker over the last days_back days, in the analyse_* output format"""
+    end = pd.Timestamp(end or date.today()).date()
+    df = read_sentiment(ticker, engine, end - timedelta(days=days_back), end, root)
+    if df.empty:
+        return None
+    # Fichiers écrits avant l'ajout de NbBloombergTot : colonne nulle, lue comme 0
+    for column in ("NbRedditTot", "NbBloombergTot"):
+        df[column] = df[column].fillna(0).astype("int32")
+    df = df.rename(columns={"ticker": "stock_symbol"}).drop(columns=["engine", "written_at"])
+    df["stock_symbol"] = df["stock_symbol"].astype(str)
+    return df.dropna(axis=1, how="all")
+
+
+def read_cross_section(day, engines=None, root=None):
+    """Sentiment of every stored ticker for a single day"""
+    return read_sentiment(None, engines, day, day, root)
+
+
+def read_scores(tickers=None, engines=None, start=None, end=None, root=None):
+    """Correlation score rows (latest computation per ticker/engine/day) matching the filters"""
+    return latest_rows(read_table("scores", tickers, engines, start, end, root=root))
+
+
+def read_latest_scores(ticker, engine, root=None):
+    """Most recent scores of a ticker/engine as a score_compatibilite_df-style dict, or None"""
+    df = read_scores(ticker, engine, root=root)
+    if df.empty:
+        return None
+    row = df.iloc[-1]
+    return {
+        "score_prediction": float(row["score_prediction"]),
+        "lag_prediction": None if pd.isna(row["lag_prediction"]) else int(row["lag_prediction"]),
+        "score_reaction": float(row["score_reaction"]),
+        "lag_reaction": None if pd.isna(row["lag_reaction"]) else int(row["lag_reaction"]),
+    }
+
+
+def last_written_at(kind, ticker, engine, root=None):
+    """Timestamp (datetime) of the last write for a ticker/engine, or None"""
+    table = read_table(kind, ticker, engine, columns=["written_at"], root=root)
+    if table.num_rows == 0:
+        return None
+    return pd.Timestamp(np.max(table["written_at"].to_numpy())).to_pydatetime()
+
+
+# ==========================
+# COMPACTION
+# ==========================
+
+# La fonction compact_results réécrit en un seul fichier chaque partition qui en contient au moins
+# min_files, en ne gardant que la dernière version de chaque ligne. Le nouveau fichier est écrit
+# avant la suppression des anciens : un lecteur concurrent voit des doublons, que latest_rows élimine,
+# ou un fichier disparu entre listage et lecture, et read_table reliste alors le dataset.
+# Le fichier temporaire est préfixé par "_" : pyarrow ignore ces fichiers, un lecteur ne voit jamais
+# un fichier à moitié écrit.
+
+def compact_results(kind, min_files=8, root=None):
+    path = dataset_dir(kind, root)
+    compacted = 0
+    for directory, _, files in os.walk(path):
+        parts = sorted(f for f in files if f.endswith(".parquet") and not f.startswith(("_", ".")))
+        if len(parts) < min_files:
+            continue
+        # Les fichiers ne contiennent pas les colonnes de partition (ticker, date) : la clé est le moteur
+        file_schema = SCHEMAS[kind].remove(1).remove(0)
+        try:
+            table = pa.concat_tables([pq.read_table(os.path.join(directory, f), schema=file_schema) for f in parts])
+        except FileNotFoundError:
+            # Partition compactée en même temps par un autre processus
+            continue
+        df = table.to_pandas().sort_values("written_at", kind="stable").drop_duplicates(["engine"], keep="last")
+        merged = pa.Table.from_pandas(df, schema=file_schema, preserve_index=False)
+
+        name = f"part-compacted-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = os.path.join(directory, f"_tmp-{name}")
+        pq.write_table(merged, tmp_path)
+        os.replace(tmp_path, os.path.join(directory, name))
+        for f in parts:
+            try:
+                os.remove(os.path.join(directory, f))
+            except FileNotFoundError:
+                pass
+        compacted += 1
+    return compacted
@@ -0,0 +1,153 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from correlation import NAN_SCORES, best_lag
+
+
+# Corrélation glissante incrémentale : un RollingCorrelator par ticker garde, pour chaque lag de
+# -max_lag_days à +max_lag_days, les sommes courantes des paires (% de variation, sentiment) de la fenêtre :
+#   Σ x·y, Σ x, Σ y, nombre de paires        (par lag)
+#   Σ x, Σ x², n_x, Σ y, Σ y², n_y           (fenêtre, pour moyennes et écarts-types)
+# Chaque nouveau jour ajoute une paire par lag et l'éviction du jour le plus ancien en retire une :
+# la mise à jour coûte O(max_lag), quelle que soit la longueur de l'historique.
+#
+# Les scores sont ceux de score_compatibilite_arrays sur les `window` derniers jours : en développant
+# Σ (x - mx)/sx · (y - my)/sy sur les paires d'un lag, tout s'exprime avec ces sommes.
+#
+#   correlator = RollingCorrelator(window=30, max_lag_days=7)
+#   correlator.update(pct_change, sentiment, date)   # -> dict score_prediction, lag_prediction, ...
+#   correlator.history_frame()
+
+class RollingCorrelator:
+    def __init__(self, window=30, max_lag_days=7, history_size=365, resync_every=None):
+        if window <= max_lag_days:
+            raise ValueError("window must be longer than max_lag_days")
+        self.window = window
+        self.max_lag = max_lag_days
+        self.lags = np.arange(-max_lag_days, max_lag_days + 1)
+        # Les soustractions accumulent des erreurs d'arrondi : sommes recalculées depuis la fenêtre
+        # tous les resync_every jours (coût amorti O(max_lag))
+        self.resync_every = resync_every or 10 * window
+        self.history = deque(maxlen=history_size)
+        self.reset()
+
+    def reset(self):
+        self.xs = np.full(self.window, np.nan)
+        self.ys = np.full(self.window, np.nan)
+        self.t = 0
+        self.first = 0  # premier jour encore dans la fenêtre
+        self.window_sums = np.zeros(6)  # Σx, Σx², n_x, Σy, Σy², n_y
+        self.sum_xy = np.zeros(len(self.lags))
+        self.sum_x = np.zeros(len(self.lags))
+        self.sum_y = np.zeros(len(self.lags))
+        self.pairs = np.zeros(len(self.lags))
+
+    # Paires d'un jour t avec ses partenaires déjà arrivés, une par lag :
+    #   newest=True  (t vient d'arriver, partenaires plus anciens) : (x[t], y[t - k]) si k >= 0, (x[t + k], y[t]) sinon
+    #   newest=False (t quitte la fenêtre, partenaires plus récents) : (x[t + k], y[t]) si k >= 0, (x[t], y[t - k]) sinon
+    # Les partenaires sont toujours dans la fenêtre puisque window > max_lag.
+    def day_pairs(self, t, newest):
+        offsets = np.abs(self.lags)
+        partner = t - offsets if newest else t + offsets
+        present = (partner >= self.first) & (partner < self.t)
+        slots = partner % self.window
+        x_t, y_t = self.xs[t % self.window], self.ys[t % self.window]
+        t_is_x = (self.lags >= 0) == newest
+        x = np.where(t_is_x, x_t, self.xs[slots])
+        y = np.where(t_is_x, self.ys[slots], y_t)
+        valid = present & ~np.isnan(x) & ~np.isnan(y)
+        return np.where(valid, x, 0.0), np.where(valid, y, 0.0), valid
+
+    def apply_day(self, t, newest, sign):
+        x, y, valid = self.day_pairs(t, newest)
+        self.sum_xy += sign * x * y
+        self.sum_x += sign * x
+        self.sum_y += sign * y
+        self.pairs += sign * valid
+
+        x_t, y_t = self.xs[t % self.window], self.ys[t % self.window]
+        if not np.isnan(x_t):
+            self.window_sums[:3] += sign * np.array([x_t, x_t * x_t, 1.0])
+        if not np.isnan(y_t):
+            self.window_sums[3:] += sign * np.array([y_t, y_t * y_t, 1.0])
+
+    def update(self, x, y, date=None):
+        """Add one day (pct change, sentiment; NaN if missing), evict the oldest one and return the scores"""
+        if self.t >= self.window:
+            # Le plus ancien jour quitte la fenêtre : ses paires sont retirées avant que son emplacement soit réutilisé
+            self.apply_day(self.t - self.window, newest=False, sign=-1)
+
+        slot = self.t % self.window
+        self.xs[slot], self.ys[slot] = float(x), float(y)
+        self.t += 1
+        self.first = max(self.t - self.window, 0)
+        self.apply_day(self.t - 1, newest=True, sign=1)
+
+        if self.t % self.resync_every == 0:
+            self.resync()
+
+        scores = self.scores()
+        self.history.append(dict(scores, date=date))
+        return scores
+
+    def resync(self):
+        """Recompute every running sum from the days still in the window"""
+        start = max(self.t - self.window, 0)
+        end = self.t
+        self.first = start
+        self.window_sums[:] = 0
+        for array in (self.sum_xy, self.sum_x, self.sum_y, self.pairs):
+            array[:] = 0
+        for t in range(start, end):
+            self.t = t + 1
+            self.apply_day(t, newest=True, sign=1)
+
+    def correlations(self):
+        """Correlation of every lag over the current window (NaN where no pair overlaps)"""
+        sx, sxx, nx, sy, syy, ny = self.window_sums
+        if nx < 2 or ny < 2:
+            return np.full(len(self.lags), np.nan)
+        mx, my = sx / nx, sy / ny
+        std_x = np.sqrt(max(sxx - nx * mx * mx, 0.0) / (nx - 1))
+        std_y = np.sqrt(max(syy - ny * my * my, 0.0) / (ny - 1))
+        centered = self.sum_xy - my * self.sum_x - mx * self.sum_y + self.pairs * mx * my
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.pairs > 0, centered / (self.pairs * std_x * std_y), np.nan)
+
+    def scores(self):
+        """Current score_prediction / lag_prediction / score_reaction / lag_reaction"""
+        corr = self.correlations()
+        if np.isnan(corr).all():
+            return dict(NAN_SCORES)
+        positive = self.lags >= 0
+        score_prediction, lag_prediction = best_lag(corr[positive], self.lags[positive])
+        score_reaction, lag_reaction = best_lag(corr[~positive], self.lags[~positive])
+        return {
+            "score_prediction": score_prediction,
+            "lag_prediction": lag_prediction,
+            "score_reaction": score_reaction,
+            "lag_reaction": lag_reaction
+        }
+
+    def history_frame(self):
+        """Scores after each update, indexed by date"""
+        frame = pd.DataFrame(list(self.history),
+                             columns=["date", "score_prediction", "lag_prediction", "score_reaction", "lag_reaction"])
+        frame["lag_prediction"] = frame["lag_prediction"].astype("Int64")
+        frame["lag_reaction"] = frame["lag_reaction"].astype("Int64")
+        return frame.set_index("date")
+
+
+# La fonction rolling_scores rejoue une série entière (% de variation x, sentiment y, déjà alignés) dans
+# un RollingCorrelator et renvoie l'historique des scores glissants : O(n · max_lag) au lieu de
+# recalculer chaque fenêtre.
+
+def rolling_scores(x, y, dates=None, window=30, max_lag_days=7):
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    dates = range(len(x)) if dates is None else dates
+    correlator = RollingCorrelator(window, max_lag_days, history_size=len(x))
+    for x_t, y_t, date in zip(x, y, dates):
+        correlator.update(x_t, y_t, date)
+    return correlator.history_frame()
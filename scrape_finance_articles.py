@@ -8,6 +8,7 @@ from stock_keywords import STOCK_KEYWORDS, get_company_from_ticker
 from datetime import datetime, timedelta
 import re
 import pandas as pd
+import metrics
 
 
 def convert_timestamp(timestamp_str):
@@ -48,30 +49,8 @@ def convert_timestamp(timestamp_str):
     # If not in any recognized format, return as is
     return timestamp_str
 
-def scrape_bloomberg(playwright, company):
-    browser = playwright.chromium.launch_persistent_context(
-        user_data_dir="chrome_cache",
-        accept_downloads=True,
-        headless=False,
-        bypass_csp=True,
-        slow_mo=100,
-        channel="chrome",
-        args=['--disable-blink-features=AutomationControlled']
-    )
-
-    page = browser.new_page()
-    all_articles = []  # List to store all articles for DataFrame
-
-    print(f"Scraping {company} on Bloomberg...\n\n")
-    page.goto(f"https://www.bloomberg.com/search?query={company}&sort=relevance&start_time=-1m")
-
-    for i in range(3):
-        load_more_button = page.locator('//button[contains(@class, "LoadMoreButton")]')
-        load_more_button.click()
-        sleep(3)
-
-    # Get page source and parse with Beautiful Soup
-    html_content = page.content()
+def parse_search_results(html_content):
+    """Extract summary/timestamp pairs from a Bloomberg search results page"""
     soup = BeautifulSoup(html_content, 'html.parser')
     
     containers = soup.find_all('div', class_=lambda c: c and 'SearchResult_rowOrStackResultTimestamp' in c)
@@ -95,11 +74,21 @@ def scrape_bloomberg(playwright, company):
             }
             articles_data.append(article_obj)
 
+    return articles_data
+
+
+def filter_articles(articles_data, company):
+    """Keep articles mentioning the company or a stock keyword, dropping duplicates.
+
+    Returns (filtered_articles, removed_no_match, removed_duplicate)
+    """
     # Track unique texts to avoid duplicates
     unique_texts = []
     filtered_articles = []
 
     # Apply filtering logic
+    removed_no_match = 0
+    removed_duplicate = 0
     for article in articles_data:
         section_text = article['summary'].lower()
         
@@ -113,20 +102,54 @@ def scrape_bloomberg(playwright, company):
         if (company_found or context_found) and section_text not in unique_texts:
             unique_texts.append(section_text)
             filtered_articles.append(article)
-            print(f"{company}-Article matches company or context criteria")
+        elif not company_found and not context_found:
+            removed_no_match += 1
         else:
-            if not company_found and not context_found:
-                print(f"{company}-Removed: Neither company name nor stock keywords found in article")
-            else:
-                print(f"{company}-Removed: Duplicate article")
-            print("--------------\n")
-            
+            removed_duplicate += 1
+
+    return filtered_articles, removed_no_match, removed_duplicate
+
+
+def scrape_bloomberg(playwright, company):
+    browser = playwright.chromium.launch_persistent_context(
+        user_data_dir="chrome_cache",
+        accept_downloads=True,
+        headless=False,
+        bypass_csp=True,
+        slow_mo=100,
+        channel="chrome",
+        args=['--disable-blink-features=AutomationControlled']
+    )
+
+    page = browser.new_page()
+    all_articles = []  # List to store all articles for DataFrame
+
+    print(f"Scraping {company} on Bloomberg...\n\n")
+    with metrics.span("bloomberg_page"):
+        try:
+            page.goto(f"https://www.bloomberg.com/search?query={company}&sort=relevance&start_time=-1m")
+
+            for i in range(3):
+                load_more_button = page.locator('//button[contains(@class, "LoadMoreButton")]')
+                load_more_button.click()
+                sleep(3)
+
+            # Get page source and parse with Beautiful Soup
+            html_content = page.content()
+        except Exception:
+            metrics.inc("http_errors_total", source="bloomberg")
+            browser.close()
+            raise
+
+    articles_data = parse_search_results(html_content)
+    filtered_articles, removed_no_match, removed_duplicate = filter_articles(articles_data, company)
+
+    # One summary line instead of a print per article (the prints slowed the loop down)
+    print(f"{company}-{len(filtered_articles)} article(s) kept, {removed_no_match} without company/keywords, "
+          f"{removed_duplicate} duplicate(s)")
+
     if filtered_articles:
-        print(f"{company}-Summary section(s) found\n")
         for article in filtered_articles:
-            print(f"Timestamp: {article['timestamp']}")
-            print(f"Summary: {article['summary']}\n")
-            
             # Add to all_articles list for DataFrame
             all_articles.append({
                 'company_name': company,
@@ -134,7 +157,7 @@ def scrape_bloomberg(playwright, company):
                 'created_utc': article['timestamp'],
                 'source': 'bloomberg'
             })
-            print("--------------\n")
+        metrics.inc("messages_scraped_total", len(all_articles), source="bloomberg")
     else:
         print(f"{company}-No relevant summary sections found \n")
 
@@ -1,29 +1,186 @@
-import tensorflow as tf
-from transformers import TFBertForSequenceClassification, BertTokenizer, set_seed
 import pandas as pd
 import numpy as np
 import os
-import tensorflow as tf
+import queue
+import threading
+import time
+import requests
 
+from near_duplicates import dedup_texts
+import metrics
+
+
+# TensorFlow et transformers ne sont importés qu'au chargement du modèle (voir load_backend) :
+# un processus qui passe par le serveur d'inférence (mode client) ne les charge jamais.
+tf = None
+transformers = None
 
 # Variables globales pour le modèle et le tokenizer
 model = None
 tokenizer = None
-
-def load_finbert_model():
-    global model, tokenizer
-    if model is None or tokenizer is None:
-        print("Chargement du modèle FinBERT...")
-        set_seed(1, True)
-        model_path = "ProsusAI/finbert"
-        tokenizer = BertTokenizer.from_pretrained(model_path)
-        model = TFBertForSequenceClassification.from_pretrained(model_path)
-    else:
-        print("Le modèle FinBERT est déjà chargé.")
+fast_tokenizer = None
+
+# Adresse du serveur d'inférence partagé (finbert_server.py). Si elle est définie,
+# analyze_sentiment envoie les textes au serveur au lieu de charger le modèle localement.
+FINBERT_SERVER_URL = os.getenv("FINBERT_SERVER_URL")
+
+# Dossier de l'artefact local (poids convertis + tokenizer rapide sérialisé), écrit au premier chargement
+FINBERT_ARTIFACT_DIR = os.getenv("FINBERT_ARTIFACT_DIR", "finbert_artifacts")
+
+# Chargement thread-safe : le préchargement en arrière-plan et une requête peuvent arriver en même temps
+model_lock = threading.Lock()
+model_ready = threading.Event()
+
+# Mode compilé : on ne fait tourner le modèle que sur un petit nombre de formes fixes
+# (longueur de séquence arrondie au bucket supérieur, batch complété jusqu'à batch_size),
+# ce qui permet à tf.function / XLA de réutiliser les graphes au lieu de retracer à chaque batch.
+SEQ_LEN_BUCKETS = (32, 64, 128, 256, 512)
+compiled_predict = None
+compiled_batch_size = None
+
+def load_backend():
+    global tf, transformers
+    if tf is None:
+        import tensorflow
+        import transformers as hf_transformers
+        tf = tensorflow
+        transformers = hf_transformers
+
+
+# La fonction load_finbert_model charge le modèle et le tokenizer une seule fois par processus (thread-safe).
+# Si un artefact local existe (FINBERT_ARTIFACT_DIR : poids safetensors + tokenizer rapide sérialisé),
+# on le charge directement ; sinon on télécharge le modèle depuis le hub puis on écrit l'artefact
+# pour que les démarrages suivants n'aient plus besoin du réseau ni de la conversion.
+
+def load_finbert_model(compiled=False, batch_size=32):
+    global model, tokenizer, fast_tokenizer
+    with model_lock:
+        load_backend()
+        if model is None or tokenizer is None:
+            print("Chargement du modèle FinBERT...")
+            transformers.set_seed(1, True)
+            if os.path.exists(os.path.join(FINBERT_ARTIFACT_DIR, "tokenizer.json")):
+                # Le tokenizer rapide donne exactement les mêmes ids que BertTokenizer, pour une fraction du temps de chargement
+                fast_tokenizer = transformers.BertTokenizerFast.from_pretrained(FINBERT_ARTIFACT_DIR)
+                tokenizer = fast_tokenizer
+                model = transformers.TFBertForSequenceClassification.from_pretrained(FINBERT_ARTIFACT_DIR)
+            else:
+                model_path = "ProsusAI/finbert"
+                tokenizer = transformers.BertTokenizer.from_pretrained(model_path)
+                model = transformers.TFBertForSequenceClassification.from_pretrained(model_path)
+                export_finbert_artifacts(FINBERT_ARTIFACT_DIR)
+        else:
+            print("Le modèle FinBERT est déjà chargé.")
+        if compiled:
+            load_compiled_predict(batch_size)
+        model_ready.set()
     return model, tokenizer
 
 
-from reddit_scraper_quick import RedditStockScraper
+# La fonction ensure_finbert_model charge le modèle s'il ne l'est pas encore, sans rien afficher sinon :
+# elle est appelée à chaque prédiction (chaque micro-batch du serveur FinBERT, par exemple).
+
+def ensure_finbert_model(compiled=False, batch_size=32):
+    if model_ready.is_set() and (not compiled or compiled_batch_size == batch_size):
+        return model, tokenizer
+    return load_finbert_model(compiled=compiled, batch_size=batch_size)
+
+
+# La fonction export_finbert_artifacts écrit le modèle chargé (safetensors) et le tokenizer rapide (tokenizer.json)
+# dans un dossier local, relu ensuite par load_finbert_model.
+
+def export_finbert_artifacts(path=None):
+    path = path or FINBERT_ARTIFACT_DIR
+    try:
+        os.makedirs(path, exist_ok=True)
+        model.save_pretrained(path, safe_serialization=True)
+        transformers.BertTokenizerFast.from_pretrained("ProsusAI/finbert").save_pretrained(path)
+        print(f"💾 Artefact FinBERT écrit dans {path}")
+    except OSError as e:
+        print(f"⚠️ Impossible d'écrire l'artefact FinBERT dans {path}: {e}")
+
+
+# La fonction preload_finbert_async lance le chargement du modèle dans un thread en arrière-plan
+# (par exemple au démarrage du dashboard) ; is_finbert_ready indique si le modèle est prêt.
+
+def preload_finbert_async(compiled=False, batch_size=32):
+    thread = threading.Thread(
+        target=load_finbert_model,
+        kwargs={'compiled': compiled, 'batch_size': batch_size},
+        name="finbert-preload",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def is_finbert_ready():
+    return model_ready.is_set()
+
+
+# La fonction load_fast_tokenizer charge la version Rust (tokenizers) du tokenizer FinBERT.
+# Elle libère le GIL pendant l'encodage, ce qui permet de tokenizer dans un thread pendant que le modèle tourne.
+
+def load_fast_tokenizer():
+    global fast_tokenizer
+    load_backend()
+    if fast_tokenizer is None:
+        fast_tokenizer = transformers.BertTokenizerFast.from_pretrained("ProsusAI/finbert")
+    return fast_tokenizer
+
+
+# La fonction load_compiled_predict construit la version compilée (XLA) du passage avant du modèle
+# et la "chauffe" une fois pour chaque bucket de longueur, afin que les appels suivants
+# n'aient plus jamais à tracer ou compiler de graphe.
+
+def load_compiled_predict(batch_size=32):
+    global compiled_predict, compiled_batch_size
+    if compiled_predict is not None and compiled_batch_size == batch_size:
+        return compiled_predict
+
+    @tf.function(jit_compile=True)
+    def predict(input_ids, attention_mask, token_type_ids):
+        outputs = model(input_ids=input_ids, attention_mask=attention_mask,
+                        token_type_ids=token_type_ids, training=False)
+        return tf.nn.softmax(outputs.logits, axis=-1)
+
+    print(f"Compilation de FinBERT pour les buckets {SEQ_LEN_BUCKETS} (batch de {batch_size})...")
+    for seq_len in SEQ_LEN_BUCKETS:
+        dummy = tf.zeros((batch_size, seq_len), dtype=tf.int32)
+        predict(dummy, tf.ones_like(dummy), dummy)
+
+    compiled_predict = predict
+    compiled_batch_size = batch_size
+    return compiled_predict
+
+
+# La fonction choose_seq_len_bucket renvoie le plus petit bucket capable de contenir la séquence la plus longue du batch.
+
+def choose_seq_len_bucket(max_len):
+    for bucket in SEQ_LEN_BUCKETS:
+        if max_len <= bucket:
+            return bucket
+    return SEQ_LEN_BUCKETS[-1]
+
+
+# La fonction tokenize_to_bucket tokenize un batch puis le complète jusqu'à une forme fixe (batch_size, bucket) :
+# les séquences sont paddées jusqu'au bucket et des lignes vides sont ajoutées si le batch est incomplet.
+
+def tokenize_to_bucket(batch_texts, batch_size, tok=None):
+    tok = tok or tokenizer
+    encoded = tok(batch_texts, truncation=True, max_length=SEQ_LEN_BUCKETS[-1])
+    seq_len = choose_seq_len_bucket(max(len(ids) for ids in encoded['input_ids']))
+
+    arrays = {}
+    for key in ('input_ids', 'attention_mask', 'token_type_ids'):
+        padded = np.zeros((batch_size, seq_len), dtype=np.int32)
+        for row, ids in enumerate(encoded[key]):
+            padded[row, :len(ids)] = ids
+        arrays[key] = padded
+    return arrays
+
+
+from corpus_cache import get_corpus
 
 
 # La fonction aggregate_sentiment_scores prend en paramètre une liste de scores de sentiment pour plusieurs textes
@@ -36,40 +193,161 @@ def aggregate_sentiment_scores(sentiment_scores):
 
 
 
-# La fonction analyse_sentiment prend en paramètre une liste de textes et un batch_size (afin d'éviter un problème de mémoire).
-# Elle renvoie un dictionnaire contenant les scores agrégés pour chaque catégorie de sentiment (Négatif, Neutre, Positif),
-# le score global (Positif - Négatif) et le nombre de messages analysés.
-
-def analyze_sentiment(texts, batch_size=32):
-
-    # On vérifie que la liste de textes n'est pas vide
-    if not texts:
-        return None
+# La fonction predict_scores prend en paramètre une liste de textes et renvoie un tableau numpy
+# (une ligne par message, une colonne par catégorie : Négatif, Neutre, Positif) de probabilités.
+# En mode compilé, chaque batch est ramené à une forme (batch_size, bucket) déjà compilée au chargement.
 
-    load_finbert_model()
+def predict_scores(texts, batch_size=32, compiled=False):
+    ensure_finbert_model(compiled=compiled, batch_size=batch_size)
 
-    # On compte le nombre de messages
-    message_count = len(texts)
-    all_scores= []
+    all_scores = []
 
     # Traitement par batch pour éviter les problèmes de mémoire
-    for i in range(0, message_count, batch_size):
+    for i in range(0, len(texts), batch_size):
         batch_texts = texts[i:i+batch_size]
-        # On tokenize les textes du batch afin de les préparer pour le modèle
-        inputs = tokenizer(batch_texts, padding=True, truncation=True, return_tensors='tf')
-        # On passe les inputs au modèle pour obtenir les scores de sentiment
-        outputs = model(**inputs)
-        # On applique la fonction softmax pour obtenir des probabilités
-        scores = tf.nn.softmax(outputs.logits, axis=-1).numpy()
+        if compiled:
+            # Forme fixe : on réutilise le graphe compilé et on retire les lignes de padding
+            with metrics.span("tokenize", engine="finbert"):
+                inputs = tokenize_to_bucket(batch_texts, batch_size)
+            with metrics.span("inference", engine="finbert"):
+                scores = compiled_predict(**inputs).numpy()[:len(batch_texts)]
+        else:
+            # On tokenize les textes du batch afin de les préparer pour le modèle
+            with metrics.span("tokenize", engine="finbert"):
+                inputs = tokenizer(batch_texts, padding=True, truncation=True, return_tensors='tf')
+            with metrics.span("inference", engine="finbert"):
+                # On passe les inputs au modèle pour obtenir les scores de sentiment
+                outputs = model(**inputs)
+                # On applique la fonction softmax pour obtenir des probabilités
+                scores = tf.nn.softmax(outputs.logits, axis=-1).numpy()
+        if metrics.enabled:
+            metrics.inc("tokens_total", int(np.asarray(inputs['attention_mask']).sum()), engine="finbert")
         # On stocke les scores de ce batch
         all_scores.append(scores)
 
-    # On concatène tous les scores pour obtenir un seul tableau (avec une ligne par message et une colonne par catégorie de sentiment)
-    all_scores = np.concatenate(all_scores, axis=0)
+    metrics.inc("messages_scored_total", len(texts), engine="finbert")
 
+    # On concatène tous les scores pour obtenir un seul tableau (avec une ligne par message et une colonne par catégorie de sentiment)
+    return np.concatenate(all_scores, axis=0)
+
+
+# La fonction predict_scores_pipelined fait la même chose que predict_scores, mais en recouvrant
+# tokenization et inférence : un thread producteur tokenize les batches suivants avec le tokenizer rapide
+# et les dépose dans une file bornée (queue_depth), pendant que le thread principal fait tourner le modèle.
+# Elle renvoie les scores et un dictionnaire de temps par étape (en secondes).
+
+def predict_scores_pipelined(texts, batch_size=32, queue_depth=2, compiled=False):
+    ensure_finbert_model(compiled=compiled, batch_size=batch_size)
+    tok = load_fast_tokenizer()
+
+    batches = queue.Queue(maxsize=queue_depth)
+    stats = {'tokenize': 0.0, 'inference': 0.0, 'wait': 0.0, 'total': 0.0, 'batches': 0}
+    errors = []
+    # Arrêt du producteur si le thread principal s'interrompt (erreur d'inférence) : sans cela il resterait
+    # bloqué sur une file pleine que plus personne ne vide
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for i in range(0, len(texts), batch_size):
+                batch_texts = texts[i:i+batch_size]
+                start = time.perf_counter()
+                with metrics.span("tokenize", engine="finbert"):
+                    if compiled:
+                        inputs = tokenize_to_bucket(batch_texts, batch_size, tok=tok)
+                    else:
+                        inputs = tok(batch_texts, padding=True, truncation=True, return_tensors='np')
+                stats['tokenize'] += time.perf_counter() - start
+                if metrics.enabled:
+                    metrics.inc("tokens_total", int(inputs['attention_mask'].sum()), engine="finbert")
+                if not put((len(batch_texts), inputs)):
+                    return
+        except Exception as e:
+            errors.append(e)
+        finally:
+            # Sentinelle de fin de flux
+            put(None)
+
+    start_total = time.perf_counter()
+    worker = threading.Thread(target=producer, daemon=True)
+    worker.start()
+
+    all_scores = []
+    try:
+        while True:
+            start = time.perf_counter()
+            item = batches.get()
+            stats['wait'] += time.perf_counter() - start
+            if item is None:
+                break
+
+            n, inputs = item
+            start = time.perf_counter()
+            with metrics.span("inference", engine="finbert"):
+                if compiled:
+                    scores = compiled_predict(**inputs).numpy()[:n]
+                else:
+                    outputs = model(**{k: tf.constant(v) for k, v in inputs.items()})
+                    scores = tf.nn.softmax(outputs.logits, axis=-1).numpy()
+            stats['inference'] += time.perf_counter() - start
+            stats['batches'] += 1
+            all_scores.append(scores)
+    finally:
+        stop.set()
+        # Vide la file pour débloquer un put en cours, puis attend la fin du producteur
+        while True:
+            try:
+                batches.get_nowait()
+            except queue.Empty:
+                break
+        worker.join()
+
+    stats['total'] = time.perf_counter() - start_total
+    if errors:
+        raise errors[0]
+    metrics.inc("messages_scored_total", len(texts), engine="finbert")
+
+    return np.concatenate(all_scores, axis=0), stats
+
+
+# La fonction predict_scores_remote envoie les textes au serveur d'inférence partagé (finbert_server.py)
+# et renvoie le même tableau de probabilités que predict_scores, sans charger TensorFlow dans ce processus.
+
+def predict_scores_remote(texts, server_url=None, timeout=300):
+    server_url = (server_url or FINBERT_SERVER_URL).rstrip("/")
+    try:
+        with metrics.span("inference", engine="finbert_remote"):
+            response = requests.post(f"{server_url}/score", json={'texts': list(texts)}, timeout=timeout)
+            response.raise_for_status()
+    except requests.RequestException:
+        metrics.inc("http_errors_total", source="finbert_server")
+        raise
+    metrics.inc("messages_scored_total", len(texts), engine="finbert_remote")
+    return np.array(response.json()['scores'], dtype=np.float32).reshape(-1, 3)
+
+
+# La fonction sentiment_result_from_scores prend le tableau des probabilités (une ligne par message)
+# et construit le dictionnaire de résultat renvoyé par les fonctions d'analyse.
+
+def sentiment_result_from_scores(all_scores):
     # Moyenne des scores
-    aggregated_scores = aggregate_sentiment_scores(all_scores)
+    with metrics.span("aggregation", engine="finbert"):
+        return sentiment_result_from_mean(aggregate_sentiment_scores(all_scores), len(all_scores))
+
 
+# La fonction sentiment_result_from_mean construit ce même dictionnaire à partir des scores moyens
+# (Négatif, Neutre, Positif) et du nombre de messages.
+
+def sentiment_result_from_mean(aggregated_scores, message_count):
     # Score global = Positive - Negative
     # Si le score global est >0, le sentiment global est plutôt positif, s'il est <0, il est plutôt négatif
     global_score = float(aggregated_scores[2] - aggregated_scores[0])
@@ -83,17 +361,105 @@ def analyze_sentiment(texts, batch_size=32):
     }
 
 
+# La fonction score_texts choisit le chemin d'inférence (serveur partagé, pipeline ou boucle simple)
+# et renvoie le tableau des probabilités pour une liste de textes.
+# Avec dedup=True, les quasi-doublons sont regroupés (near_duplicates.py) : seul un représentant par cluster
+# passe dans le modèle et son score est recopié sur chaque message du cluster.
+
+def score_texts(texts, batch_size=32, compiled=False, pipelined=False, queue_depth=2, server_url=None,
+                dedup=False, dedup_threshold=0.8):
+    if dedup:
+        unique_texts, inverse, dedup_ratio = dedup_texts(texts, threshold=dedup_threshold)
+        print(f"🧹 Dedup: {len(texts)} messages → {len(unique_texts)} scored ({dedup_ratio:.1%} suppressed)")
+        unique_scores = score_texts(unique_texts, batch_size=batch_size, compiled=compiled, pipelined=pipelined,
+                                    queue_depth=queue_depth, server_url=server_url)
+        return unique_scores[inverse]
+
+    if server_url or FINBERT_SERVER_URL:
+        return predict_scores_remote(texts, server_url)
+    if pipelined:
+        all_scores, stats = predict_scores_pipelined(texts, batch_size=batch_size,
+                                                     queue_depth=queue_depth, compiled=compiled)
+        print(f"⏱️  Tokenize: {stats['tokenize']:.2f}s | Inference: {stats['inference']:.2f}s | "
+              f"Wait: {stats['wait']:.2f}s | Total: {stats['total']:.2f}s ({stats['batches']} batches)")
+        return all_scores
+    return predict_scores(texts, batch_size=batch_size, compiled=compiled)
+
+
+# La fonction analyse_sentiment prend en paramètre une liste de textes et un batch_size (afin d'éviter un problème de mémoire).
+# Elle renvoie un dictionnaire contenant les scores agrégés pour chaque catégorie de sentiment (Négatif, Neutre, Positif),
+# le score global (Positif - Négatif) et le nombre de messages analysés.
+# Le paramètre compiled active l'inférence compilée par buckets de longueur (voir load_compiled_predict),
+# le paramètre pipelined recouvre tokenization et inférence (voir predict_scores_pipelined),
+# server_url (par défaut la variable d'environnement FINBERT_SERVER_URL) délègue l'inférence au serveur partagé,
+# et dedup ne fait passer qu'un message par cluster de quasi-doublons dans le modèle.
+
+def analyze_sentiment(texts, batch_size=32, compiled=False, pipelined=False, queue_depth=2, server_url=None,
+                      dedup=False):
+
+    # On vérifie que la liste de textes n'est pas vide
+    if not texts:
+        return None
+
+    all_scores = score_texts(texts, batch_size=batch_size, compiled=compiled, pipelined=pipelined,
+                             queue_depth=queue_depth, server_url=server_url, dedup=dedup)
+
+    return sentiment_result_from_scores(all_scores)
+
+
+
+
+# La fonction analyze_sentiment_stream prend un itérable (ou un générateur) de couples (jour, texte)
+# et renvoie une ligne de résultat par jour, triée par date, identique à celle d'analyze_sentiment.
+# Les textes sont scorés par blocs de chunk_size et seules des sommes courantes par jour sont conservées :
+# la mémoire utilisée est en O(nombre de jours + chunk_size), quelle que soit la taille du corpus.
+# Avec dedup=True, la déduplication se fait à l'intérieur de chaque bloc (augmenter chunk_size pour l'élargir).
+
+def analyze_sentiment_stream(records, batch_size=32, chunk_size=256, **score_kwargs):
+    sums = {}
+    counts = {}
+    chunk_days, chunk_texts = [], []
+
+    def flush():
+        scores = score_texts(chunk_texts, batch_size=batch_size, **score_kwargs)
+        for day, row in zip(chunk_days, scores):
+            if day in sums:
+                sums[day] += row
+                counts[day] += 1
+            else:
+                sums[day] = row.astype(np.float64)
+                counts[day] = 1
+        chunk_days.clear()
+        chunk_texts.clear()
+
+    for day, text in records:
+        # Même filtrage que dropna() dans les versions DataFrame
+        if text is None or (isinstance(text, float) and np.isnan(text)):
+            continue
+        chunk_days.append(day)
+        chunk_texts.append(text)
+        if len(chunk_texts) >= chunk_size:
+            flush()
+    if chunk_texts:
+        flush()
+
+    daily_results = []
+    with metrics.span("aggregation", engine="finbert"):
+        for day in sorted(sums):
+            result = sentiment_result_from_mean(sums[day] / counts[day], counts[day])
+            result['analysis_date'] = day
+            daily_results.append(result)
+    return daily_results
 
 
 # La fonction analyze_single_stock prend en paramètre un ticker boursier,
-# elle utilise le RedditStockScraper pour récupérer les messages Reddit liés à ce ticker,
+# elle récupère (via le cache de corpus) les messages Reddit liés à ce ticker,
 # puis elle analyse le sentiment de ces messages jour par jour en utilisant la fonction analyze_sentiment.
 # Elle renvoie un DataFrame contenant les résultats de l'analyse de sentiment pour chaque jour.
 
-def analyze_single_stock(ticker):
-    scraper = RedditStockScraper(days_back=30, max_workers=8)
-
-    df = scraper.search_single_stock(ticker, limit_per_sub=20, time_filter='month')
+def analyze_single_stock(ticker, compiled=False):
+    # Corpus partagé entre les moteurs : scrapé au plus une fois par TTL (voir corpus_cache)
+    df = get_corpus(ticker, sources=('reddit',), days_back=30)
 
     if df.empty:
         print(f"Aucune donnée trouvée pour le ticker {ticker}.")
@@ -105,28 +471,22 @@ def analyze_single_stock(ticker):
     nb_reddit = counts.get('reddit', 0)
     nb_bloomberg = counts.get('bloomberg', 0)
 
-    daily_results = []
-
-    for day, group in df.groupby('created_utc'):
-        texts = group['content'].dropna().tolist()
-        if not texts:
-            continue
-
-        sentiment_result = analyze_sentiment(texts)
-        if sentiment_result is None:
-            continue
+    company_name = df['company_name'].iloc[0] if 'company_name' in df.columns else ticker
 
+    # Un seul passage sur le corpus : les textes de tous les jours partagent les mêmes batches
+    daily_results = []
+    for result in analyze_sentiment_stream(zip(df['created_utc'], df['content']), compiled=compiled):
         daily_results.append({
             'stock_symbol': ticker,
-            'company_name': df['company_name'].iloc[0] if 'company_name' in df.columns else ticker,
-            'Negative': sentiment_result['Negative'],
-            'Neutral': sentiment_result['Neutral'],
-            'Positive': sentiment_result['Positive'],
-            'GlobalScore': sentiment_result['GlobalScore'],
-            'MessageCount': sentiment_result['MessageCount'],
+            'company_name': company_name,
+            'Negative': result['Negative'],
+            'Neutral': result['Neutral'],
+            'Positive': result['Positive'],
+            'GlobalScore': result['GlobalScore'],
+            'MessageCount': result['MessageCount'],
             'NbRedditTot': nb_reddit,
             'NbBloombergTot': nb_bloomberg,
-            'analysis_date': day           
+            'analysis_date': result['analysis_date']
         })
 
     if not daily_results:
@@ -142,8 +502,8 @@ def analyze_single_stock(ticker):
 # elle appelle la fonction analyze_single_stock pour obtenir les résultats de l'analyse de sentiment,
 # puis elle affiche ces résultats ou un message indiquant qu'aucun résultat n'a été trouvé.
 
-def main_analyse_finbert(ticker):
-    result_df = analyze_single_stock(ticker)
+def main_analyse_finbert(ticker, compiled=False):
+    result_df = analyze_single_stock(ticker, compiled=compiled)
     if result_df is not None:
         print(f"Résultats de l'analyse de sentiment pour {ticker} :")
         print(result_df)
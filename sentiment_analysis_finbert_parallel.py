@@ -0,0 +1,166 @@
+import os
+import time
+import math
+import multiprocessing
+import concurrent.futures
+import numpy as np
+
+
+# Scoring FinBERT multi-processus : les messages sont découpés en shards répartis sur N processus.
+# Chaque processus charge le modèle une seule fois (dans l'initializer) avec son propre nombre de threads
+# intra-op, et peut être épinglé sur un sous-ensemble de cœurs pour éviter que les workers se marchent dessus.
+
+# Pool réutilisé d'un appel à l'autre (le chargement du modèle dans chaque worker est coûteux)
+worker_pool = None
+worker_pool_config = None
+
+# État propre à chaque processus worker
+_worker_batch_size = 32
+_worker_compiled = False
+
+
+# La fonction cpu_sets_for_workers découpe les cœurs disponibles en n_workers blocs contigus
+# de threads_per_worker cœurs, utilisés pour épingler chaque worker.
+
+def cpu_sets_for_workers(n_workers, threads_per_worker):
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    sets = []
+    for w in range(n_workers):
+        start = (w * threads_per_worker) % len(cpus)
+        sets.append([cpus[(start + k) % len(cpus)] for k in range(threads_per_worker)])
+    return sets
+
+
+# La fonction init_worker est exécutée une fois au démarrage de chaque processus :
+# épinglage éventuel, configuration du threading TensorFlow (avant toute opération TF), puis chargement du modèle.
+
+def init_worker(threads_per_worker, cpu_sets, worker_counter, batch_size, compiled):
+    global _worker_batch_size, _worker_compiled
+
+    if cpu_sets and hasattr(os, "sched_setaffinity"):
+        with worker_counter.get_lock():
+            index = worker_counter.value
+            worker_counter.value += 1
+        os.sched_setaffinity(0, cpu_sets[index % len(cpu_sets)])
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    import sentiment_analysis_finbert
+    sentiment_analysis_finbert.load_finbert_model(compiled=compiled, batch_size=batch_size)
+
+    _worker_batch_size = batch_size
+    _worker_compiled = compiled
+
+
+def score_shard(shard):
+    import sentiment_analysis_finbert
+    return sentiment_analysis_finbert.predict_scores(shard, batch_size=_worker_batch_size, compiled=_worker_compiled)
+
+
+# La fonction get_worker_pool renvoie le pool de processus correspondant à la configuration demandée,
+# en le recréant seulement si la configuration change.
+
+def get_worker_pool(n_workers, threads_per_worker=None, pin=False, batch_size=32, compiled=False):
+    global worker_pool, worker_pool_config
+
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // n_workers)
+
+    config = (n_workers, threads_per_worker, pin, batch_size, compiled)
+    if worker_pool is not None and worker_pool_config == config:
+        return worker_pool
+
+    shutdown_worker_pool()
+
+    # "spawn" plutôt que "fork" : TensorFlow ne supporte pas d'être forké après initialisation
+    ctx = multiprocessing.get_context("spawn")
+    cpu_sets = cpu_sets_for_workers(n_workers, threads_per_worker) if pin else None
+    worker_pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=ctx,
+        initializer=init_worker,
+        initargs=(threads_per_worker, cpu_sets, ctx.Value('i', 0), batch_size, compiled)
+    )
+    worker_pool_config = config
+    return worker_pool
+
+
+def shutdown_worker_pool():
+    global worker_pool, worker_pool_config
+    if worker_pool is not None:
+        worker_pool.shutdown(wait=True)
+    worker_pool = None
+    worker_pool_config = None
+
+
+# La fonction predict_scores_multiprocess découpe les textes en shards (multiples de batch_size),
+# les envoie aux workers et rassemble les scores dans l'ordre d'origine des messages.
+
+def predict_scores_multiprocess(texts, n_workers=4, threads_per_worker=None, pin=False,
+                                batch_size=32, compiled=False, shards_per_worker=4):
+    pool = get_worker_pool(n_workers, threads_per_worker, pin, batch_size, compiled)
+
+    shard_size = math.ceil(len(texts) / (n_workers * shards_per_worker))
+    shard_size = max(batch_size, math.ceil(shard_size / batch_size) * batch_size)
+    shards = [texts[i:i+shard_size] for i in range(0, len(texts), shard_size)]
+
+    # executor.map renvoie les résultats dans l'ordre de soumission
+    return np.concatenate(list(pool.map(score_shard, shards)), axis=0)
+
+
+# La fonction analyze_sentiment_multiprocess renvoie le même dictionnaire que analyze_sentiment,
+# mais en répartissant l'inférence sur plusieurs processus.
+
+def analyze_sentiment_multiprocess(texts, n_workers=4, threads_per_worker=None, pin=False,
+                                   batch_size=32, compiled=False):
+    if not texts:
+        return None
+
+    from sentiment_analysis_finbert import sentiment_result_from_scores
+
+    all_scores = predict_scores_multiprocess(texts, n_workers=n_workers, threads_per_worker=threads_per_worker,
+                                             pin=pin, batch_size=batch_size, compiled=compiled)
+    return sentiment_result_from_scores(all_scores)
+
+
+# La fonction benchmark_scaling mesure le débit (messages/s) pour différents nombres de workers.
+# Le temps de démarrage du pool (chargement du modèle) est exclu grâce à un premier appel de chauffe.
+
+def benchmark_scaling(texts, worker_counts=(1, 2, 4, 8), pin=True, batch_size=32):
+    results = []
+    cpu_count = os.cpu_count() or 1
+
+    for n_workers in worker_counts:
+        threads_per_worker = max(1, cpu_count // n_workers)
+        predict_scores_multiprocess(texts[:batch_size * n_workers], n_workers=n_workers,
+                                    threads_per_worker=threads_per_worker, pin=pin, batch_size=batch_size)
+
+        start = time.perf_counter()
+        predict_scores_multiprocess(texts, n_workers=n_workers, threads_per_worker=threads_per_worker,
+                                    pin=pin, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            'workers': n_workers,
+            'threads_per_worker': threads_per_worker,
+            'seconds': elapsed,
+            'messages_per_sec': len(texts) / elapsed
+        })
+        print(f"⏱️  {n_workers} worker(s) x {threads_per_worker} thread(s): "
+              f"{elapsed:.2f}s, {len(texts) / elapsed:.1f} messages/s")
+
+    shutdown_worker_pool()
+    return results
+
+
+if __name__ == "__main__":
+    sample = [
+        "Apple shares rallied after strong iPhone sales beat expectations.",
+        "Tesla stock fell sharply as deliveries missed analyst estimates.",
+        "Microsoft announced a new cloud partnership, investors remain cautious.",
+        "NVIDIA guidance was in line with the market consensus.",
+    ]
+    texts = sample * 512
+    benchmark_scaling(texts)
@@ -0,0 +1,271 @@
+import re
+import time
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+
+# Moteur lexical vectorisé : même lexique et mêmes règles que TextBlob (PatternAnalyzer),
+# mais le lexique est chargé une fois dans des tableaux numpy, tous les messages d'un batch sont
+# tokenizés d'un coup et les règles (modificateurs/intensifieurs, négations, points d'exclamation,
+# émoticônes) sont appliquées sur le tableau plat de tous les tokens, sans boucle Python par mot.
+#
+# Tolérance par rapport à analyze_sentiment_textblob (mesurée avec compare_with_textblob, 20 000 messages) :
+#   - messages Reddit synthétiques, et phrases tirées au hasard parmi modificateurs, négations, émoticônes,
+#     "!", ponctuation et majuscules ("honestly!!! :( not bad") : polarités identiques (écart < 1e-9)
+#   - texte aléatoire tiré de tout le lexique (cas le plus défavorable) : environ 99.2 % de polarités
+#     identiques, écart absolu moyen 0.001 mais jusqu'à 1.0 sur un message, signe inversé pour environ
+#     0.2 % des messages. Ces écarts viennent du découpage en tokens (TextBlob garde "f*cking", "o_o"
+#     ou ">:d" entiers), pas des règles.
+# Débit : x7 à x15 par rapport à TextBlob sur 1 CPU selon la longueur des messages (x7.4 sur
+# synthetic_data.reddit_messages, x14 à x16 sur les phrases courtes de __main__).
+
+NEGATIONS = ("no", "not", "n't", "never")
+
+# Mots : lettres/chiffres avec tirets ou points internes (e-mail, u.s) ; sinon un caractère isolé.
+# L'apostrophe est toujours isolée, comme dans find_tokens de TextBlob ("don't" -> do n ' t).
+WORD_PATTERN = r"[^\W_]+(?:[-.][^\W_]+)*"
+SARCASM_PATTERN = r"\( ?! ?\)"
+
+# Tableaux du lexique, chargés une seule fois par processus (voir load_lexicon)
+lexicon = None
+
+
+# La fonction load_lexicon lit le lexique de pattern (via TextBlob) et le convertit en tableaux :
+# polarité, intensité et drapeau "modificateur" (adverbe) par identifiant de mot.
+# Les émoticônes sont ajoutées au vocabulaire avec leur polarité.
+
+def load_lexicon():
+    global lexicon
+    if lexicon is not None:
+        return lexicon
+
+    from textblob.en import sentiment as pattern_sentiment
+    from textblob._text import EMOTICONS
+
+    words = [w for w in pattern_sentiment if ' ' not in w]
+    word_ids = {w: i for i, w in enumerate(words)}
+    polarity = np.array([pattern_sentiment[w][None][0] for w in words], dtype=np.float64)
+    intensity = np.array([pattern_sentiment[w][None][2] for w in words], dtype=np.float64)
+    is_modifier = np.array(["RB" in pattern_sentiment[w] for w in words], dtype=bool)
+
+    # Comme TextBlob, seules les émoticônes non alphabétiques sont reconnues ("xd" est un mot).
+    # Le découpage respecte la casse (";D" est une émoticône, ";d" deux tokens), la polarité est
+    # ensuite cherchée sur le token en minuscules.
+    emoticons, forms_seen = {}, {}
+    for (_, emoticon_polarity), forms in EMOTICONS.items():
+        for form in forms:
+            if not form.lower().isalpha():
+                emoticons[form.lower()] = emoticon_polarity
+                forms_seen[form] = True
+    emoticons["(!)"] = 0.0
+    forms_seen["(!)"] = True
+
+    # Les mots sont essayés avant les émoticônes (cas le plus fréquent) ; seules les quelques émoticônes
+    # qui commencent par une lettre ou un chiffre ("8-)", "o.o") doivent passer avant les mots.
+    def alternation(forms):
+        return "|".join(re.escape(e) for e in sorted(forms, key=len, reverse=True))
+
+    alnum_start = [e for e in forms_seen if e[0].isalnum()]
+    other_start = [e for e in forms_seen if not e[0].isalnum()]
+    token_re = re.compile(
+        rf"(?:{alternation(alnum_start)})(?=\s|$)|{WORD_PATTERN}"
+        rf"|{SARCASM_PATTERN}|(?:{alternation(other_start)})(?=\s|$)|\.\.\.|\S"
+    )
+
+    lexicon = {
+        'word_ids': word_ids,
+        'polarity': polarity,
+        'intensity': intensity,
+        'is_modifier': is_modifier,
+        'emoticons': emoticons,
+        'token_re': token_re
+    }
+    return lexicon
+
+
+# La fonction tokenize_batch tokenize tous les textes et renvoie le tableau plat des tokens (catégoriel)
+# et l'indice du message auquel appartient chaque token.
+
+def tokenize_batch(texts, token_re):
+    # Comme TextBlob, "n't" (en minuscules seulement) est détaché avant le découpage : "isn't" -> is n ' t
+    token_lists = [token_re.findall(str(t).replace("n't", " n't")) for t in texts]
+    lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+    doc_ids = np.repeat(np.arange(len(texts)), lengths)
+    codes, uniques = pd.factorize(pd.Series(list(chain.from_iterable(token_lists)), dtype=object))
+    # Tokens mis en minuscules après le découpage, une fois par token distinct
+    lowered_codes, lowered = pd.factorize(pd.Series([u.lower() for u in uniques], dtype=object))
+    return lowered_codes[codes] if len(codes) else codes, lowered, doc_ids
+
+
+def last_index_where(mask):
+    """For each position k, index of the last position <= k where mask is True (-1 if none)"""
+    idx = np.where(mask, np.arange(len(mask)), -1)
+    return np.maximum.accumulate(idx) if len(idx) else idx
+
+
+def previous_index_where(mask):
+    """For each position k, index of the last position < k where mask is True (-1 if none)"""
+    last = last_index_where(mask)
+    return np.concatenate(([-1], last[:-1])) if len(last) else last
+
+
+# La fonction lexicon_polarities renvoie la polarité de chaque texte (entre -1 et 1), comme
+# TextBlob(texte).sentiment.polarity, calculée pour tout le batch avec des opérations numpy.
+
+def lexicon_polarities(texts):
+    lex = load_lexicon()
+    n_docs = len(texts)
+    if n_docs == 0:
+        return np.zeros(0)
+
+    codes, uniques, doc_ids = tokenize_batch(texts, lex['token_re'])
+    if len(codes) == 0:
+        return np.zeros(n_docs)
+
+    # Attributs des tokens distincts (une seule recherche dictionnaire par token distinct), puis diffusion
+    unique_word_id = np.array([lex['word_ids'].get(u, -1) for u in uniques], dtype=np.int64)
+    unique_emoticon = np.array([lex['emoticons'].get(u, np.nan) for u in uniques], dtype=np.float64)
+    unique_len = np.array([len(u) for u in uniques], dtype=np.int64)
+    unique_strip_len = np.array([len(u.strip("'")) for u in uniques], dtype=np.int64)
+    unique_ly = np.array([u.endswith("ly") for u in uniques], dtype=bool)
+    unique_neg = np.array([u in NEGATIONS for u in uniques], dtype=bool)
+    unique_excl = np.array([u == "!" for u in uniques], dtype=bool)
+
+    word_id = unique_word_id[codes]
+    known = word_id >= 0
+    safe_id = np.where(known, word_id, 0)
+    polarity = np.where(known, lex['polarity'][safe_id], 0.0)
+    intensity = np.where(known, lex['intensity'][safe_id], 1.0)
+    is_mod = known & lex['is_modifier'][safe_id]
+    emoticon = ~known & ~np.isnan(unique_emoticon[codes])
+    token_len = unique_len[codes]
+    is_neg = ~known & unique_neg[codes]
+    is_ly = unique_ly[codes]
+    is_excl = unique_excl[codes]
+
+    positions = np.arange(len(codes))
+    doc_start = np.searchsorted(doc_ids, doc_ids, side='left')
+
+    def in_doc(index):
+        return index >= doc_start
+
+    # Négation en attente : dernier "événement" avant k qui soit une négation.
+    # Un mot connu ou un mot inconnu de plus d'une lettre (hors négation) annule la négation.
+    resets_negation = known | emoticon | (~is_neg & (unique_strip_len[codes] > 1))
+    last_event = previous_index_where(resets_negation | is_neg)
+    pending_neg = in_doc(last_event) & is_neg[np.maximum(last_event, 0)]
+
+    # Le modificateur en attente est conservé à travers les petits mots inconnus (<= 2 caractères),
+    # y compris les émoticônes courtes (":)") qui créent pourtant leur propre assessment
+    transparent = ~known & (token_len <= 2)
+    prev_sig = previous_index_where(~transparent)
+    ps = np.maximum(prev_sig, 0)
+
+    # "really not good" : une négation qui suit un modificateur en -ly est absorbée par l'assessment
+    # du modificateur (qui devient négatif) et ne coupe pas la chaîne ("really never never good" aussi)
+    neg_after_ly = np.zeros(len(codes), dtype=bool)
+    while True:
+        found = is_neg & in_doc(prev_sig) & is_mod[ps] & is_ly[ps]
+        if np.array_equal(found, neg_after_ly):
+            break
+        neg_after_ly = found
+        prev_sig = previous_index_where(~(transparent | neg_after_ly))
+        ps = np.maximum(prev_sig, 0)
+    pending_neg &= ~neg_after_ly[np.maximum(last_event, 0)]
+
+    # Fusion : un mot connu précédé d'un modificateur prolonge le dernier assessment, c'est-à-dire celui
+    # du modificateur, ou celui d'une émoticône courte placée entre les deux (intensité 1.0)
+    scored = known | emoticon
+    last_scored = previous_index_where(scored)
+    merged = known & in_doc(prev_sig) & is_mod[ps]
+    negated_at = known & pending_neg
+    effective_intensity = np.where(negated_at, 1.0 / intensity, intensity)
+    merge_intensity = np.where(last_scored > prev_sig, 1.0, effective_intensity[ps])
+    value = np.where(merged, np.clip(polarity * merge_intensity, -1.0, 1.0), polarity)
+
+    # Une chaîne (assessment) commence à chaque mot connu non fusionné et à chaque émoticône
+    starts = scored & ~merged
+    chain_id = np.cumsum(starts) - 1
+    n_chains = int(starts.sum())
+    value = np.where(emoticon, unique_emoticon[codes], value)
+
+    # Valeur finale d'une chaîne = valeur de son dernier mot
+    next_scored = np.full(len(codes), -1)
+    scored_pos = positions[scored]
+    next_scored[scored_pos[:-1]] = scored_pos[1:]
+    is_last = scored & ~((next_scored >= 0) & merged[np.maximum(next_scored, 0)])
+    chain_value = np.zeros(n_chains)
+    chain_value[chain_id[is_last]] = value[is_last]
+    chain_doc = doc_ids[starts]
+
+    chain_negated = np.zeros(n_chains, dtype=bool)
+    chain_negated[chain_id[negated_at]] = True
+    # Comme dans TextBlob, la négation absorbée porte sur le dernier assessment (a[-1]) : celui du
+    # modificateur, ou celui d'une émoticône placée entre les deux ("honestly :( not bad")
+    chain_negated[chain_id[last_scored[neg_after_ly]]] = True
+
+    # Chaque "!" renforce (x1.25) le dernier assessment du message, sauf si un mot fusionné le remplace ensuite
+    boosted = is_excl & in_doc(last_scored) & is_last[np.maximum(last_scored, 0)]
+    boosts = np.bincount(chain_id[last_scored[boosted]], minlength=n_chains)
+    chain_value = np.clip(chain_value * 1.25 ** boosts, -1.0, 1.0)
+
+    # "not good" = légèrement négatif, "not bad" = légèrement positif
+    chain_value = np.where(chain_negated, chain_value * -0.5, chain_value)
+
+    totals = np.bincount(chain_doc, weights=chain_value, minlength=n_docs)
+    counts = np.bincount(chain_doc, minlength=n_docs)
+    return totals / np.maximum(counts, 1)
+
+
+def analyze_sentiment_lexicon(texts):
+    if not texts:
+        return None
+
+    polarities = lexicon_polarities(list(texts))
+
+    return {
+        'GlobalScore': float(np.mean(polarities)),
+        'MessageCount': len(polarities)
+    }
+
+
+# La fonction compare_with_textblob mesure l'écart avec TextBlob et le gain de débit sur une liste de textes.
+
+def compare_with_textblob(texts):
+    from textblob import TextBlob
+
+    start = time.perf_counter()
+    reference = np.array([TextBlob(str(t)).sentiment.polarity for t in texts])
+    textblob_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    polarities = lexicon_polarities(texts)
+    lexicon_time = time.perf_counter() - start
+
+    diff = np.abs(polarities - reference)
+    result = {
+        'exact_match_rate': float(np.mean(diff < 1e-9)),
+        'mean_abs_diff': float(diff.mean()),
+        'max_abs_diff': float(diff.max()),
+        'mean_score_diff': float(abs(polarities.mean() - reference.mean())),
+        'textblob_messages_per_sec': len(texts) / textblob_time,
+        'lexicon_messages_per_sec': len(texts) / lexicon_time,
+        'speedup': textblob_time / lexicon_time
+    }
+    print(f"⏱️  TextBlob: {result['textblob_messages_per_sec']:.0f} msg/s | "
+          f"Lexicon: {result['lexicon_messages_per_sec']:.0f} msg/s (x{result['speedup']:.1f}) | "
+          f"exact: {result['exact_match_rate']:.1%}, mean |diff|: {result['mean_abs_diff']:.4f}")
+    return result
+
+
+if __name__ == "__main__":
+    sample = [
+        "Apple shares rallied after really strong iPhone sales, great quarter!",
+        "Tesla stock fell sharply, deliveries were not good at all.",
+        "Microsoft announced a new cloud partnership, investors remain cautious :)",
+        "NVIDIA guidance was in line with the market consensus.",
+        "I don't think this is a very bad entry point, honestly!!",
+    ]
+    compare_with_textblob([f"{t} #{i}" for i in range(4000) for t in sample])
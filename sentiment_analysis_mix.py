@@ -1,12 +1,19 @@
 import pandas as pd
-from sentiment_analysis_finbert import analyze_sentiment, load_finbert_model
-from sentiment_analysis_textblob import analyze_sentiment_textblob
-from reddit_scraper_quick import RedditStockScraper
+import concurrent.futures
+from sentiment_analysis_finbert import analyze_sentiment_stream, load_finbert_model
+from sentiment_analysis_textblob import analyze_sentiment_textblob_stream
+from corpus_cache import get_corpus
 
-def analyze_single_stock_mixed(ticker):
+# La fonction analyze_single_stock_mixed analyse les messages Reddit avec TextBlob et les articles Bloomberg avec FinBERT.
+# Le corpus est découpé par source en un seul passage, puis les deux moteurs tournent en parallèle,
+# chacun sur toute sa tranche (batches complets), et les agrégats journaliers sont joints à la fin :
+# la latence est celle du moteur le plus lent, et non la somme des appels jour par jour.
 
-    scraper = RedditStockScraper(days_back=30, max_workers=8)
-    df = scraper.search_single_stock(ticker, limit_per_sub=20, time_filter='month')
+def analyze_single_stock_mixed(ticker, sources=('reddit', 'bloomberg')):
+
+    # Corpus partagé entre les moteurs : scrapé au plus une fois par TTL (voir corpus_cache).
+    # sources=('reddit',) évite le scraping Bloomberg (navigateur Playwright) : la branche FinBERT est alors vide.
+    df = get_corpus(ticker, sources=sources, days_back=30)
 
     if df.empty:
         print(f"Aucune donnée trouvée pour le ticker {ticker}.")
@@ -14,29 +21,39 @@ def analyze_single_stock_mixed(ticker):
 
     df['created_utc'] = pd.to_datetime(df['created_utc']).dt.date
 
-    counts = df['source'].value_counts()
-    nb_reddit = counts.get('Reddit', 0)
-    nb_bloomberg = counts.get('Bloomberg', 0)
+    # Les scrapers écrivent la source en minuscules ('reddit', 'bloomberg')
+    source_column = df['source'].str.lower()
+    counts = source_column.value_counts()
+    nb_reddit = counts.get('reddit', 0)
+    nb_bloomberg = counts.get('bloomberg', 0)
+
+    slices = {source: part for source, part in df.groupby(source_column)}
+    reddit_df = slices.get('reddit', df.iloc[0:0])
+    bloomberg_df = slices.get('bloomberg', df.iloc[0:0])
+
+    # TextBlob (CPU, Python) et FinBERT (TensorFlow, libère le GIL) tournent en même temps
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        reddit_future = executor.submit(
+            analyze_sentiment_textblob_stream, zip(reddit_df['created_utc'], reddit_df['content'])
+        )
+        bloomberg_future = executor.submit(
+            analyze_sentiment_stream, zip(bloomberg_df['created_utc'], bloomberg_df['content'])
+        )
+        reddit_daily = {r['analysis_date']: r for r in reddit_future.result()}
+        bloomberg_daily = {r['analysis_date']: r for r in bloomberg_future.result()}
+
+    company_name = df['company_name'].iloc[0] if 'company_name' in df.columns else ticker
 
     daily_results = []
 
-    for day, group in df.groupby('created_utc'):
-        texts_reddit = group[group['source'] == 'Reddit']['content'].dropna().tolist()
-        texts_bloomberg = group[group['source'] == 'Bloomberg']['content'].dropna().tolist()
-
-        # Analyse Reddit avec TextBlob
-        reddit_result = analyze_sentiment_textblob(texts_reddit) if texts_reddit else None
-        # Analyse Bloomberg avec FinBERT
-        bloomberg_result = analyze_sentiment(texts_bloomberg) if texts_bloomberg else None
-
-        # Si aucune donnée n'est disponible pour cette journée, on passe
-        if not reddit_result and not bloomberg_result:
-            continue
+    for day in sorted(set(reddit_daily) | set(bloomberg_daily)):
+        reddit_result = reddit_daily.get(day)
+        bloomberg_result = bloomberg_daily.get(day)
 
         # Création de la ligne de résultat en combinant les deux sources
         result_row = {
             'stock_symbol': ticker,
-            'company_name': df['company_name'].iloc[0] if 'company_name' in df.columns else ticker,
+            'company_name': company_name,
             'NbRedditTot': nb_reddit,
             'NbBloombergTot': nb_bloomberg,
             'analysis_date': day
@@ -81,8 +98,8 @@ def analyze_single_stock_mixed(ticker):
     return pd.DataFrame(daily_results)
 
 
-def main_analyse_mixed(ticker):
-    result_df = analyze_single_stock_mixed(ticker)
+def main_analyse_mixed(ticker, sources=('reddit', 'bloomberg')):
+    result_df = analyze_single_stock_mixed(ticker, sources)
     if result_df is not None:
         print(f"Résultats de l'analyse mixte pour {ticker} :")
         print(result_df)
@@ -1,19 +1,84 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
+import time
+import multiprocessing
+import concurrent.futures
+from itertools import chain
 from textblob import TextBlob
 
-from reddit_scraper_quick import RedditStockScraper
+from corpus_cache import get_corpus
+from sentiment_analysis_lexicon import lexicon_polarities
+import metrics
 
-def analyze_sentiment_textblob(texts):
+# Moteur du mode rapide : "textblob" (référence) ou "lexicon" (même lexique et mêmes règles,
+# vectorisé avec numpy dans sentiment_analysis_lexicon, environ 15x plus rapide)
+FAST_SENTIMENT_ENGINE = os.getenv("FAST_SENTIMENT_ENGINE", "textblob")
+
+# Moteur TextBlob parallèle : TextBlob est du pur Python (le GIL empêche les threads d'aider),
+# on découpe donc les messages en chunks répartis sur un pool de processus.
+# En dessous de PARALLEL_MIN_MESSAGES, le coût d'envoi aux workers dépasse le gain : on reste en série.
+PARALLEL_MIN_MESSAGES = 2000
+
+# Pool réutilisé d'un appel à l'autre (chaque worker charge le lexique une seule fois)
+textblob_pool = None
+textblob_pool_workers = None
+
+
+def init_textblob_worker():
+    # Force le chargement paresseux du lexique de pattern une fois pour toutes dans ce processus
+    TextBlob("warm up").sentiment
+
+
+def textblob_polarity_chunk(chunk):
+    return [TextBlob(str(t)).sentiment.polarity for t in chunk]
+
+
+def get_textblob_pool(n_workers):
+    global textblob_pool, textblob_pool_workers
+    if textblob_pool is None or textblob_pool_workers != n_workers:
+        if textblob_pool is not None:
+            textblob_pool.shutdown(wait=True)
+        textblob_pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_textblob_worker
+        )
+        textblob_pool_workers = n_workers
+    return textblob_pool
+
+
+# La fonction textblob_polarities renvoie la polarité de chaque texte, dans l'ordre.
+# Avec n_workers > 1 et assez de messages, le calcul est réparti sur un pool de processus ;
+# chaque chunk est calculé par la même fonction qu'en série, les résultats sont donc identiques.
+
+def textblob_polarities(texts, n_workers=1, chunk_size=500, min_parallel=PARALLEL_MIN_MESSAGES, engine=None):
+    engine = engine or FAST_SENTIMENT_ENGINE
+    metrics.inc("messages_scored_total", len(texts), engine=engine)
+    with metrics.span("inference", engine=engine):
+        if engine == "lexicon":
+            return lexicon_polarities(texts).tolist()
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        if n_workers <= 1 or len(texts) < min_parallel:
+            return textblob_polarity_chunk(texts)
+
+        chunks = [texts[i:i+chunk_size] for i in range(0, len(texts), chunk_size)]
+        pool = get_textblob_pool(n_workers)
+        return list(chain.from_iterable(pool.map(textblob_polarity_chunk, chunks)))
+
+
+def analyze_sentiment_textblob(texts, n_workers=1, engine=None):
     if not texts:
         return None
 
-    polarities = [TextBlob(str(t)).sentiment.polarity for t in texts]
+    polarities = textblob_polarities(list(texts), n_workers=n_workers, engine=engine)
     message_count = len(polarities)
 
     # Score global = moyenne des polarités
-    global_score = float(np.mean(polarities))
+    with metrics.span("aggregation", engine=engine or FAST_SENTIMENT_ENGINE):
+        global_score = float(np.mean(polarities))
 
     return {
         'GlobalScore': global_score,
@@ -21,10 +86,49 @@ def analyze_sentiment_textblob(texts):
     }
 
 
+# La fonction analyze_sentiment_textblob_stream prend un itérable (ou un générateur) de couples (jour, texte)
+# et renvoie une ligne de résultat par jour (GlobalScore, MessageCount, analysis_date), triée par date.
+# Seules une somme et un compteur par jour (et un bloc de chunk_size textes) sont gardés en mémoire,
+# quel que soit le nombre de messages ; chaque bloc peut être scoré en parallèle (n_workers).
+
+def analyze_sentiment_textblob_stream(records, n_workers=1, chunk_size=20000, engine=None):
+    sums = {}
+    counts = {}
+    chunk_days, chunk_texts = [], []
+
+    def flush():
+        for day, polarity in zip(chunk_days, textblob_polarities(chunk_texts, n_workers=n_workers, engine=engine)):
+            sums[day] = sums.get(day, 0.0) + polarity
+            counts[day] = counts.get(day, 0) + 1
+        chunk_days.clear()
+        chunk_texts.clear()
+
+    for day, text in records:
+        # Même filtrage que dropna() dans les versions DataFrame
+        if text is None or (isinstance(text, float) and np.isnan(text)):
+            continue
+        chunk_days.append(day)
+        chunk_texts.append(text)
+        if len(chunk_texts) >= chunk_size:
+            flush()
+    if chunk_texts:
+        flush()
+
+    with metrics.span("aggregation", engine=engine or FAST_SENTIMENT_ENGINE):
+        return [
+            {
+                'GlobalScore': float(sums[day] / counts[day]),
+                'MessageCount': counts[day],
+                'analysis_date': day
+            }
+            for day in sorted(sums)
+        ]
+
+
 
-def analyze_single_stock_textblob(ticker):
-    scraper = RedditStockScraper(days_back=30, max_workers=8)
-    df = scraper.search_single_stock(ticker, limit_per_sub=20, time_filter='month')
+def analyze_single_stock_textblob(ticker, engine=None):
+    # Corpus partagé entre les moteurs : scrapé au plus une fois par TTL (voir corpus_cache)
+    df = get_corpus(ticker, sources=('reddit',), days_back=30)
 
     if df.empty:
         print(f"Aucune donnée trouvée pour le ticker {ticker}.")
@@ -36,25 +140,18 @@ def analyze_single_stock_textblob(ticker):
     nb_reddit = counts.get('reddit', 0)
     nb_bloomberg = counts.get('bloomberg', 0)
 
-    daily_results = []
-
-    for day, group in df.groupby('created_utc'):
-        texts = group['content'].dropna().tolist()
-        if not texts:
-            continue
-
-        sentiment_result = analyze_sentiment_textblob(texts)
-        if sentiment_result is None:
-            continue
+    company_name = df['company_name'].iloc[0] if 'company_name' in df.columns else ticker
 
+    daily_results = []
+    for result in analyze_sentiment_textblob_stream(zip(df['created_utc'], df['content']), engine=engine):
         daily_results.append({
             'stock_symbol': ticker,
-            'company_name': df['company_name'].iloc[0] if 'company_name' in df.columns else ticker,
-            'GlobalScore': sentiment_result['GlobalScore'],
-            'MessageCount': sentiment_result['MessageCount'],
+            'company_name': company_name,
+            'GlobalScore': result['GlobalScore'],
+            'MessageCount': result['MessageCount'],
             'NbRedditTot': nb_reddit,
             'NbBloombergTot': nb_bloomberg,
-            'analysis_date': day           
+            'analysis_date': result['analysis_date']
         })
 
     if not daily_results:
@@ -67,8 +164,8 @@ def analyze_single_stock_textblob(ticker):
 
 
 
-def main_analyse_textblob(ticker):
-    result_df = analyze_single_stock_textblob(ticker)
+def main_analyse_textblob(ticker, engine=None):
+    result_df = analyze_single_stock_textblob(ticker, engine=engine)
     if result_df is not None:
         print(f"Résultats de l'analyse de sentiment TextBlob pour {ticker} :")
         print(result_df)
@@ -77,6 +174,43 @@ def main_analyse_textblob(ticker):
         print(f"Aucun résultat d'analyse de sentiment TextBlob pour {ticker}.")
         return None
 
+# La fonction benchmark_textblob_scaling mesure le débit (messages/s) du moteur TextBlob
+# pour différents nombres de processus, et vérifie que les résultats sont identiques au calcul en série.
+
+def benchmark_textblob_scaling(texts, worker_counts=(1, 2, 4, 8)):
+    reference = textblob_polarity_chunk(texts)
+    results = []
+
+    for n_workers in worker_counts:
+        if n_workers > 1:
+            # Démarrage du pool et chargement du lexique hors chronomètre
+            textblob_polarities(texts[:PARALLEL_MIN_MESSAGES], n_workers=n_workers)
+
+        start = time.perf_counter()
+        polarities = textblob_polarities(texts, n_workers=n_workers)
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            'workers': n_workers,
+            'seconds': elapsed,
+            'messages_per_sec': len(texts) / elapsed,
+            'identical': polarities == reference
+        })
+        print(f"⏱️  {n_workers} worker(s): {elapsed:.2f}s, {len(texts) / elapsed:.0f} messages/s, "
+              f"identical to serial: {polarities == reference}")
+
+    return results
+
+
 if __name__ == "__main__":
-    ticker = "AAPL"
-    main_analyse_textblob(ticker)
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "benchmark":
+        sample = [
+            "Apple shares rallied after really strong iPhone sales, great quarter!",
+            "Tesla stock fell sharply, deliveries were not good at all.",
+            "Microsoft announced a new cloud partnership, investors remain cautious.",
+            "NVIDIA guidance was in line with the market consensus.",
+        ]
+        benchmark_textblob_scaling([f"{t} #{i}" for i in range(10000) for t in sample])
+    else:
+        ticker = "AAPL"
+        main_analyse_textblob(ticker)
\ No newline at end of file
@@ -1,55 +1,50 @@
-import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta
+
+from stock_data.price_cache import get_ohlcv_many, pct_change_from_bars, window_bounds
+from stock_keywords import STOCK_KEYWORDS
 
 def get_pct_change_df(
-    tickers,
+    tickers=None,
     days_back=30,
-    include_today=True
+    include_today=True,
+    provider=None
 ):
     """
-    Télécharge les données boursières pour un ticker via yfinance,
-    calcule le % d'évolution journalière ((Close - Open) / Open) * 100,
-    et retourne un DataFrame avec ces données pour chaque ticker.
+    Calcule le % d'évolution journalière ((Close - Open) / Open) * 100 d'un ou plusieurs tickers
+    à partir du cache local des prix (stock_data/price_cache.py) : les jours manquants de tout l'univers
+    sont téléchargés en un seul appel groupé au fournisseur (par lots), et le calcul est fait en une fois
+    sur le DataFrame (ticker, champ).
 
     Args:
-        tickers (str): Symbole boursier à télécharger.
+        tickers (str | list | None): Symbole(s) boursier(s) ; None pour tout l'univers STOCK_KEYWORDS.
         days_back (int): Nombre de jours à remonter dans le passé.
-        include_today (bool): Si True, la période s’arrête à aujourd’hui.
+        include_today (bool): Si True, la période s’arrête à aujourd’hui (barre du jour provisoire).
+        provider (str | MarketDataProvider | None): Fournisseur de barres (stock_data/providers.py) ;
+            None pour MARKET_DATA_PROVIDER (yfinance par défaut).
 
     Returns:
-        pd.DataFrame: DataFrame avec les dates en index et le ticker en colonnes.
+        pd.DataFrame: DataFrame avec les dates en index et les tickers en colonnes.
     """
+    if tickers is None:
+        tickers = list(STOCK_KEYWORDS.keys())
+    elif isinstance(tickers, str):
+        tickers = [tickers]
+
     # Gestion dynamique des dates
-    end_date = datetime.now()
-    if not include_today:
-        end_date -= timedelta(days=1)
-    start_date = end_date - timedelta(days=days_back)
-    start_date_str = start_date.strftime('%Y-%m-%d')
-    end_date_str = end_date.strftime('%Y-%m-%d')
-
-    print(f"\n📅 Période : {start_date_str} → {end_date_str}")
+    start_date, end_date = window_bounds(days_back, include_today)
+
+    print(f"\n📅 Période : {start_date} → {end_date}")
     print(f"📈 Tickers : {tickers}\n")
 
-    # Téléchargement groupé
-    data = yf.download(
-        tickers,
-        start=start_date_str,
-        end=end_date_str,
-        group_by='ticker',
-        auto_adjust=True
-    )
-
-    pct_changes = {}
-    if tickers in data:
-        df = data[tickers]
-        pct_change = ((df["Close"] - df["Open"]) / df["Open"]) * 100
-        pct_changes[tickers] = pct_change
-    else:
-        print(f"⚠️ Pas de données pour {tickers}")
-
-    df_pct_change = pd.DataFrame(pct_changes).sort_index()
-    return df_pct_change
+    bars = get_ohlcv_many(tickers, start_date, end_date, provider=provider)
+
+    df_pct_change = pct_change_from_bars(bars).dropna(axis=1, how="all")
+    for ticker in tickers:
+        if ticker not in df_pct_change.columns:
+            print(f"⚠️ Pas de données pour {ticker}")
+
+    df_pct_change.columns.name = None
+    return df_pct_change.sort_index()
 
 # --- TEST DE LA FONCTION ---
 if __name__ == "__main__":
@@ -1,47 +1,39 @@
-import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta
+
+from stock_data.price_cache import get_ohlcv_many, window_bounds
 
 
 
 def get_stock_data(
     tickers,
     days_back=30,
-    include_today=True
+    include_today=True,
+    provider=None
 ):
     """
-    Télécharge les données boursières pour une liste de tickers via yfinance.
+    Renvoie les données boursières d'un ou plusieurs tickers, servies par le cache local des prix
+    (stock_data/price_cache.py) : seuls les jours manquants sont téléchargés auprès du fournisseur,
+    en un appel groupé pour tous les tickers.
     
     Args:
-        tickers (str): Symbole boursier à télécharger.
+        tickers (str | list): Symbole(s) boursier(s) à télécharger.
         days_back (int): Nombre de jours à remonter dans le passé.
-        include_today (bool): Si True, la période s’arrête à aujourd’hui.
+        include_today (bool): Si True, la période s’arrête à aujourd’hui (barre du jour provisoire).
+        provider (str | MarketDataProvider | None): Fournisseur de barres (stock_data/providers.py) ;
+            None pour MARKET_DATA_PROVIDER (yfinance par défaut).
     
     Returns:
         pd.DataFrame: Données boursières groupées par ticker.
     """
     
     # Gestion dynamique des dates
-    end_date = datetime.now()
-    if not include_today:
-        end_date -= timedelta(days=1)
-    
-    start_date = end_date - timedelta(days=days_back)
-    
-    start_date_str = start_date.strftime('%Y-%m-%d')
-    end_date_str = end_date.strftime('%Y-%m-%d')
+    start_date, end_date = window_bounds(days_back, include_today)
     
-    print(f"\n📅 Période : {start_date_str} → {end_date_str}")
+    print(f"\n📅 Période : {start_date} → {end_date}")
     print(f"📈 Tickers : {tickers}\n")
     
-    # Téléchargement via yfinance
-    data = yf.download(
-        tickers,
-        start=start_date_str,
-        end=end_date_str,
-        group_by='ticker',
-        auto_adjust=True
-    )
+    # Même forme que yf.download(..., group_by='ticker') : colonnes (ticker, champ)
+    data = get_ohlcv_many([tickers] if isinstance(tickers, str) else tickers, start_date, end_date, provider=provider)
     
     return data
 
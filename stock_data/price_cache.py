@@ -0,0 +1,247 @@
+import os
+import json
+import time
+import uuid
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import metrics
+from stock_data.providers import empty_bars, get_provider, select_range
+
+
+# Cache local des barres OHLCV journalières, par fournisseur (stock_data/providers.py), ticker et date :
+#   price_cache/<provider>/<ticker>.parquet   barres (index Date, colonnes Open, High, Low, Close, Volume)
+#   price_cache/<provider>/<ticker>.json      plage de dates déjà téléchargée ("start", "end"), date du dernier
+#                                             rafraîchissement de la barre du jour ("provisional_at") et plages
+#                                             passées revenues vides une fois, à confirmer ("empty_ranges")
+# Les barres intraday (interval "15m", "1h") sont rangées de la même façon sous price_cache/<provider>/<interval>/.
+#
+# Seules les plages manquantes (avant "start" ou après "end") sont téléchargées. La barre du jour est
+# provisoire : elle n'entre jamais dans la plage couverte et est re-téléchargée au plus toutes les
+# PROVISIONAL_TTL_SECONDS. Les OHLCV bruts et le % de variation sont servis à partir du même DataFrame,
+# donc plusieurs vues du même ticker ne coûtent aucun appel réseau.
+
+PRICE_CACHE_DIR = os.getenv("PRICE_CACHE_DIR", "price_cache")
+PROVISIONAL_TTL_SECONDS = int(os.getenv("PROVISIONAL_TTL_SECONDS", 15 * 60))
+PRICE_BATCH_SIZE = int(os.getenv("PRICE_BATCH_SIZE", 50))
+
+ticker_locks = {}
+ticker_locks_lock = threading.Lock()
+
+
+def ticker_lock(ticker):
+    with ticker_locks_lock:
+        return ticker_locks.setdefault(ticker, threading.Lock())
+
+
+def provider_cache_dir(provider, cache_dir=None, interval="1d"):
+    """One cache directory per provider (and per intraday interval): bars from different sources are never mixed"""
+    base = os.path.join(cache_dir or PRICE_CACHE_DIR, provider.name)
+    return base if interval == "1d" else os.path.join(base, interval)
+
+
+def cache_paths(ticker, cache_dir=None):
+    base = os.path.join(cache_dir or PRICE_CACHE_DIR, ticker.replace("/", "_"))
+    return f"{base}.parquet", f"{base}.json"
+
+
+def load_cached(ticker, cache_dir=None):
+    bars_path, meta_path = cache_paths(ticker, cache_dir)
+    if not os.path.exists(bars_path) or not os.path.exists(meta_path):
+        return empty_bars(), {}
+    with open(meta_path) as f:
+        return pd.read_parquet(bars_path), json.load(f)
+
+
+def save_cached(ticker, bars, meta, cache_dir=None):
+    bars_path, meta_path = cache_paths(ticker, cache_dir)
+    os.makedirs(os.path.dirname(bars_path), exist_ok=True)
+    # Barres d'abord, plage couverte ensuite : un arrêt entre les deux ne fait que re-télécharger.
+    # Noms temporaires propres à chaque écriture : dashboard et démon peuvent mettre à jour le même ticker.
+    suffix = f".{os.getpid()}.{uuid.uuid4().hex}.tmp"
+    bars.to_parquet(bars_path + suffix)
+    os.replace(bars_path + suffix, bars_path)
+    with open(meta_path + suffix, "w") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + suffix, meta_path)
+
+
+# La fonction fetch_ohlcv_many télécharge les barres de plusieurs tickers entre start et end (inclus)
+# auprès du fournisseur, en un seul appel s'il sait grouper les requêtes, et renvoie un dict ticker -> barres.
+
+def fetch_ohlcv_many(tickers, start, end, provider=None, interval="1d"):
+    return get_provider(provider).fetch(list(tickers), start, end, interval)
+
+
+def fetch_ohlcv(ticker, start, end, provider=None, interval="1d"):
+    """Bars of one ticker between start and end (both included)"""
+    return fetch_ohlcv_many([ticker], start, end, provider, interval)[ticker]
+
+
+# La fonction missing_ranges renvoie les plages (début, fin) à télécharger pour couvrir [start, end],
+# sachant que [covered_start, covered_end] l'a déjà été. Les plages touchent toujours la plage couverte
+# (quitte à télécharger quelques jours de plus) pour qu'elle reste d'un seul tenant.
+
+def missing_ranges(start, end, covered_start=None, covered_end=None):
+    if start > end:
+        return []
+    if covered_start is None:
+        return [(start, end)]
+    ranges = []
+    if start < covered_start:
+        ranges.append((start, covered_start - timedelta(days=1)))
+    if end > covered_end:
+        ranges.append((covered_end + timedelta(days=1), end))
+    return ranges
+
+
+def merge_ranges(ranges):
+    """Merge touching (start, end) ranges so that adjacent gaps cost a single request"""
+    merged = []
+    for a, b in sorted(ranges):
+        if merged and a <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(b, merged[-1][1]))
+        else:
+            merged.append((a, b))
+    return merged
+
+
+# La fonction plan_ranges renvoie les plages à télécharger pour un ticker dont le cache couvre meta,
+# et si la barre provisoire du jour doit être rafraîchie.
+
+def plan_ranges(meta, start, end, today):
+    covered_start = pd.Timestamp(meta["start"]).date() if meta.get("start") else None
+    covered_end = pd.Timestamp(meta["end"]).date() if meta.get("end") else None
+
+    # La plage couverte s'arrête à la veille : la barre du jour (provisoire) est gérée à part
+    ranges = missing_ranges(start, min(end, today - timedelta(days=1)), covered_start, covered_end)
+    refresh_today = end >= today and time.time() - meta.get("provisional_at", 0) > PROVISIONAL_TTL_SECONDS
+    if refresh_today:
+        ranges.append((today, today))
+    return ranges, refresh_today
+
+
+# La fonction update_cached fusionne les barres téléchargées dans le cache d'un ticker et étend sa plage
+# couverte aux plages réussies (hors barre du jour).
+
+def update_cached(ticker, bars, meta, ranges, refresh_today, fetched, failed, today, cache_dir=None):
+    # Les barres téléchargées remplacent celles du cache (barre provisoire comprise)
+    if fetched:
+        bars = pd.concat([f for f in [bars] + fetched if not f.empty])
+        bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+
+    covered_start = pd.Timestamp(meta["start"]).date() if meta.get("start") else None
+    covered_end = pd.Timestamp(meta["end"]).date() if meta.get("end") else None
+    complete = [(a, b) for a, b in ranges
+                if b < today and not any(fa <= a and b <= fb for fa, fb in failed)]
+    if complete:
+        meta["start"] = str(min([a for a, _ in complete] + ([covered_start] if covered_start else [])))
+        meta["end"] = str(max([b for _, b in complete] + ([covered_end] if covered_end else [])))
+    if meta.get("empty_ranges") and meta.get("start"):
+        # Plages vides désormais couvertes (confirmées ou recouvertes par un téléchargement plus large)
+        meta["empty_ranges"] = [key for key in meta["empty_ranges"]
+                                if not (meta["start"] <= key.split(":")[0] and key.split(":")[1] <= meta["end"])]
+    if refresh_today:
+        meta["provisional_at"] = time.time()
+    save_cached(ticker, bars, meta, cache_dir)
+    return bars
+
+
+# La fonction cached_ohlcv renvoie {ticker: barres entre start et end} depuis le cache. Les plages manquantes
+# sont regroupées entre tickers : tous les tickers auxquels il manque la même plage (cas courant : la veille
+# et la barre du jour pour tout l'univers) sont téléchargés ensemble, par lots de PRICE_BATCH_SIZE.
+
+def cached_ohlcv(tickers, start, end, cache_dir=None, batch_size=None, provider=None, interval="1d"):
+    start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+    today = datetime.now().date()
+    batch_size = batch_size or PRICE_BATCH_SIZE
+    tickers = list(dict.fromkeys(tickers))
+
+    provider = get_provider(provider)
+    if not provider.cacheable:
+        # Fichiers locaux ou données synthétiques : lus directement, sans recopie dans le cache
+        return provider.fetch(tickers, start, end, interval)
+    cache_dir = provider_cache_dir(provider, cache_dir, interval)
+
+    # Verrous pris dans un ordre fixe pour que deux appels concurrents sur des univers qui se recouvrent
+    # ne puissent pas s'interbloquer
+    locks = [ticker_lock(ticker) for ticker in sorted(tickers)]
+    for lock in locks:
+        lock.acquire()
+    try:
+        state, requests = {}, {}
+        for ticker in tickers:
+            bars, meta = load_cached(ticker, cache_dir)
+            ranges, refresh_today = plan_ranges(meta, start, end, today)
+            state[ticker] = (bars, meta, ranges, refresh_today)
+            metrics.inc("cache_misses_total" if ranges else "cache_hits_total", cache="prices")
+            for request_range in merge_ranges(ranges):
+                requests.setdefault(request_range, []).append(ticker)
+
+        fetched = {ticker: [] for ticker in tickers}
+        failed = {ticker: [] for ticker in tickers}
+        for (a, b), group in requests.items():
+            for i in range(0, len(group), batch_size):
+                for ticker, frame in fetch_ohlcv_many(group[i:i + batch_size], a, b, provider, interval).items():
+                    past_end = min(b, today - timedelta(days=1))
+                    if not frame.empty:
+                        fetched[ticker].append(frame)
+                    elif len(pd.bdate_range(a, past_end)) > 0:
+                        # yfinance renvoie un DataFrame vide en cas d'erreur réseau, mais aussi pour des jours
+                        # fériés. Premier vide : la plage n'est pas marquée comme couverte et sera redemandée
+                        # au prochain appel. Second vide pour la même plage passée : jours sans cotation, acceptée.
+                        empty_ranges = state[ticker][1].setdefault("empty_ranges", [])
+                        key = f"{a}:{past_end}"
+                        if key in empty_ranges:
+                            empty_ranges.remove(key)
+                        else:
+                            empty_ranges.append(key)
+                            metrics.inc("http_errors_total", source=provider.name)
+                            failed[ticker].append((a, b))
+
+        result = {}
+        for ticker in tickers:
+            bars, meta, ranges, refresh_today = state[ticker]
+            if ranges:
+                bars = update_cached(ticker, bars, meta, ranges, refresh_today,
+                                     fetched[ticker], failed[ticker], today, cache_dir)
+            result[ticker] = select_range(bars, start, end).copy()
+    finally:
+        for lock in reversed(locks):
+            lock.release()
+    return result
+
+
+# La fonction get_ohlcv renvoie les barres d'un ticker entre start et end (dates incluses) depuis le cache,
+# en ne téléchargeant que les jours manquants et la barre provisoire du jour si elle est trop ancienne.
+
+def get_ohlcv(ticker, start, end, cache_dir=None, provider=None, interval="1d"):
+    return cached_ohlcv([ticker], start, end, cache_dir, provider=provider, interval=interval)[ticker]
+
+
+# La fonction get_ohlcv_many fait de même pour plusieurs tickers et renvoie un DataFrame aux colonnes
+# (ticker, champ), comme yf.download(..., group_by='ticker') : rafraîchir tout l'univers coûte un aller-retour
+# par lot au lieu d'un par ticker.
+
+def get_ohlcv_many(tickers, start, end, cache_dir=None, batch_size=None, provider=None, interval="1d"):
+    frames = cached_ohlcv(tickers, start, end, cache_dir, batch_size, provider, interval)
+    return pd.concat(frames, axis=1).sort_index()
+
+
+def pct_change_from_bars(bars):
+    """Daily % change ((Close - Open) / Open) * 100 of an OHLCV frame, dates x tickers if columns are (ticker, field)"""
+    if isinstance(bars.columns, pd.MultiIndex):
+        open_, close = bars.xs("Open", axis=1, level=1), bars.xs("Close", axis=1, level=1)
+    else:
+        open_, close = bars["Open"], bars["Close"]
+    return ((close - open_) / open_) * 100
+
+
+def window_bounds(days_back=30, include_today=True):
+    """(start, end) dates of the last days_back days, both included"""
+    end = datetime.now().date()
+    if not include_today:
+        end -= timedelta(days=1)
+    return end - timedelta(days=days_back), end
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from stock_data.dict_per_stock import get_stock_data
+from stock_data.dataframe_percent import get_pct_change_df
+
+
+def get_price_frame(
+    ticker,
+    days_back=30,
+    include_today=True,
+    provider=None
+):
+    """
+    Construit le DataFrame de prix utilisé par le dashboard pour un ticker :
+    une ligne par jour avec date, open, high, low, close, volume et price_change_pct.
+
+    Args:
+        ticker (str): Symbole boursier.
+        days_back (int): Nombre de jours à remonter dans le passé.
+        include_today (bool): Si True, la période s’arrête à aujourd’hui.
+        provider (str | MarketDataProvider | None): Fournisseur de barres (stock_data/providers.py).
+
+    Returns:
+        pd.DataFrame: Données OHLCV (colonnes en minuscules) et % de variation journalière.
+    """
+    df_raw = get_stock_data(tickers=ticker, days_back=days_back, include_today=include_today, provider=provider)
+    df_pct = get_pct_change_df(tickers=ticker, days_back=days_back, include_today=include_today, provider=provider)
+
+    if isinstance(df_raw.columns, pd.MultiIndex):
+        df_raw = df_raw[ticker]
+
+    df_raw = df_raw.reset_index()
+    df_raw.columns = [c.lower() for c in df_raw.columns]
+
+    if ticker in df_pct.columns:
+        df_raw["price_change_pct"] = df_pct[ticker].values
+    else:
+        df_raw["price_change_pct"] = np.nan
+
+    return df_raw
@@ -0,0 +1,230 @@
+import os
+import zlib
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from functools import lru_cache
+
+import pandas as pd
+
+import metrics
+
+
+# Fournisseurs de barres OHLCV, interchangeables derrière la même interface :
+#
+#   provider = get_provider("local")            # ou MARKET_DATA_PROVIDER=local
+#   bars = provider.fetch(["AAPL", "MSFT"], start, end, interval="1d")   # {ticker: DataFrame}
+#
+#   yfinance    Yahoo Finance (réseau), ajusté, groupé, intraday (historique limité par Yahoo)
+#   local       répertoire de fichiers de barres <root>/<interval>/<ticker>.parquet|.csv
+#               (ou <root>/<ticker>.parquet|.csv pour le journalier), p. ex. nos fichiers internes
+#   synthetic   marche aléatoire reproductible (synthetic_data.py), sans réseau, pour les benchmarks
+#
+# Chaque fournisseur déclare ce qu'il sait faire (intraday, adjusted, batch) ; cacheable indique si
+# le cache local des prix (price_cache.py) a un intérêt (inutile pour des fichiers déjà locaux).
+# Les barres renvoyées ont un index "Date" sans fuseau et les colonnes Open, High, Low, Close, Volume.
+# Les barres intraday sont horodatées à leur début, en heure locale de la place (comme yfinance),
+# sur la séance de la place du ticker (market_session).
+
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+LOCAL_BARS_DIR = os.getenv("LOCAL_BARS_DIR", "bars")
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", 0))
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+INTERVALS = ("15m", "1h", "1d")
+MARKET_TIMEZONE = os.getenv("MARKET_TIMEZONE", "America/New_York")
+SESSION_OPEN = os.getenv("SESSION_OPEN", "09:30")
+SESSION_CLOSE = os.getenv("SESSION_CLOSE", "16:00")
+
+# Fuseau et séance (heure locale) par suffixe de ticker Yahoo ; sans suffixe connu : marché américain,
+# MARKET_TIMEZONE et SESSION_OPEN → SESSION_CLOSE
+EXCHANGE_SESSIONS = {
+    "PA": ("Europe/Paris", "09:00", "17:30"),      # Euronext Paris
+    "AS": ("Europe/Amsterdam", "09:00", "17:30"),  # Euronext Amsterdam
+    "BR": ("Europe/Brussels", "09:00", "17:30"),   # Euronext Bruxelles
+    "MI": ("Europe/Rome", "09:00", "17:30"),       # Borsa Italiana
+    "MC": ("Europe/Madrid", "09:00", "17:30"),     # Bolsa de Madrid
+    "DE": ("Europe/Berlin", "09:00", "17:30"),     # Xetra
+    "SW": ("Europe/Zurich", "09:00", "17:30"),     # SIX
+    "L": ("Europe/London", "08:00", "16:30"),      # London Stock Exchange
+    "TO": ("America/Toronto", "09:30", "16:00"),   # Toronto Stock Exchange
+}
+
+
+def market_session(ticker=None):
+    """(timezone, session open, session close) of the exchange a ticker trades on, from its suffix"""
+    suffix = ticker.rsplit(".", 1)[1].upper() if ticker and "." in ticker else ""
+    return EXCHANGE_SESSIONS.get(suffix, (MARKET_TIMEZONE, SESSION_OPEN, SESSION_CLOSE))
+
+
+def empty_bars():
+    return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+
+
+def normalize_bars(data, interval="1d"):
+    data = data.dropna(how="all")
+    if data.empty:
+        return empty_bars()
+    data.index = pd.DatetimeIndex(data.index).tz_localize(None)
+    if interval == "1d":
+        data.index = data.index.normalize()
+    data.index.name = "Date"
+    return data[OHLCV_COLUMNS]
+
+
+def select_range(bars, start, end):
+    """Rows of bars between the dates start and end, both included"""
+    mask = (bars.index >= pd.Timestamp(start)) & (bars.index < pd.Timestamp(end) + timedelta(days=1))
+    return bars.loc[mask]
+
+
+class MarketDataProvider(ABC):
+    """Base class: fetch(tickers, start, end, interval) -> {ticker: bars}, empty bars when nothing was found"""
+
+    name = None
+    intraday = False
+    adjusted = False
+    batch = False
+    cacheable = False
+
+    def capabilities(self):
+        return {"intraday": self.intraday, "adjusted": self.adjusted, "batch": self.batch}
+
+    def check_interval(self, interval):
+        if interval not in INTERVALS or (interval != "1d" and not self.intraday):
+            raise ValueError(f"{self.name} provider does not support interval {interval!r}")
+
+    def fetch(self, tickers, start, end, interval="1d"):
+        self.check_interval(interval)
+        return {ticker: self.fetch_one(ticker, start, end, interval) for ticker in tickers}
+
+    @abstractmethod
+    def fetch_one(self, ticker, start, end, interval="1d"):
+        """Bars of one ticker between start and end (both included)"""
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.capabilities()}>"
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+    intraday = True
+    adjusted = True
+    batch = True
+    cacheable = True
+
+    def fetch(self, tickers, start, end, interval="1d"):
+        import yfinance as yf
+
+        self.check_interval(interval)
+        tickers = list(tickers)
+        with metrics.span("yfinance_download"):
+            data = yf.download(
+                tickers,
+                start=pd.Timestamp(start).strftime('%Y-%m-%d'),
+                end=(pd.Timestamp(end) + timedelta(days=1)).strftime('%Y-%m-%d'),
+                interval=interval,
+                auto_adjust=True,
+                progress=False,
+                group_by='ticker',
+                threads=True
+            )
+        frames = {}
+        for ticker in tickers:
+            # Colonnes (ticker, champ) ; un ticker inconnu ou en erreur est absent ou entièrement NaN
+            if isinstance(data.columns, pd.MultiIndex) and ticker in data.columns.get_level_values(0):
+                frames[ticker] = normalize_bars(data[ticker], interval)
+            else:
+                frames[ticker] = empty_bars()
+        return frames
+
+    def fetch_one(self, ticker, start, end, interval="1d"):
+        return self.fetch([ticker], start, end, interval)[ticker]
+
+
+class LocalBarsProvider(MarketDataProvider):
+    name = "local"
+    intraday = True
+    batch = True
+
+    def __init__(self, root=None, adjusted=False):
+        self.root = root or LOCAL_BARS_DIR
+        self.adjusted = adjusted
+
+    def bar_path(self, ticker, interval):
+        candidates = [os.path.join(self.root, interval, ticker)]
+        if interval == "1d":
+            candidates.append(os.path.join(self.root, ticker))
+        for base in candidates:
+            for ext in (".parquet", ".csv"):
+                if os.path.exists(base + ext):
+                    return base + ext
+        return None
+
+    def fetch_one(self, ticker, start, end, interval="1d"):
+        path = self.bar_path(ticker.replace("/", "_"), interval)
+        if path is None:
+            return empty_bars()
+        if path.endswith(".parquet"):
+            data = pd.read_parquet(path)
+        else:
+            data = pd.read_csv(path)
+        # Index ou première colonne de dates, noms de colonnes en minuscules acceptés
+        data = data.rename(columns={c: c.capitalize() for c in data.columns if c.capitalize() in OHLCV_COLUMNS})
+        if not isinstance(data.index, pd.DatetimeIndex):
+            date_column = next((c for c in data.columns if c.lower() in ("date", "datetime", "timestamp")), data.columns[0])
+            data = data.set_index(pd.to_datetime(data.pop(date_column)))
+        return select_range(normalize_bars(data.sort_index(), interval), start, end)
+
+
+class SyntheticProvider(MarketDataProvider):
+    name = "synthetic"
+    intraday = True
+    adjusted = True
+    batch = True
+
+    # Série fixe de jours ouvrés par ticker : une même date a toujours la même barre, quelle que soit
+    # la fenêtre demandée
+    ANCHOR_START = "2015-01-01"
+    ANCHOR_END = "2030-12-31"
+
+    def __init__(self, seed=None):
+        self.seed = SYNTHETIC_SEED if seed is None else seed
+
+    def fetch_one(self, ticker, start, end, interval="1d"):
+        bars = synthetic_history(ticker, self.seed, self.ANCHOR_START, self.ANCHOR_END, interval)
+        return select_range(bars, start, end).copy()
+
+
+@lru_cache(maxsize=256)
+def synthetic_history(ticker, seed, anchor_start, anchor_end, interval="1d"):
+    import synthetic_data
+
+    ticker_seed = seed + zlib.crc32(ticker.encode())
+    if interval != "1d":
+        # Barres intraday tirées des barres journalières : les deux résolutions restent cohérentes
+        daily = synthetic_history(ticker, seed, anchor_start, anchor_end)
+        _, session_open, session_close = market_session(ticker)
+        return synthetic_data.intraday_ohlcv(daily, interval, seed=ticker_seed,
+                                             session_open=session_open, session_close=session_close)
+    n_days = len(pd.bdate_range(anchor_start, anchor_end))
+    data = synthetic_data.ohlcv(n_days, (ticker,), seed=ticker_seed, end=anchor_end)
+    return normalize_bars(data[ticker])
+
+
+PROVIDERS = {
+    "yfinance": YFinanceProvider,
+    "local": LocalBarsProvider,
+    "synthetic": SyntheticProvider,
+}
+
+
+# La fonction get_provider renvoie le fournisseur demandé : une instance est renvoyée telle quelle,
+# un nom est cherché dans PROVIDERS, None prend MARKET_DATA_PROVIDER.
+
+def get_provider(provider=None):
+    if isinstance(provider, MarketDataProvider):
+        return provider
+    name = provider or MARKET_DATA_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown market data provider {name!r} (expected one of {sorted(PROVIDERS)})")
+    return PROVIDERS[name]()
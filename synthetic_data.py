@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from stock_keywords import STOCK_KEYWORDS
+
+
+# Générateur de données synthétiques (reproductibles via seed) pour les benchmarks :
+#   - messages au format du scraper Reddit (longueurs, mentions de tickers, commentaires par post)
+#   - page HTML de résultats de recherche Bloomberg
+#   - séries OHLCV au format yf.download(group_by='ticker'), journalières ou intraday (15m, 1h)
+#   - sentiment journalier au format attendu par score_compatibilite_df
+
+VOCABULARY = (
+    "the a to and of in is it for on that this with my i you be are at have just not but so market "
+    "stock shares price buy sell hold earnings growth revenue guidance quarter calls puts options "
+    "bullish bearish rally dip crash moon long short position portfolio dividend valuation analyst "
+    "target upgrade downgrade volatility risk fed rates inflation tech luxury bank pharma cars "
+    "good great strong weak bad terrible amazing awful solid cheap expensive overvalued undervalued "
+    "really very not never always maybe think believe expect hope worried happy sad loss gain"
+).split()
+
+SUBREDDITS = ['investing', 'stocks', 'StockMarket', 'wallstreetbets', 'options', 'eupersonalfinance', 'france', 'europe']
+
+
+# La fonction random_texts génère n textes dont le nombre de mots suit une loi log-normale
+# (beaucoup de messages courts, quelques très longs), avec une mention du ticker dans une fraction mention_rate.
+
+def random_texts(n, rng, ticker=None, mention_rate=0.6, median_words=25, sigma=0.9, max_words=600):
+    lengths = np.clip(rng.lognormal(np.log(median_words), sigma, n).astype(int), 1, max_words)
+    words = rng.choice(VOCABULARY, size=int(lengths.sum()))
+    mentions = rng.random(n) < mention_rate
+    keywords = STOCK_KEYWORDS[ticker]["primary"] + STOCK_KEYWORDS[ticker]["context"] if ticker else []
+
+    texts = []
+    offset = 0
+    for i, length in enumerate(lengths):
+        tokens = list(words[offset:offset + length])
+        offset += length
+        if keywords and mentions[i]:
+            tokens.insert(int(rng.integers(0, len(tokens) + 1)), keywords[int(rng.integers(0, len(keywords)))])
+        texts.append(" ".join(tokens))
+    return texts
+
+
+# La fonction reddit_messages génère n_posts posts et leurs commentaires (nombre de commentaires par post
+# selon une loi binomiale négative : la plupart des posts en ont peu, quelques-uns beaucoup), sur days_back jours.
+# Les colonnes sont celles de RedditStockScraper.get_dataframe().
+
+def reddit_messages(n_posts, ticker="AAPL", days_back=30, seed=0, mean_comments=8, mention_rate=0.6):
+    rng = np.random.default_rng(seed)
+    fan_out = rng.negative_binomial(1, 1 / (1 + mean_comments), n_posts)
+    n = n_posts + int(fan_out.sum())
+
+    is_post = np.zeros(n, dtype=bool)
+    post_rows = np.concatenate([[0], np.cumsum(fan_out[:-1] + 1)])
+    is_post[post_rows] = True
+    parent = np.repeat(np.arange(n_posts), fan_out + 1)
+
+    now = datetime.now()
+    post_ages = rng.uniform(0, days_back * 86400, n_posts)
+    # Les commentaires arrivent dans les heures qui suivent leur post
+    ages = np.maximum(post_ages[parent] - np.where(is_post, 0, rng.exponential(6 * 3600, n)), 0)
+
+    titles = random_texts(n_posts, rng, ticker, mention_rate, median_words=10, sigma=0.4)
+    return pd.DataFrame({
+        'message_id': [f"m{seed}_{i}" for i in range(n)],
+        'type': np.where(is_post, 'post', 'comment'),
+        'subreddit': rng.choice(SUBREDDITS, n_posts)[parent],
+        'stock_symbol': ticker,
+        'company_name': STOCK_KEYWORDS[ticker]["company"],
+        'title': np.array(titles, dtype=object)[parent],
+        'content': random_texts(n, rng, ticker, mention_rate),
+        'author': [f"user{k}" for k in rng.integers(0, max(n // 3, 1), n)],
+        'score': rng.geometric(0.05, n),
+        'created_utc': [now - timedelta(seconds=float(a)) for a in ages],
+        'source': 'reddit',
+    })
+
+
+# La fonction bloomberg_html génère une page de résultats de recherche Bloomberg avec n_articles résumés,
+# dont une part hors sujet (off_topic_rate) et une part de doublons (duplicate_rate), et des dates
+# au format "5 hr ago" ou "October 15, 2025".
+
+def bloomberg_html(n_articles, company="Apple", seed=0, duplicate_rate=0.15, off_topic_rate=0.2):
+    rng = np.random.default_rng(seed)
+    summaries = []
+    for i in range(n_articles):
+        if summaries and rng.random() < duplicate_rate:
+            summaries.append(summaries[int(rng.integers(0, len(summaries)))])
+            continue
+        text = " ".join(rng.choice(VOCABULARY, int(rng.integers(15, 60))))
+        if rng.random() >= off_topic_rate:
+            text = f"{company} {text}"
+        summaries.append(text.capitalize() + ".")
+
+    rows = []
+    for i, summary in enumerate(summaries):
+        if rng.random() < 0.3:
+            timestamp = f"{int(rng.integers(1, 24))} hr ago"
+        else:
+            timestamp = (datetime.now() - timedelta(days=int(rng.integers(1, 30)))).strftime('%B %d, %Y')
+        rows.append(
+            f'<div class="SearchResult_rowOrStackResultTimestamp__a1b2{i % 7}">'
+            f'<time class="SearchResult_itemTimestamp__x9y8">{timestamp}</time>'
+            f'<section data-component="summary">{summary}</section></div>'
+        )
+    return f"<html><body><div class=\"SearchResults\">{''.join(rows)}</div></body></html>"
+
+
+def bloomberg_timestamps(n, seed=0):
+    """Mix of 'h hr ago', 'Month d, YYYY' and ISO strings, as found on Bloomberg pages"""
+    rng = np.random.default_rng(seed)
+    kinds = rng.integers(0, 3, n)
+    days = rng.integers(1, 365, n)
+    base = datetime.now()
+    return [
+        f"{d % 24} hr ago" if k == 0
+        else (base - timedelta(days=int(d))).strftime('%B %d, %Y') if k == 1
+        else (base - timedelta(days=int(d))).strftime('%Y-%m-%d')
+        for k, d in zip(kinds, days)
+    ]
+
+
+# La fonction ohlcv génère n_days jours ouvrés de prix (marche aléatoire géométrique) pour chaque ticker,
+# au format de yf.download(..., group_by='ticker') : colonnes MultiIndex (ticker, champ).
+
+def ohlcv(n_days, tickers=("AAPL",), seed=0, end=None):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp(end or datetime.now().date()), periods=n_days, name="Date")
+    frames = {}
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n_days)))
+        open_ = close * np.exp(rng.normal(0, 0.008, n_days))
+        spread = np.abs(rng.normal(0, 0.01, n_days))
+        frames[ticker] = pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + spread),
+            'Low': np.minimum(open_, close) * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(1_000_000, 50_000_000, n_days),
+        }, index=dates)
+    return pd.concat(frames, axis=1)
+
+
+# La fonction intraday_ohlcv découpe chaque barre journalière (colonnes Open, High, Low, Close, Volume)
+# en barres de `interval` sur la séance session_open → session_close : le prix suit un pont brownien
+# de l'ouverture à la clôture du jour, donc les barres intraday restent cohérentes avec les barres journalières.
+# Comme yfinance, la dernière barre d'une séance peut être plus courte (15h30 → 16h en 1h).
+
+def intraday_ohlcv(daily, interval="1h", seed=0, session_open="09:30", session_close="16:00"):
+    rng = np.random.default_rng(seed)
+    step = pd.Timedelta(interval.replace("m", "min"))
+    session_length = pd.Timedelta(session_close + ":00") - pd.Timedelta(session_open + ":00")
+    offsets = pd.Timedelta(session_open + ":00") + pd.timedelta_range(0, periods=int(np.ceil(session_length / step)), freq=step)
+    n_days, k = len(daily), len(offsets)
+
+    log_open = np.log(daily["Open"].to_numpy(dtype=float))
+    log_close = np.log(daily["Close"].to_numpy(dtype=float))
+    t = np.arange(k + 1) / k
+    walk = np.concatenate([np.zeros((n_days, 1)), np.cumsum(rng.normal(0, 0.004, (n_days, k)), axis=1)], axis=1)
+    bridge = walk - t * walk[:, -1:]
+    path = np.exp(log_open[:, None] + t * (log_close - log_open)[:, None] + bridge)
+
+    open_, close = path[:, :-1], path[:, 1:]
+    spread = np.abs(rng.normal(0, 0.002, (n_days, k)))
+    # Volume du jour réparti en U (plus d'échanges à l'ouverture et à la clôture)
+    weights = (1 + 2 * (np.linspace(-1, 1, k) ** 2)) * rng.uniform(0.5, 1.5, (n_days, k))
+    volume = daily["Volume"].to_numpy(dtype=float)[:, None] * weights / weights.sum(axis=1, keepdims=True)
+
+    index = pd.DatetimeIndex((pd.DatetimeIndex(daily.index).normalize().to_numpy()[:, None] + offsets.to_numpy()).ravel(),
+                             name="Date")
+    return pd.DataFrame({
+        'Open': open_.ravel(),
+        'High': (np.maximum(open_, close) * (1 + spread)).ravel(),
+        'Low': (np.minimum(open_, close) * (1 - spread)).ravel(),
+        'Close': close.ravel(),
+        'Volume': volume.ravel().astype(np.int64),
+    }, index=index)
+
+
+# La fonction sentiment_series génère un sentiment journalier (calendaire) partiellement corrélé
+# au % de variation de la veille, au format dict de score_compatibilite_df.
+
+def sentiment_series(pct_change, seed=0, noise=1.0):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(pct_change.index.min(), pct_change.index.max())
+    lagged = pct_change.reindex(days).ffill().shift(1).fillna(0).to_numpy().ravel()
+    score = np.tanh(0.3 * lagged + noise * rng.normal(0, 0.3, len(days)))
+    return {"GlobalScore": score.tolist(), "analysis_date": [d.strftime('%Y-%m-%d') for d in days]}